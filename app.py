@@ -2,20 +2,30 @@
 import streamlit as st
 import json
 import html
-import io
-from pdf2image import convert_from_bytes
-import pytesseract
-from PIL import Image
-
-try:
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib import colors
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-except Exception:
-    reportlab_available = False
-else:
-    reportlab_available = True
+import os
+import hashlib
+import importlib.util
+
+from lab_registry import LabPanel, get_registry, start_watcher
+from ml_layer import MLAnalysis, lab_flags
+from ocr_layer import iter_ocr_pages, pdf_page_count
+from parsing_layer import match_lab_lines
+from pipeline import analyze_pages
+from result_cache import RESULT_CACHE
+
+# The OCR stack (via ocr_layer), requests and reportlab are imported where
+# they are used, so a fresh Streamlit session renders the upload form without
+# loading them.
+reportlab_available = importlib.util.find_spec("reportlab") is not None
+
+# Set to the API's base URL (e.g. http://127.0.0.1:8000) to send uploads to the
+# FastAPI backend instead of running the pipeline inside the Streamlit process.
+BACKEND_URL = os.getenv("LAB_APP_BACKEND_URL", "").rstrip("/")
+BACKEND_TIMEOUT_S = float(os.getenv("LAB_APP_BACKEND_TIMEOUT_S", "300"))
+BACKEND_POOL_SIZE = int(os.getenv("LAB_APP_BACKEND_POOL_SIZE", "8"))
+
+# Pick up edits to lab_config.json without restarting Streamlit.
+start_watcher()
 
 st.set_page_config(page_title="Lab Report Interpreter", layout="wide")
 st.markdown(
@@ -42,241 +52,301 @@ if not uploaded:
     st.info("Upload a PDF to get started.")
     st.stop()
 
-KEYWORDS = {
-    "hemoglobin": ["hemoglobin", "hb"],
-    "wbc": ["wbc", "white blood"],
-    "platelets": ["platelet", "plt"],
-    "glucose": ["glucose", "fbs", "fasting"],
-    "cholesterol": ["cholesterol", "tchol"],
-    "age": ["age", "yrs", "years"]
-}
-RANGES = {
-    "hemoglobin": (12.0, 17.0),
-    "wbc": (4.0, 11.0),
-    "platelets": (150.0, 450.0),
-    "glucose": (70.0, 99.0),
-    "cholesterol": (0.0, 200.0)
-}
-COLORS = {
-    "hemoglobin": "#ffd6d6",
-    "wbc": "#fff0d1",
-    "platelets": "#fff9d9",
-    "glucose": "#eaffea",
-    "cholesterol": "#e6f0ff",
-    "age": "#f3e6ff"
-}
+PALETTE = ["#ffd6d6", "#fff0d1", "#fff9d9", "#eaffea", "#e6f0ff", "#f3e6ff", "#d9f7f4", "#ffe0f0"]
+COLORS = {lab: PALETTE[i % len(PALETTE)] for i, lab in enumerate(get_registry().keys)}
+
+
+def lab_title(lab):
+    meta = get_registry().meta(lab)
+    return meta["name"] if meta else lab.replace("_", " ").title()
+
+
+def analysis_view(parts):
+    """Values, flags, hints and matched lines the UI shows for pipeline parts."""
+    parsed = parts["parsed_labs"]
+    ml = parts["ml_result"]
+    if not isinstance(ml, MLAnalysis):
+        ml = MLAnalysis.from_dict(ml)  # JSON from the backend
+    conditions = {"overall_risk": ml.risk.risk_label}
+    conditions.update((c, "possible") for c in ml.conditions)
+    lines = parts["full_text"].splitlines()
+    flags = lab_flags(parsed)
+    if isinstance(parsed, LabPanel):
+        parsed = parsed.to_dict()
+    return parsed, flags, conditions, match_lab_lines(lines), lines
+
+
+# Cached artifacts are keyed by the SHA-256 of the upload (arguments starting
+# with "_" are not hashed by Streamlit), so reruns caused by widgets or
+# download clicks never OCR or render the same file again. Finished analyses
+# also go to the backend's result cache, which the API serves from as well.
+CACHE_MAX_ENTRIES = int(os.getenv("LAB_APP_CACHE_ENTRIES", "8"))
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def page_count_cached(digest: str, _file_bytes: bytes) -> int:
+    return pdf_page_count(_file_bytes)
+
+
+@st.cache_resource
+def backend_session():
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    # One keep-alive pool per Streamlit server, shared by every session.
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=BACKEND_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def analyze_remote(digest: str, _file_bytes: bytes):
+    """Pipeline parts for an upload, computed (or already cached) by the backend."""
+    session = backend_session()
+    params = {"include": "ocr,lean"}
+    resp = session.get(f"{BACKEND_URL}/results/{digest}", params=params, timeout=30)
+    if resp.status_code == 404:
+        files = {"file": ("report.pdf", _file_bytes, "application/pdf")}
+        resp = session.post(f"{BACKEND_URL}/analyze_report", params=params, files=files,
+                            timeout=BACKEND_TIMEOUT_S)
+    resp.raise_for_status()
+    data = resp.json()
+    ocr = data.get("ocr") or {}
+    pages = ocr.get("pages") or []
+    return {
+        "pages": pages,
+        "full_text": ocr.get("full_text") or "",
+        "parsed_labs": data.get("parsed_labs") or {},
+        "ml_result": data["ml_result"],
+        "pages_total": ocr.get("pages_total") or len(pages),
+    }
+
 
-def first_number_in_line(line: str):
-    for token in line.replace(",", " ").split():
-        token = token.strip(":;")
-        cleaned = "".join(ch for ch in token if (ch.isdigit() or ch == "." or ch == "-"))
-        if cleaned and any(ch.isdigit() for ch in cleaned):
-            try:
-                return float(cleaned)
-            except:
-                pass
-    return None
-
-def ocr_pdf_bytes(file_bytes: bytes, dpi=300):
-    pages = convert_from_bytes(file_bytes, dpi=dpi)
-    texts = []
-    for page in pages:
-        gray = page.convert("L")
-        txt = pytesseract.image_to_string(gray)
-        texts.append(txt)
-    return "\n\n".join(texts)
-
-def parse_and_match_lines(text: str):
-    parsed = {k: None for k in KEYWORDS}
-    matches = {k: [] for k in KEYWORDS}
-    lines = text.splitlines()
-    for i, line in enumerate(lines):
-        low = line.lower()
-        for lab, kws in KEYWORDS.items():
-            found_kw_in_line = any(kw in low for kw in kws)
-            if found_kw_in_line:
-                val = first_number_in_line(line)
-                if parsed[lab] is None and val is not None:
-                    parsed[lab] = int(val) if lab == "age" else float(val)
-                matches[lab].append((i, line, val))
-    return parsed, matches, lines
-
-def interpret(parsed):
-    flags = {}
-    for lab, rng in RANGES.items():
-        v = parsed.get(lab)
-        if v is None:
-            flags[lab] = "not found"
+# The highlight viewer sends one window of OCR lines per rerun instead of the
+# whole document, so payload and render time do not grow with report length.
+VIEW_WINDOW_LINES = int(os.getenv("LAB_APP_VIEW_LINES", "150"))
+# Lines shown above a line reached through "Jump to".
+VIEW_CONTEXT_LINES = 5
+
+
+def line_label(labs_on_line):
+    return " | ".join(f"{lab}{('='+str(int(val)) if val and val==int(val) else ('='+str(val) if val else ''))}" for lab, val in labs_on_line)
+
+
+def highlight_window_html(lines, line_lab_map, start, stop, target=None):
+    html_lines = []
+    for i in range(start, stop):
+        raw_line = lines[i]
+        safe = html.escape(raw_line) if raw_line.strip() != "" else "&nbsp;"
+        if i in line_lab_map:
+            labs_on_line = line_lab_map[i]
+            color = COLORS.get(labs_on_line[0][0], "#fff9e6")
+            border = "border:2px solid #111;" if i == target else ""
+            html_lines.append(
+                f"<div style='background:{color}; padding:10px; border-radius:8px; margin-bottom:6px;{border}'>"
+                f"<div style='font-weight:700; margin-bottom:6px; color:#111'>{i + 1}: {line_label(labs_on_line)}</div>"
+                f"<div style='white-space:pre-wrap; font-family:monospace; color:#111'>{safe}</div>"
+                f"</div>"
+            )
         else:
-            lo, hi = rng
-            flags[lab] = "low" if v < lo else ("high" if v > hi else "normal")
-
-    conditions = {}
-    hb = parsed.get("hemoglobin")
-    wbc = parsed.get("wbc")
-    glucose = parsed.get("glucose")
-    chol = parsed.get("cholesterol")
-
-    conditions["anemia"] = ("possible" if hb is not None and hb < 12.0 else
-                            ("unknown" if hb is None else "unlikely"))
-    if wbc is None:
-        conditions["infection"] = "unknown"
-    else:
-        conditions["infection"] = "possible" if (wbc > 11.0 or wbc < 3.0) else "unlikely"
-    if glucose is None:
-        conditions["diabetes"] = "unknown"
-    else:
-        conditions["diabetes"] = ("likely" if glucose >= 126.0 else
-                                ("borderline" if glucose >= 100.0 else "unlikely"))
-    conditions["high_cholesterol"] = ("possible" if chol is not None and chol > 200.0 else
-                                    ("unknown" if chol is None else "unlikely"))
-    return flags, conditions
+            html_lines.append(f"<div style='color:#555; white-space:pre-wrap; font-family:monospace; margin-bottom:6px'>{safe}</div>")
+    return "<div style='max-height:520px; overflow:auto;'>" + "".join(html_lines) + "</div>"
+
 
-def build_interpreted_pdf_bytes(parsed, flags, conditions, matches, lines, ocr_text):
+def window_controls(prefix, total):
     """
-    Build a nicely formatted PDF (in-memory) summarizing the interpretation.
-    Returns bytes.
+    Prev / Next buttons that move a windowed view of ``total`` lines by
+    VIEW_WINDOW_LINES. Returns the window as (first line, last line + 1); the
+    first line lives in session state under ``<prefix>_start``.
     """
-    if not reportlab_available:
-        raise RuntimeError("reportlab is required to create PDF. Install with: pip install reportlab")
-
-    buf = io.BytesIO()
-    doc = SimpleDocTemplate(buf, pagesize=A4, rightMargin=36, leftMargin=36, topMargin=36, bottomMargin=36)
-    styles = getSampleStyleSheet()
-    story = []
-
-    story.append(Paragraph("ABC Diagnostic Laboratory — Interpreted Report", styles["Title"]))
-    story.append(Spacer(1, 6))
-    story.append(Paragraph("Auto-generated interpretation (simple rules). For clinical decisions, consult a clinician.", styles["Normal"]))
-    story.append(Spacer(1, 12))
-
-    story.append(Paragraph("Extracted Values", styles["Heading2"]))
-    data = [["Test", "Value", "Status"]]
-    for lab in ["hemoglobin", "wbc", "platelets", "glucose", "cholesterol", "age"]:
-        val = parsed.get(lab)
-        status = flags.get(lab, "not found")
-        data.append([lab.capitalize(), str(val) if val is not None else "—", status])
-    t = Table(data, colWidths=[120, 120, 120])
-    t.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#f2f6ff")),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.HexColor("#0f172a")),
-        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("GRID", (0, 0), (-1, -1), 0.3, colors.HexColor("#e6edf7")),
-        ("BOTTOMPADDING", (0, 0), (-1, 0), 8)
-    ]))
-    story.append(t)
-    story.append(Spacer(1, 14))
-
-    story.append(Paragraph("Plain-language summary & suggested next steps", styles["Heading2"]))
-    for k, v in conditions.items():
-        story.append(Paragraph(f"<b>{k.replace('_',' ').title()}:</b> {v}", ParagraphStyle("normal", parent=styles["Normal"], spaceAfter=6)))
-    story.append(Spacer(1, 12))
-
-    story.append(Paragraph("Matched OCR lines (where values were found)", styles["Heading2"]))
-    matched_items = []
+    start_key = f"{prefix}_start"
+
+    def move(step):
+        current = st.session_state.get(start_key, 0)
+        st.session_state[start_key] = min(max(0, current + step), max(0, total - 1))
+
+    start = min(st.session_state.get(start_key, 0), max(0, total - 1))
+    prev_col, info_col, next_col = st.columns([1, 3, 1])
+    prev_col.button("◀ Prev", key=f"{prefix}_prev", on_click=move, args=(-VIEW_WINDOW_LINES,), disabled=start == 0)
+    next_col.button("Next ▶", key=f"{prefix}_next", on_click=move, args=(VIEW_WINDOW_LINES,),
+                    disabled=start + VIEW_WINDOW_LINES >= total)
+    stop = min(total, start + VIEW_WINDOW_LINES)
+    info_col.caption(f"Lines {start + 1 if total else 0}–{stop} of {total}")
+    return start, stop
+
+
+def render_highlights(lines, matches, key=None):
+    """Windowed view of the OCR text; ``key`` enables the navigation widgets."""
+    st.markdown("### Highlights (OCR text)")
+    legend_html = "<div style='display:flex;flex-wrap:wrap;gap:8px;margin-bottom:8px;'>"
+    for lab in matches:
+        color = COLORS.get(lab, "#fff9e6")
+        legend_html += f"<div style='padding:6px 10px;border-radius:8px;background:{color};font-weight:600'>{lab}</div>"
+    legend_html += "</div>"
+    st.markdown(legend_html, unsafe_allow_html=True)
+
+    line_lab_map = {}
     for lab, occ in matches.items():
-        for idx, line, val in occ:
-            matched_items.append((lab, idx, line.strip()))
-    matched_items.sort(key=lambda x: x[1])
-    if not matched_items:
-        story.append(Paragraph("(No matched lines detected in OCR output.)", styles["Normal"]))
-    else:
-        for lab, idx, line in matched_items[:200]:
-            display = f"{lab.upper()} (line {idx+1}): {line}"
-            story.append(Paragraph(display, ParagraphStyle("mono", parent=styles["Code"], fontName="Courier", fontSize=9, spaceAfter=4)))
-
-    story.append(Spacer(1, 12))
-    story.append(Paragraph("Raw OCR text (truncated)", styles["Heading2"]))
-    raw_preview = "\n".join(lines[:50])  # first 50 lines
-    story.append(Paragraph(raw_preview.replace("<","&lt;").replace(">","&gt;"), ParagraphStyle("mono2", parent=styles["Code"], fontName="Courier", fontSize=8)))
+        for idx, ln, val in occ:
+            line_lab_map.setdefault(idx, []).append((lab, val))
+
+    total = len(lines)
+    start, stop, target = 0, min(total, VIEW_WINDOW_LINES), None
+    if key is not None:
+        start_key, jump_key = f"{key}_view_start", f"{key}_view_jump"
+        matched = sorted(line_lab_map)
+
+        def jump():
+            idx = st.session_state[jump_key]
+            if idx is not None:
+                st.session_state[start_key] = max(0, idx - VIEW_CONTEXT_LINES)
+
+        st.selectbox(
+            "Jump to matched line",
+            matched,
+            index=None,
+            format_func=lambda i: f"{i + 1}: {line_label(line_lab_map[i])}",
+            key=jump_key,
+            on_change=jump,
+            placeholder=f"{len(matched)} matched lines",
+        )
+        target = st.session_state.get(jump_key)
+        start, stop = window_controls(f"{key}_view", total)
+    st.markdown(highlight_window_html(lines, line_lab_map, start, stop, target), unsafe_allow_html=True)
+
+
+def render_results(area, parsed, flags, conditions, matches, lines, key="", interactive=False):
+    """
+    Draws extracted values, flags and highlighted OCR text into ``area`` (an
+    st.empty). Widgets are only created when ``interactive`` is set, which
+    must happen once per script run.
+    """
+    with area.container():
+        left, right = st.columns([1, 1.6], gap="large")
+
+        with left:
+            st.markdown("### Extracted values")
+            if not parsed:
+                st.write("No lab values found yet.")
+            kv_cols = st.columns(2)
+            for i, (lab, val) in enumerate(parsed.items()):
+                col = kv_cols[i % 2]
+                unit = get_registry().unit(lab)
+                col.markdown(f"**{lab_title(lab)}**")
+                col.markdown(f"{val} {unit}".strip())
+
+            st.markdown("### Flags")
+            for lab, flag in flags.items():
+                emoji = "🟢" if flag == "normal" else ("🔴" if flag in ("low", "high") else "⚪")
+                st.write(f"{emoji} **{lab_title(lab)}**: {flag}")
+
+            st.markdown("### Plain-language hints")
+            for k, v in conditions.items():
+                st.write(f"**{k.replace('_', ' ').title()}** — {v}")
+
+        with right:
+            render_highlights(lines, matches, key if interactive else None)
+
+file_bytes = uploaded.getvalue()
+digest = hashlib.sha256(file_bytes).hexdigest()
+
+# The button is only True on the run right after the click; remember which
+# upload was analyzed so later reruns keep showing its results.
+if st.button("Analyze"):
+    st.session_state["analyzed_digest"] = digest
+    st.session_state.pop("cancelled_digest", None)
+if st.session_state.get("analyzed_digest") != digest:
+    st.stop()
 
-    doc.build(story)
-    buf.seek(0)
-    return buf.read()
+# Clicking Cancel reruns the script, which interrupts the OCR loop below; the
+# rerun then only shows the pages that were already finished.
+if not BACKEND_URL and st.button("⏹ Cancel OCR"):
+    st.session_state["cancelled_digest"] = digest
+cancelled = st.session_state.get("cancelled_digest") == digest
 
-if st.button("Analyze"):
-    with st.spinner("Running OCR and extracting values..."):
+results_area = st.empty()
+if BACKEND_URL:
+    with st.spinner(f"Analyzing on {BACKEND_URL} ..."):
         try:
-            ocr_text = ocr_pdf_bytes(uploaded.getvalue(), dpi=300)
+            parts = analyze_remote(digest, file_bytes)
         except Exception as e:
-            st.error("OCR failed. Make sure Tesseract and Poppler are installed and paths are set.")
-            st.error(str(e))
+            st.error("Backend request failed: " + str(e))
             st.stop()
+    n_pages = parts["pages_total"]
+else:
+    parts = RESULT_CACHE.get(digest)
+    n_pages = len(parts["pages"]) if parts is not None else None
+
+if parts is None:
+    # Finished pages of the current upload survive reruns, so Analyze after
+    # Cancel resumes with the next page.
+    ocr_pages = st.session_state.setdefault("ocr_pages", {})
+    for other in [d for d in ocr_pages if d != digest]:
+        del ocr_pages[other]
+    pages = ocr_pages.setdefault(digest, [])
+
+    try:
+        n_pages = page_count_cached(digest, file_bytes)
+        progress = st.progress(len(pages) / n_pages, text=f"OCR {len(pages)} of {n_pages} pages")
+        if not cancelled:
+            for page in iter_ocr_pages(file_bytes, "pdf", first_page=len(pages) + 1):
+                pages.append(page)
+                progress.progress(len(pages) / n_pages, text=f"OCR {len(pages)} of {n_pages} pages")
+                if len(pages) < n_pages:
+                    render_results(results_area, *analysis_view(analyze_pages(list(pages))))
+    except Exception as e:
+        st.error("OCR failed. Make sure Tesseract and Poppler are installed and paths are set.")
+        st.error(str(e))
+        st.stop()
+
+    if not pages:
+        progress.empty()
+        st.info("OCR was cancelled before the first page finished. Click Analyze to start again.")
+        st.stop()
+
+    parts = analyze_pages(list(pages))
+    if len(pages) < n_pages:
+        st.warning(f"OCR cancelled after {len(pages)} of {n_pages} pages. Click Analyze to resume.")
+    else:
+        progress.empty()
+        RESULT_CACHE.put(digest, parts)
+        del ocr_pages[digest]
 
-        parsed, matches, lines = parse_and_match_lines(ocr_text)
-        flags, conditions = interpret(parsed)
-
-    left, right = st.columns([1, 1.6], gap="large")
-
-    with left:
-        st.markdown("### Extracted values")
-        kv_cols = st.columns(2)
-        keys = ["hemoglobin", "wbc", "platelets", "glucose", "cholesterol", "age"]
-        for i, lab in enumerate(keys):
-            col = kv_cols[i % 2]
-            val = parsed.get(lab)
-            col.markdown(f"**{lab.capitalize()}**")
-            col.markdown(f"{val if val is not None else '—'}")
-
-        st.markdown("### Flags")
-        for lab, flag in flags.items():
-            emoji = "🟢" if flag == "normal" else ("🔴" if flag in ("low", "high") else "⚪")
-            st.write(f"{emoji} **{lab}**: {flag}")
-
-        st.markdown("### Plain-language hints")
-        for k, v in conditions.items():
-            st.write(f"**{k}** — {v}")
-
-    with right:
-        st.markdown("### Highlights (OCR text)")
-        legend_html = "<div style='display:flex;gap:8px;margin-bottom:8px;'>"
-        for lab, color in COLORS.items():
-            legend_html += f"<div style='padding:6px 10px;border-radius:8px;background:{color};font-weight:600'>{lab}</div>"
-        legend_html += "</div>"
-        st.markdown(legend_html, unsafe_allow_html=True)
-
-        line_lab_map = {}
-        for lab, occ in matches.items():
-            for idx, ln, val in occ:
-                line_lab_map.setdefault(idx, []).append((lab, val))
-
-        html_lines = []
-        for i, raw_line in enumerate(lines):
-            safe = html.escape(raw_line) if raw_line.strip() != "" else "&nbsp;"
-            if i in line_lab_map:
-                labs_on_line = line_lab_map[i]
-                color = COLORS.get(labs_on_line[0][0], "#fff9e6")
-                labels = " | ".join(f"{lab}{('='+str(int(val)) if val and val==int(val) else ('='+str(val) if val else ''))}" for lab, val in labs_on_line)
-                html_lines.append(
-                    f"<div style='background:{color}; padding:10px; border-radius:8px; margin-bottom:6px;'>"
-                    f"<div style='font-weight:700; margin-bottom:6px; color:#111'>{labels}</div>"
-                    f"<div style='white-space:pre-wrap; font-family:monospace; color:#111'>{safe}</div>"
-                    f"</div>"
-                )
-            else:
-                html_lines.append(f"<div style='color:#555; white-space:pre-wrap; font-family:monospace; margin-bottom:6px'>{safe}</div>")
-
-        highlighted_html = "<div style='max-height:520px; overflow:auto;'>" + "".join(html_lines) + "</div>"
-        st.markdown(highlighted_html, unsafe_allow_html=True)
-
-    out = {
-        "parsed_values": parsed,
-        "flags": flags,
-        "conditions": conditions,
-        "matched_lines": {lab: [{"index": idx, "line": ln, "value": val} for idx, ln, val in occ] for lab, occ in matches.items()}
-    }
-    st.download_button("📥 Download JSON summary", data=json.dumps(out, indent=2).encode("utf-8"),
-                    file_name="lab_summary.json", mime="application/json")
+if len(parts["pages"]) < n_pages and BACKEND_URL:
+    st.warning(f"The backend analyzed {len(parts['pages'])} of {n_pages} pages within its time budget.")
+
+parsed, flags, conditions, matches, lines = analysis_view(parts)
+render_results(results_area, parsed, flags, conditions, matches, lines, key=digest, interactive=True)
 
-    if reportlab_available:
+out = {
+    "parsed_values": parsed,
+    "flags": flags,
+    "conditions": conditions,
+    "matched_lines": {lab: [{"index": idx, "line": ln, "value": val} for idx, ln, val in occ] for lab, occ in matches.items()}
+}
+st.download_button("📥 Download JSON summary", data=json.dumps(out, indent=2).encode("utf-8"),
+                file_name="lab_summary.json", mime="application/json")
+
+if reportlab_available:
+    # Built only when asked for; pdf_report caches the bytes per interpretation.
+    pdf_key = f"{digest}_pdf_requested"
+    if st.session_state.get(pdf_key) or st.button("📄 Prepare interpreted PDF"):
+        st.session_state[pdf_key] = True
         try:
-            pdf_bytes = build_interpreted_pdf_bytes(parsed, flags, conditions, matches, lines, ocr_text)
+            from pdf_report import build_interpreted_pdf_bytes
+
+            rows = [[lab_title(lab), str(val), flags.get(lab, "not found")] for lab, val in parsed.items()]
+            with st.spinner("Building PDF ..."):
+                pdf_bytes = build_interpreted_pdf_bytes(rows, conditions, matches, lines)
             st.download_button("📄 Download interpreted PDF", data=pdf_bytes, file_name="interpreted_report.pdf", mime="application/pdf")
         except Exception as e:
             st.error("Failed to build PDF: " + str(e))
-    else:
-        st.warning("Install reportlab to enable PDF export: pip install reportlab")
+else:
+    st.warning("Install reportlab to enable PDF export: pip install reportlab")
 
-    with st.expander("Show raw OCR text"):
-        st.text_area("OCR text", value=ocr_text, height=300)
+with st.expander("Show raw OCR text"):
+    # Expander contents are sent even while collapsed; one window per rerun.
+    raw_start, raw_stop = window_controls(f"{digest}_raw", len(lines))
+    st.text_area("OCR text", value="\n".join(lines[raw_start:raw_stop]), height=300)
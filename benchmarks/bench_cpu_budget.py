@@ -0,0 +1,118 @@
+# benchmarks/bench_cpu_budget.py
+"""
+Sweeps CPU budget settings and reports OCR throughput (pages per second).
+
+Every configuration runs in a fresh subprocess, because OMP_THREAD_LIMIT and
+the worker pool are fixed at import time. Each run OCRs the same synthetic
+multi-page PDF from ``--concurrency`` client threads at once.
+
+    python benchmarks/bench_cpu_budget.py --threads 1,2,4 --concurrency 1,4,8
+"""
+import argparse
+import io
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+LINES = [
+    "Hemoglobin : 11.2 g/dL", "Total Leucocyte Count : 8400 /uL", "Platelet Count : 2.1 lakhs/uL",
+    "Fasting Blood Sugar : 132 mg/dL", "HbA1c : 7.1 %", "Serum Creatinine : 1.6 mg/dL",
+    "Total Cholesterol : 228 mg/dL", "Triglycerides : 190 mg/dL", "SGPT : 55 U/L", "TSH : 5.2 uIU/mL",
+]
+
+
+def _synthetic_pdf(pages: int) -> bytes:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    for p in range(pages):
+        y = 780
+        c.setFont("Helvetica-Bold", 14)
+        c.drawString(60, y, f"ABC Diagnostics - page {p + 1}")
+        c.setFont("Helvetica", 11)
+        for line in LINES * 3:
+            y -= 22
+            c.drawString(60, y, line)
+        c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def _child(concurrency: int, requests_per_client: int, pages: int) -> dict:
+    from ocr_layer import ocr_image_bytes, warmup
+
+    warmup()
+    pdf = _synthetic_pdf(pages)
+    errors = []
+
+    def client():
+        try:
+            for _ in range(requests_per_client):
+                ocr_image_bytes(pdf, file_type="pdf")
+        except Exception as e:
+            errors.append(repr(e))
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    total_pages = concurrency * requests_per_client * pages
+    return {"elapsed_s": elapsed, "pages": total_pages, "pages_per_s": total_pages / elapsed, "errors": errors}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--threads", default="1,2,4", help="LAB_THREADS_PER_WORKER values")
+    ap.add_argument("--budgets", default="", help="LAB_CPU_BUDGET values (default: all cores)")
+    ap.add_argument("--concurrency", default="1,4,8", help="concurrent client requests")
+    ap.add_argument("--requests", type=int, default=2, help="requests per client")
+    ap.add_argument("--pages", type=int, default=4, help="pages per synthetic PDF")
+    ap.add_argument("--child", default="", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        concurrency, requests_per_client, pages = (int(v) for v in args.child.split(","))
+        print(json.dumps(_child(concurrency, requests_per_client, pages)))
+        return
+
+    from cpu_budget import available_cores
+
+    budgets = [int(v) for v in args.budgets.split(",")] if args.budgets else [available_cores()]
+    threads = [int(v) for v in args.threads.split(",")]
+    concurrency = [int(v) for v in args.concurrency.split(",")]
+
+    print(f"{'budget':>7}{'thr/wkr':>9}{'workers':>9}{'clients':>9}{'pages':>7}{'secs':>8}{'pages/s':>9}")
+    for budget, tpw, conc in itertools.product(budgets, threads, concurrency):
+        env = dict(os.environ, LAB_CPU_BUDGET=str(budget), LAB_THREADS_PER_WORKER=str(tpw))
+        env.pop("LAB_OCR_WORKERS", None)
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", f"{conc},{args.requests},{args.pages}"],
+            cwd=ROOT, env=env, capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            print(f"{budget:>7}{tpw:>9}  failed: {out.stderr.strip().splitlines()[-1:]}")
+            continue
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        workers = max(1, budget // tpw)
+        print(
+            f"{budget:>7}{tpw:>9}{workers:>9}{conc:>9}{r['pages']:>7}"
+            f"{r['elapsed_s']:>8.2f}{r['pages_per_s']:>9.2f}"
+            + (f"  errors: {r['errors'][:1]}" if r["errors"] else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
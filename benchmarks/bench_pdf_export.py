@@ -0,0 +1,82 @@
+# benchmarks/bench_pdf_export.py
+"""
+PDFs per second for both report builders in pdf_report, for a typical
+one-page report and a 30-page one: rendered from scratch, and served from the
+per-interpretation cache.
+
+    python benchmarks/bench_pdf_export.py --repeat 50
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_report
+from parsing_layer import match_lab_lines
+
+LINES = [
+    "Hemoglobin : 11.2 g/dL", "Total Leucocyte Count : 8400 /uL", "Platelet Count : 210",
+    "Fasting Blood Sugar : 132 mg/dL", "HbA1c : 7.1 %", "Serum Creatinine : 1.6 mg/dL",
+    "Total Cholesterol : 228 mg/dL", "Triglycerides : 190 mg/dL", "SGPT : 55 U/L", "TSH : 5.2",
+]
+FILLER = "Method: automated analyser. Sample collected at the laboratory, reported by the pathologist."
+
+
+def interpreted_args(pages: int):
+    lines = []
+    for page in range(pages):
+        lines.append(f"ABC Diagnostic Laboratory - page {page + 1}")
+        lines.extend(LINES)
+        lines.extend([FILLER] * 40)
+    rows = [[line.split(":")[0].strip(), line.split(":")[1].strip(), "high"] for line in LINES]
+    conditions = {"overall_risk": "Moderate", "anemia": "possible", "diabetes_poor_control": "possible"}
+    return rows, conditions, match_lab_lines(lines), lines
+
+
+def report_args(pages: int):
+    tests = [
+        {
+            "test_name": line.split(":")[0].strip(), "group": "CBC", "value": 1.0, "unit": "mg/dL",
+            "normal_range": (0.5, 1.5), "status": "normal", "severity": "none", "comment": FILLER,
+        }
+        for _ in range(pages) for line in LINES
+    ]
+    interp = {"overall_severity": "Moderate", "group_severity": {"CBC": "Mild"}, "tests": tests}
+    return interp, ["Drink enough water.", "Repeat the test in 3 months."] * 3
+
+
+def rate(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return repeat / (time.perf_counter() - start)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=50)
+    args = ap.parse_args()
+
+    for pages in (1, 30):
+        rows, conditions, matches, lines = interpreted_args(pages)
+        interp, guidance = report_args(pages)
+        cases = {
+            "interpreted": (
+                lambda: pdf_report._render_interpreted(rows, conditions, matches, lines),
+                lambda: pdf_report.build_interpreted_pdf_bytes(rows, conditions, matches, lines),
+            ),
+            "report": (
+                lambda: pdf_report._render_report(interp, guidance, "Jane Doe"),
+                lambda: pdf_report.generate_pdf_report(interp, guidance, "Jane Doe"),
+            ),
+        }
+        for name, (render, cached) in cases.items():
+            cold = rate(render, args.repeat)
+            warm = rate(cached, args.repeat * 100)
+            print(f"{name:<11} {pages:>2} page(s)  render {cold:8.1f} PDF/s   cached {warm:10.0f} PDF/s")
+
+
+if __name__ == "__main__":
+    main()
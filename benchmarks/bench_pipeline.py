@@ -0,0 +1,188 @@
+# benchmarks/bench_pipeline.py
+"""
+End-to-end benchmark of the analysis pipeline (OCR -> parsing -> ML) on
+synthetic reports from synthetic_reports.py.
+
+Every case runs in a fresh subprocess, so peak RSS is per case. For each case
+it records the median latency, per-stage latency (the stage() timings from
+metrics_layer), pages per second, peak RSS and extraction accuracy against
+the ground truth. Results are written as JSON. --compare checks a run
+against a stored baseline and exits 1 on regressions.
+
+    python benchmarks/bench_pipeline.py --out bench.json
+    python benchmarks/bench_pipeline.py --out new.json --compare bench.json --tolerance 0.15
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# name: make_report() arguments
+CASES = {
+    "pdf-1p": dict(kind="pdf", pages=1),
+    "pdf-5p": dict(kind="pdf", pages=5),
+    "pdf-20p": dict(kind="pdf", pages=20),
+    "scan-3p-150dpi": dict(kind="scan", pages=3, dpi=150, noise=8, skew=0.5),
+    "scan-3p-300dpi-noisy": dict(kind="scan", pages=3, dpi=300, noise=20, skew=1.5),
+    "image-200dpi": dict(kind="image", dpi=200, noise=5, skew=1.0),
+    "image-300dpi-skewed": dict(kind="image", dpi=300, noise=12, skew=3.0),
+}
+
+# metric: (direction, tolerance kind). "lower" means lower is better.
+METRICS = {
+    "latency_s": ("lower", "relative"),
+    "pages_per_s": ("higher", "relative"),
+    "peak_rss_mb": ("lower", "relative"),
+    "accuracy": ("higher", "absolute"),
+}
+ACCURACY_TOLERANCE = 0.02
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def _accuracy(parsed, truth) -> dict:
+    found = sum(1 for k in truth if k in parsed)
+    correct = sum(1 for k, v in truth.items() if k in parsed and abs(parsed[k] - v) <= 1e-6 + abs(v) * 1e-3)
+    wrong = sorted(k for k, v in truth.items() if k in parsed and abs(parsed[k] - v) > 1e-6 + abs(v) * 1e-3)
+    return {"accuracy": correct / len(truth), "recall": found / len(truth), "wrong_values": wrong}
+
+
+def _child(case: str, repeat: int) -> dict:
+    from synthetic_reports import make_report
+
+    data, file_type, truth = make_report(**CASES[case])
+
+    from metrics_layer import collect_timings
+    from ocr_layer import warmup
+    from pipeline import analyze_upload
+
+    warmup()
+    latencies, stages = [], {}
+    for _ in range(repeat):
+        with collect_timings() as timings:
+            start = time.perf_counter()
+            parts = analyze_upload(data, file_type)
+            latencies.append(time.perf_counter() - start)
+        for name, secs in timings.items():
+            stages.setdefault(name, []).append(secs)
+
+    latency = statistics.median(latencies)
+    pages = len(parts["pages"])
+    return {
+        "file_type": file_type,
+        "bytes": len(data),
+        "pages": pages,
+        "latency_s": latency,
+        "pages_per_s": pages / latency if latency else 0.0,
+        "stages_s": {name: statistics.median(v) for name, v in stages.items()},
+        "peak_rss_mb": _peak_rss_mb(),
+        **_accuracy(parts["parsed_labs"], truth),
+    }
+
+
+def run(cases, repeat: int) -> dict:
+    results = {}
+    for case in cases:
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", case, "--repeat", str(repeat)],
+            cwd=ROOT, capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            results[case] = {"error": (out.stderr.strip().splitlines() or ["?"])[-1]}
+        else:
+            results[case] = json.loads(out.stdout.strip().splitlines()[-1])
+        r = results[case]
+        if "error" in r:
+            print(f"{case:<24} failed: {r['error']}", file=sys.stderr)
+        else:
+            print(
+                f"{case:<24}{r['pages']:>4}p {r['latency_s']:8.2f}s {r['pages_per_s']:7.2f} p/s "
+                f"{r['peak_rss_mb']:8.1f} MB  acc {r['accuracy']:.2f}",
+                file=sys.stderr,
+            )
+    return results
+
+
+def _git_rev() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+        return out.stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """Regressions as (case, metric, baseline value, current value)."""
+    regressions = []
+    for case, base in baseline["cases"].items():
+        cur = current["cases"].get(case)
+        if not cur or "error" in cur or "error" in base:
+            continue
+        checks = {m: (base[m], cur[m]) + METRICS[m] for m in METRICS}
+        for stage, secs in base.get("stages_s", {}).items():
+            if stage in cur.get("stages_s", {}):
+                checks[f"stage:{stage}"] = (secs, cur["stages_s"][stage], "lower", "relative")
+        for metric, (old, new, direction, kind) in checks.items():
+            allowed = ACCURACY_TOLERANCE if kind == "absolute" else abs(old) * tolerance
+            worse = new - old if direction == "lower" else old - new
+            if worse > allowed:
+                regressions.append((case, metric, old, new))
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cases", default=",".join(CASES), help="comma-separated case names")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--out", help="write results JSON here")
+    ap.add_argument("--compare", help="baseline JSON to check against")
+    ap.add_argument("--tolerance", type=float, default=0.10, help="allowed relative slowdown")
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(_child(args.child, args.repeat)))
+        return
+
+    from cpu_budget import available_cores
+
+    report = {
+        "meta": {
+            "git_rev": _git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cores": available_cores(),
+            "repeat": args.repeat,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "cases": run([c for c in args.cases.split(",") if c], args.repeat),
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for case, metric, old, new in regressions:
+            print(f"REGRESSION {case} {metric}: {old:.4g} -> {new:.4g}", file=sys.stderr)
+        print(f"{len(regressions)} regression(s) against {args.compare}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
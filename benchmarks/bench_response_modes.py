@@ -0,0 +1,100 @@
+# benchmarks/bench_response_modes.py
+"""
+Payload size and serialization time of /analyze_report responses for each
+?include= mode, using a synthetic multi-page OCR result (no Tesseract needed).
+
+    python benchmarks/bench_response_modes.py --pages 10 --repeat 200
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+
+from lab_registry import LabPanel
+from main import _build_result, parse_include
+from ml_layer import full_ml_analysis
+
+
+SAMPLE_LINES = [
+    "Hemoglobin : 11.2 g/dL",
+    "Total Leucocyte Count : 8.4 10^3/uL",
+    "Platelet Count : 210 10^3/uL",
+    "Fasting Blood Sugar : 132 mg/dL",
+    "HbA1c : 7.1 %",
+    "Serum Creatinine : 1.6 mg/dL",
+    "Total Cholesterol : 228 mg/dL",
+    "Triglycerides : 190 mg/dL",
+    "SGPT : 55 U/L",
+    "TSH : 5.2 uIU/mL",
+]
+
+
+def _synthetic_result(n_pages: int):
+    filler = "Method: automated analyser. Sample collected at 08:30, reported 14:10.\n" * 30
+    pages = [
+        {"page_number": i, "text": "\n".join(SAMPLE_LINES) + "\n" + filler}
+        for i in range(1, n_pages + 1)
+    ]
+    full_text = "\n".join(p["text"] for p in pages)
+    parsed_labs = LabPanel.from_mapping({
+        "hemoglobin": 11.2, "wbc": 8.4, "platelets": 210.0, "fasting_glucose": 132.0,
+        "hba1c": 7.1, "creatinine": 1.6, "total_cholesterol": 228.0,
+        "triglycerides": 190.0, "sgpt": 55.0, "tsh": 5.2,
+    })
+    return {
+        "pages": pages,
+        "full_text": full_text,
+        "parsed_labs": parsed_labs,
+        "ml_result": full_ml_analysis(parsed_labs),
+    }
+
+
+def _build(fields, parts):
+    # A fresh copy each time, so the narrative is generated on every call
+    # rather than kept from the first one.
+    return _build_result(dict(parts), fields)
+
+
+def _time(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000.0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=10)
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args()
+
+    data = _synthetic_result(args.pages)
+    modes = [None, "parsed_labs,ml_result,llm_summary", "lean"]
+
+    print(f"{args.pages} synthetic pages, {args.repeat} iterations per mode\n")
+    print(f"{'include':<36}{'bytes':>10}{'gzip':>10}{'build ms':>10}{'json ms':>10}{'orjson ms':>11}")
+
+    for mode in modes:
+        fields = parse_include(mode)
+        result = _build(fields, data)
+        body = result.model_dump(exclude_none=True)
+        raw = orjson.dumps(body)
+
+        build_ms = _time(lambda: _build(fields, data), args.repeat)
+        json_ms = _time(lambda: json.dumps(result.model_dump(exclude_none=True)).encode(), args.repeat)
+        orjson_ms = _time(lambda: orjson.dumps(result.model_dump(exclude_none=True)), args.repeat)
+
+        print(
+            f"{mode or '(full)':<36}{len(raw):>10}{len(gzip.compress(raw)):>10}"
+            f"{build_ms:>10.3f}{json_ms:>10.3f}{orjson_ms:>11.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
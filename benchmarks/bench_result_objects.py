@@ -0,0 +1,127 @@
+# benchmarks/bench_result_objects.py
+"""
+Time and memory per report of the parsing / ML hot path and of the response
+built from it.
+
+To compare the pipeline's result objects (LabPanel, MLAnalysis) with the
+plain dicts they replaced like for like, run it once against a checkout from
+before the change and once against this tree:
+
+    git worktree add /tmp/before <commit before the result objects>
+    python benchmarks/bench_result_objects.py --tree /tmp/before
+    python benchmarks/bench_result_objects.py
+
+For each synthetic report (no Tesseract needed), it measures, with whatever
+parts the tree's pipeline produces:
+  - parse + ML: wall time and bytes allocated by pipeline.analyze_pages;
+  - retained: bytes per report kept alive while --keep lean results
+    (parsed_labs and ml_result) are held in memory;
+  - response: main._build_result for ?include=lean plus model_dump, which is
+    what analyze_report does after the pipeline, from whatever form the
+    tree's parts take. Needs fastapi and pydantic.
+
+Timings on a shared machine vary by tens of percent between runs; compare
+several alternating runs of both trees rather than a single pair.
+"""
+import argparse
+import gc
+import importlib.util
+import os
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+
+LEAN_FIELDS = frozenset({"parsed_labs", "ml_result"})
+
+
+def _lean(parts):
+    return {"parsed_labs": parts["parsed_labs"], "ml_result": parts["ml_result"]}
+
+
+def _per_report(fn, items, repeat: int):
+    """(best ms per item over ``repeat`` runs, mean peak bytes allocated during one call)."""
+    gc.collect()
+    tracemalloc.start()
+    peaks = 0
+    for item in items:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        fn(item)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks += peak - base
+    tracemalloc.stop()
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return best / len(items) * 1000.0, peaks / len(items)
+
+
+def _retained(make, n: int) -> float:
+    """Bytes per result kept alive while n results built by make(i) are held."""
+    gc.collect()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    held = [make(i) for i in range(n)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return (current - base) / n
+
+
+def _row(label, ms, allocated):
+    print(f"{label:<32}{ms:>9.3f} ms/report{allocated:>12.0f} B peak/report")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tree", default=ROOT, help="source tree to benchmark (default: this one)")
+    ap.add_argument("--reports", type=int, default=200, help="distinct synthetic reports to time")
+    ap.add_argument("--keep", type=int, default=2000, help="results held in memory for the retained size")
+    ap.add_argument("--repeat", type=int, default=5, help="timed runs; the fastest one is reported")
+    args = ap.parse_args()
+
+    # The report generator comes from this tree so both runs see the same
+    # input; it puts this tree on sys.path, so the benchmarked one goes first.
+    sys.path.insert(0, BENCH_DIR)
+    from synthetic_reports import ground_truth, report_lines
+    sys.path.insert(0, os.path.abspath(args.tree))
+    from pipeline import analyze_pages
+
+    page_sets = [
+        [{"page_number": 1, "text": "\n".join(report_lines(ground_truth(seed)))}]
+        for seed in range(args.reports)
+    ]
+    results = [analyze_pages(pages) for pages in page_sets]
+    objects = hasattr(results[0]["parsed_labs"], "to_dict")
+    print(f"{os.path.abspath(args.tree)}: {args.reports} synthetic reports, "
+          f"{len(results[0]['parsed_labs'])} labs each, "
+          f"parts as {'result objects' if objects else 'dicts'}\n")
+
+    _row("parse + ML", *_per_report(analyze_pages, page_sets, args.repeat))
+
+    def held(i):
+        return _lean(analyze_pages(page_sets[i % len(page_sets)]))
+
+    print(f"{'retained':<32}{_retained(held, args.keep):>9.0f} B/report")
+
+    if not (importlib.util.find_spec("fastapi") and importlib.util.find_spec("pydantic")):
+        print("\nfastapi / pydantic not installed; response building skipped.")
+        return
+
+    from main import _build_result
+
+    def built(parts):
+        return _build_result(parts, LEAN_FIELDS).model_dump(exclude_none=True)
+
+    print()
+    _row("response, _build_result", *_per_report(built, results, args.repeat))
+
+if __name__ == "__main__":
+    main()
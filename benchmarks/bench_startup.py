@@ -0,0 +1,108 @@
+# benchmarks/bench_startup.py
+"""
+Cold-start benchmark: import time of ``main``, time until uvicorn answers
+/health and /ready, and latency of the first /analyze_report request, with
+and without the warm-up phase.
+
+    python benchmarks/bench_startup.py --file sample_report.pdf
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _import_time(module: str, runs: int) -> float:
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        samples.append(float(out.stdout.strip()))
+    return statistics.median(samples)
+
+
+def _wait_for(url: str, started: float, timeout: float) -> float:
+    while time.perf_counter() - started < timeout:
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return time.perf_counter() - started
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.02)
+    raise TimeoutError(f"{url} not ready after {timeout}s")
+
+
+def _server_run(port: int, warmup: bool, sample_file: str, timeout: float) -> dict:
+    env = dict(os.environ)
+    env["LAB_WARMUP"] = "1" if warmup else "0"
+    cache_dir = tempfile.mkdtemp(prefix="lab-bench-")
+    env["LAB_RESULT_CACHE_PATH"] = os.path.join(cache_dir, "results.sqlite3")
+
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+    )
+    try:
+        result = {
+            "warmup": warmup,
+            "time_to_listen_s": _wait_for(f"{base}/health", started, timeout),
+            "time_to_ready_s": _wait_for(f"{base}/ready", started, timeout),
+        }
+        if sample_file:
+            with open(sample_file, "rb") as f:
+                payload = f.read()
+            name = os.path.basename(sample_file)
+            t0 = time.perf_counter()
+            resp = requests.post(
+                f"{base}/analyze_report?include=lean",
+                files={"file": (name, payload)},
+                timeout=600,
+            )
+            resp.raise_for_status()
+            result["first_request_s"] = time.perf_counter() - t0
+            result["first_request_server_timing"] = resp.headers.get("Server-Timing", "")
+        return result
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--file", default="", help="PDF or image posted as the first request")
+    ap.add_argument("--runs", type=int, default=5, help="import-time repetitions")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--timeout", type=float, default=120.0)
+    args = ap.parse_args()
+
+    for module in ("main", "app"):
+        try:
+            print(f"import {module:<6} median {_import_time(module, args.runs) * 1000:8.1f} ms")
+        except subprocess.CalledProcessError as e:
+            print(f"import {module:<6} failed: {e.stderr.strip().splitlines()[-1]}")
+
+    for warmup in (False, True):
+        r = _server_run(args.port, warmup, args.file, args.timeout)
+        line = (
+            f"warmup={'on ' if warmup else 'off'}  listen {r['time_to_listen_s']:.2f}s  "
+            f"ready {r['time_to_ready_s']:.2f}s"
+        )
+        if "first_request_s" in r:
+            line += f"  first request {r['first_request_s']:.2f}s ({r['first_request_server_timing']})"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
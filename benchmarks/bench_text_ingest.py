@@ -0,0 +1,57 @@
+# benchmarks/bench_text_ingest.py
+"""
+Server-side time per report for the OCR-free ingestion path
+(/analyze_text, /analyze_hocr): text or hOCR -> pages -> parsing -> ML.
+
+    python benchmarks/bench_text_ingest.py --repeat 2000
+"""
+import argparse
+import html
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import _analyze_text_report, parse_include
+from models_schema import TextReport
+
+LINES = [
+    "Hemoglobin : 11.2 g/dL", "Total Leucocyte Count : 8400 /uL", "Platelet Count : 210",
+    "Fasting Blood Sugar : 132 mg/dL", "HbA1c : 7.1 %", "Serum Creatinine : 1.6 mg/dL",
+    "Total Cholesterol : 228 mg/dL", "Triglycerides : 190 mg/dL", "SGPT : 55 U/L", "TSH : 5.2",
+]
+
+
+def _hocr(lines) -> str:
+    spans = "".join(
+        "<span class='ocr_line'>"
+        + " ".join(f"<span class='ocrx_word'>{html.escape(w)}</span>" for w in line.split())
+        + "</span>\n"
+        for line in lines
+    )
+    return f"<html><body><div class='ocr_page' id='page_1'>{spans}</div></body></html>"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=2000)
+    args = ap.parse_args()
+
+    reports = {
+        "text": TextReport(text="\n".join(LINES)),
+        "pages": TextReport(pages=["\n".join(LINES[:5]), "\n".join(LINES[5:])]),
+        "hocr": TextReport(hocr=_hocr(LINES)),
+    }
+    for include in ("lean", None):
+        fields = parse_include(include)
+        for name, report in reports.items():
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                _analyze_text_report(report, fields).model_dump(exclude_none=True)
+            per_report_us = (time.perf_counter() - start) / args.repeat * 1e6
+            print(f"include={include or 'all':<5} {name:<6} {per_report_us:9.1f} us/report")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+# benchmarks/load_test.py
+"""
+Open-loop HTTP load generator for /analyze_report.
+
+Requests are sent on a fixed schedule (constant rate, or a linear ramp from
+--rate to --ramp-to), whether or not earlier ones have finished. A slow
+server therefore builds a queue, as it would in production, instead of
+slowing the client down. Uploads are drawn from a weighted mix of synthetic
+PDFs and images (synthetic_reports.py). Results are grouped by the
+scheduler's size class (small / medium / large).
+
+Against a running server:
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --rate 2 --duration 60
+
+API layer only, with an in-process uvicorn and a stub OCR engine:
+    python benchmarks/load_test.py --in-process --stub-ocr-ms 50 --rate 20 --ramp-to 80
+
+Writes results.json (and PNG plots when matplotlib is installed) to --out-dir.
+Needs httpx; --in-process also needs uvicorn.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_reports import ground_truth, make_report, report_lines
+
+# name: (make_report() arguments, upload filename)
+CORPUS = {
+    "pdf-1p": (dict(kind="pdf", pages=1), "report.pdf"),
+    "pdf-4p": (dict(kind="pdf", pages=4), "report.pdf"),
+    "pdf-20p": (dict(kind="pdf", pages=20), "report.pdf"),
+    "scan-3p": (dict(kind="scan", pages=3, dpi=200, noise=8, skew=1.0), "scan.pdf"),
+    "image": (dict(kind="image", dpi=200, noise=5, skew=1.0), "photo.jpg"),
+}
+DEFAULT_MIX = "pdf-1p:4,pdf-4p:2,pdf-20p:1,scan-3p:1,image:3"
+PERCENTILES = (50, 90, 95, 99)
+
+
+def parse_mix(mix: str):
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition(":")
+        if name not in CORPUS:
+            raise SystemExit(f"Unknown corpus entry '{name}'. Known: {', '.join(CORPUS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def build_corpus(names):
+    from scheduler_layer import estimate_cost, size_class
+
+    corpus = {}
+    for name in names:
+        spec, filename = CORPUS[name]
+        data, file_type, _ = make_report(**spec)
+        corpus[name] = {
+            "data": data, "filename": filename,
+            "size_class": size_class(estimate_cost(data, file_type)),
+        }
+    return corpus
+
+
+def unique_upload(data: bytes) -> bytes:
+    # PDF readers and JPEG decoders ignore bytes after %%EOF / EOI, so this
+    # defeats the result cache without changing what gets OCR'd.
+    return data + b"\n%" + uuid.uuid4().hex.encode("ascii") + b"\n"
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, int(round(q / 100.0 * len(values))) - 1))]
+
+
+def arrival_times(rate: float, ramp_to: float, duration: float, poisson: bool, rng: random.Random):
+    """Send offsets in seconds for a rate ramping linearly from rate to ramp_to."""
+    t, times = 0.0, []
+    while True:
+        current = rate + (ramp_to - rate) * (t / duration)
+        gap = rng.expovariate(current) if poisson else 1.0 / current
+        t += gap
+        if t >= duration:
+            return times
+        times.append(t)
+
+
+async def drive(url: str, corpus, weights, times, unique: bool, include: str, timeout: float):
+    import httpx
+
+    names = list(weights)
+    rng = random.Random(1)
+    samples = []
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        async def one(offset: float, name: str):
+            entry = corpus[name]
+            data = unique_upload(entry["data"]) if unique else entry["data"]
+            params = {"include": include} if include else None
+            start = time.perf_counter()
+            status, error = None, None
+            try:
+                resp = await client.post(
+                    "/analyze_report", params=params,
+                    files={"file": (entry["filename"], data, "application/octet-stream")},
+                )
+                status = resp.status_code
+            except Exception as e:
+                error = type(e).__name__
+            samples.append({
+                "sent_at": offset, "corpus": name, "size_class": entry["size_class"],
+                "latency_s": time.perf_counter() - start, "status": status, "error": error,
+            })
+
+        started = time.perf_counter()
+        tasks = []
+        for offset in times:
+            delay = started + offset - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            name = rng.choices(names, weights=[weights[n] for n in names])[0]
+            tasks.append(asyncio.create_task(one(offset, name)))
+        await asyncio.gather(*tasks)
+        wall = time.perf_counter() - started
+    return samples, wall
+
+
+def summarize(samples, wall: float):
+    def stats(group):
+        ok = [s["latency_s"] for s in group if s["status"] is not None and s["status"] < 400]
+        errors = len(group) - len(ok)
+        out = {
+            "requests": len(group),
+            "ok": len(ok),
+            "error_rate": errors / len(group) if group else 0.0,
+            "throughput_rps": len(ok) / wall if wall else 0.0,
+            "mean_s": statistics.fmean(ok) if ok else None,
+            "max_s": max(ok) if ok else None,
+        }
+        out.update({f"p{q}_s": percentile(ok, q) for q in PERCENTILES})
+        return out
+
+    by_class = {}
+    for s in samples:
+        by_class.setdefault(s["size_class"], []).append(s)
+    timeline = {}
+    for s in samples:
+        bucket = timeline.setdefault(int(s["sent_at"]), {"sent": 0, "errors": 0, "latencies": []})
+        bucket["sent"] += 1
+        if s["status"] is None or s["status"] >= 400:
+            bucket["errors"] += 1
+        else:
+            bucket["latencies"].append(s["latency_s"])
+    return {
+        "overall": stats(samples),
+        "by_size_class": {name: stats(group) for name, group in sorted(by_class.items())},
+        "timeline": [
+            {"second": sec, "sent": b["sent"], "errors": b["errors"],
+             "p50_s": percentile(b["latencies"], 50), "p95_s": percentile(b["latencies"], 95)}
+            for sec, b in sorted(timeline.items())
+        ],
+    }
+
+
+def plot(summary, samples, out_dir: str) -> list:
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        return []
+
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 8), sharex=True)
+    for name in sorted({s["size_class"] for s in samples}):
+        pts = [(s["sent_at"], s["latency_s"]) for s in samples if s["size_class"] == name and s["status"] == 200]
+        if pts:
+            ax1.scatter(*zip(*pts), s=6, label=name)
+    ax1.set_ylabel("latency (s)")
+    ax1.legend()
+    tl = summary["timeline"]
+    ax2.plot([b["second"] for b in tl], [b["sent"] for b in tl], label="offered req/s")
+    ax2.plot([b["second"] for b in tl], [b["errors"] for b in tl], label="errors/s")
+    ax2.set_xlabel("time since start (s)")
+    ax2.legend()
+    path = os.path.join(out_dir, "latency_timeline.png")
+    fig.savefig(path, dpi=120, bbox_inches="tight")
+    plt.close(fig)
+    return [path]
+
+
+def start_in_process_server(stub_ocr_ms: float):
+    """Runs main.app in a background uvicorn thread; returns its base URL."""
+    os.environ.setdefault("LAB_RESULT_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "results.sqlite3"))
+    os.environ.setdefault("LAB_SINGLEFLIGHT_LOCK_DIR", os.path.join(tempfile.mkdtemp(), "locks"))
+    import ocr_layer
+
+    if stub_ocr_ms is not None:
+        text = "\n".join(report_lines(ground_truth()))
+
+        def fake_ocr_page(source, file_type, page_number, deadline=None, normalized=False):
+            time.sleep(stub_ocr_ms / 1000.0)
+            return text
+
+        # ocr_image_bytes looks these up at call time, so the scheduler runs
+        # the stub on its workers like the real thing. The page count comes
+        # from the PDF page tree instead of poppler.
+        from scheduler_layer import estimate_pdf_pages
+
+        ocr_layer._ocr_page = fake_ocr_page
+        ocr_layer.pdf_page_count = estimate_pdf_pages
+        ocr_layer.warmup = lambda: None
+
+    import uvicorn
+    from main import app
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", help="base URL of a running server")
+    ap.add_argument("--in-process", action="store_true", help="start main.app in this process")
+    ap.add_argument("--stub-ocr-ms", type=float, default=None,
+                    help="with --in-process: replace Tesseract by a stub taking this long per page")
+    ap.add_argument("--rate", type=float, default=2.0, help="requests per second (start of the ramp)")
+    ap.add_argument("--ramp-to", type=float, default=None, help="requests per second at the end")
+    ap.add_argument("--duration", type=float, default=30.0, help="seconds of load")
+    ap.add_argument("--poisson", action="store_true", help="exponential inter-arrival times")
+    ap.add_argument("--mix", default=DEFAULT_MIX, help="corpus entries with weights")
+    ap.add_argument("--repeat-uploads", action="store_true",
+                    help="send identical bytes (result cache hits) instead of unique uploads")
+    ap.add_argument("--include", default="lean", help="include= for the requests ('' for everything)")
+    ap.add_argument("--timeout", type=float, default=300.0)
+    ap.add_argument("--out-dir", default=os.path.join("bench_results", time.strftime("load-%Y%m%d-%H%M%S")))
+    args = ap.parse_args()
+
+    if not args.url and not args.in_process:
+        ap.error("give --url or --in-process")
+    url = args.url or start_in_process_server(args.stub_ocr_ms)
+
+    weights = parse_mix(args.mix)
+    corpus = build_corpus(weights)
+    times = arrival_times(args.rate, args.ramp_to or args.rate, args.duration, args.poisson, random.Random(0))
+    print(f"{len(times)} requests over {args.duration:.0f}s against {url}", file=sys.stderr)
+
+    samples, wall = asyncio.run(
+        drive(url, corpus, weights, times, not args.repeat_uploads, args.include, args.timeout)
+    )
+    summary = summarize(samples, wall)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    with open(os.path.join(args.out_dir, "results.json"), "w", encoding="utf-8") as f:
+        json.dump({"config": vars(args), "url": url, "wall_s": wall,
+                   "summary": summary, "samples": samples}, f, indent=2)
+    plots = plot(summary, samples, args.out_dir)
+
+    def fmt(v):
+        return f"{v * 1000:8.0f}" if v is not None else "       -"
+
+    print(f"{'class':<8}{'reqs':>6}{'ok':>6}{'err%':>7}{'rps':>7}" + "".join(f"{'p' + str(q) + ' ms':>9}" for q in PERCENTILES))
+    for name, s in list(summary["by_size_class"].items()) + [("all", summary["overall"])]:
+        print(f"{name:<8}{s['requests']:>6}{s['ok']:>6}{s['error_rate'] * 100:>6.1f}%{s['throughput_rps']:>7.2f}"
+              + "".join(f" {fmt(s[f'p{q}_s'])}" for q in PERCENTILES))
+    print(f"results in {args.out_dir}" + (f" ({', '.join(os.path.basename(p) for p in plots)})" if plots else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# benchmarks/synthetic_reports.py
+"""
+Synthetic lab reports with known values for every lab in lab_name_aliases.
+
+make_report() draws the report with reportlab. It returns the upload bytes
+and the ground truth. Vector PDFs are returned as drawn. "scan" and "image"
+reports are rasterized at the requested DPI, then get Gaussian noise and a
+rotation, like a phone photo or a cheap scanner would add.
+
+    python benchmarks/synthetic_reports.py --kind scan --pages 3 --noise 12 --skew 1.5 -o scan.pdf
+"""
+import argparse
+import io
+import os
+import random
+import sys
+from typing import Dict, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lab_registry import get_registry
+
+FILLER = [
+    "Sample type: whole blood / serum. Method: automated analyser.",
+    "Results relate only to the sample as received by the laboratory.",
+    "Reference ranges are for adults; interpret with clinical findings.",
+]
+
+
+def ground_truth(seed: int = 0) -> Dict[str, float]:
+    """One value per lab key, around its reference range when it has one."""
+    rng = random.Random(seed)
+    registry = get_registry()
+    truth = {}
+    for key in registry.name_aliases:
+        meta = registry.meta(key)
+        low, high = (meta["ref_low"], meta["ref_high"]) if meta else (1.0, 100.0)
+        low = low if low > 0 else high / 10.0
+        truth[key] = round(rng.uniform(low * 0.6, high * 1.4), 1)
+    return truth
+
+
+def report_lines(truth: Dict[str, float]):
+    registry = get_registry()
+    for key, value in truth.items():
+        name = registry.name_aliases[key][0]
+        unit = registry.unit(key)
+        # The standard PDF fonts have no glyphs for units like "×10⁹/L".
+        unit = unit if unit.isascii() else ""
+        yield f"{name.title()} : {value} {unit}".rstrip()
+
+
+def _draw_pdf(truth: Dict[str, float], pages: int) -> bytes:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    lines = list(report_lines(truth))
+    per_page = -(-len(lines) // pages)
+    # Shrink the text when a page has to hold many labs, so it still fits.
+    leading = min(20.0, 720.0 / (per_page + len(FILLER)))
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    for p in range(pages):
+        y = 790
+        c.setFont("Helvetica-Bold", 14)
+        c.drawString(60, y, f"ABC Diagnostic Laboratory - page {p + 1} of {pages}")
+        c.setFont("Helvetica", min(11.0, leading * 0.7))
+        for line in lines[p * per_page:(p + 1) * per_page] + FILLER:
+            y -= leading
+            c.drawString(60, y, line)
+        c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def _degrade(img, noise: float, skew: float, rng: random.Random):
+    import numpy as np
+    from PIL import Image
+
+    img = img.convert("L")
+    if skew:
+        img = img.rotate(rng.uniform(-skew, skew), resample=Image.BILINEAR, expand=True, fillcolor=255)
+    if noise:
+        arr = np.asarray(img, dtype=np.float32)
+        arr += np.random.default_rng(rng.randrange(2 ** 32)).normal(0.0, noise, arr.shape)
+        img = Image.fromarray(np.clip(arr, 0, 255).astype(np.uint8))
+    return img
+
+
+def make_report(kind: str = "pdf", pages: int = 1, dpi: int = 200, noise: float = 0.0,
+                skew: float = 0.0, seed: int = 0) -> Tuple[bytes, str, Dict[str, float]]:
+    """
+    Returns (upload bytes, file_type for the pipeline, ground truth).
+    kind: "pdf" (vector), "scan" (degraded raster pages in a PDF) or "image"
+    (first page as a degraded JPEG).
+    """
+    truth = ground_truth(seed)
+    pdf = _draw_pdf(truth, pages)
+    if kind == "pdf":
+        return pdf, "pdf", truth
+
+    from pdf2image import convert_from_bytes
+
+    rng = random.Random(seed)
+    if kind == "image":
+        # Everything on one page, since an image upload is a single page.
+        page = convert_from_bytes(_draw_pdf(truth, 1), dpi=dpi)[0]
+        buf = io.BytesIO()
+        _degrade(page, noise, skew, rng).save(buf, format="JPEG", quality=85)
+        return buf.getvalue(), "image", truth
+    if kind == "scan":
+        images = [_degrade(p, noise, skew, rng) for p in convert_from_bytes(pdf, dpi=dpi)]
+        buf = io.BytesIO()
+        images[0].save(buf, format="PDF", resolution=dpi, save_all=True, append_images=images[1:])
+        return buf.getvalue(), "pdf", truth
+    raise ValueError(f"Unknown kind: {kind}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--kind", choices=("pdf", "scan", "image"), default="pdf")
+    ap.add_argument("--pages", type=int, default=1)
+    ap.add_argument("--dpi", type=int, default=200)
+    ap.add_argument("--noise", type=float, default=0.0, help="Gaussian noise sigma (grey levels)")
+    ap.add_argument("--skew", type=float, default=0.0, help="max rotation in degrees")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("-o", "--output", required=True)
+    args = ap.parse_args()
+
+    data, _, truth = make_report(args.kind, args.pages, args.dpi, args.noise, args.skew, args.seed)
+    with open(args.output, "wb") as f:
+        f.write(data)
+    for key, value in truth.items():
+        print(f"{key}\t{value}")
+
+
+if __name__ == "__main__":
+    main()
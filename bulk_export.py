@@ -0,0 +1,250 @@
+# bulk_export.py
+"""
+Columnar export of parsed results for analytics, as Parquet or an Arrow IPC
+stream.
+
+One row per report: report and patient ids, date, config version, risk,
+conditions, then one nullable float64 column per canonical lab key and a
+"<key>_flag" column (low / normal / high / no reference). The lab columns
+come from the lab configuration, so every file written under one config
+version has the same schema.
+
+Rows come from the patient results store, or from re-running the pipeline on
+report files. They are converted in record batches of --batch-rows and
+written out batch by batch (one Parquet row group each). Memory stays flat
+however many reports are exported.
+
+    python bulk_export.py --out results.parquet
+    python bulk_export.py --format arrow --patient-id P123 --since 2024-01-01 --out p123.arrows
+    python bulk_export.py --reprocess reports/ --out reprocessed.parquet
+
+Needs pyarrow.
+"""
+import argparse
+import datetime
+import hashlib
+import os
+import sys
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional
+
+from lab_registry import FLAG_NAMES, LabRegistry, get_registry
+
+FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", ".arrows"),
+}
+BATCH_ROWS = int(os.getenv("LAB_EXPORT_BATCH_ROWS", "10000"))
+REPORT_EXTENSIONS = (".pdf", ".png", ".jpg", ".jpeg")
+
+
+def export_schema(registry: LabRegistry):
+    import pyarrow as pa
+
+    fields = [
+        pa.field("report_id", pa.int64()),
+        pa.field("patient_id", pa.string()),
+        pa.field("report_date", pa.date32()),
+        pa.field("content_sha", pa.string()),
+        pa.field("source", pa.string()),
+        pa.field("config_version", pa.string()),
+        pa.field("risk_label", pa.dictionary(pa.int8(), pa.string())),
+        pa.field("risk_score", pa.float64()),
+        pa.field("conditions", pa.list_(pa.string())),
+    ]
+    for key in registry.keys:
+        fields.append(pa.field(key, pa.float64()))
+        fields.append(pa.field(f"{key}_flag", pa.dictionary(pa.int8(), pa.string())))
+    return pa.schema(fields, metadata={"lab_config_version": registry.version})
+
+
+def _record_batch(rows: List[Dict[str, Any]], schema, registry: LabRegistry):
+    import pyarrow as pa
+
+    columns: Dict[str, List[Any]] = {name: [] for name in schema.names}
+    for row in rows:
+        date = row.get("report_date")
+        columns["report_id"].append(row.get("report_id"))
+        columns["patient_id"].append(row.get("patient_id"))
+        columns["report_date"].append(datetime.date.fromisoformat(date) if date else None)
+        columns["content_sha"].append(row.get("content_sha"))
+        columns["source"].append(row.get("source"))
+        columns["config_version"].append(row.get("config_version"))
+        columns["risk_label"].append(row.get("risk_label"))
+        columns["risk_score"].append(row.get("risk_score"))
+        columns["conditions"].append(row.get("conditions"))
+        labs = row["labs"]
+        for key in registry.keys:
+            value, flag = labs.get(key, (None, None))
+            columns[key].append(value)
+            columns[f"{key}_flag"].append(flag)
+    arrays = [pa.array(columns[field.name], type=field.type) for field in schema]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _batched(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stored_rows(patient_id: Optional[str] = None, since: Optional[str] = None,
+                until: Optional[str] = None, batch_rows: int = BATCH_ROWS) -> Iterator[Dict[str, Any]]:
+    from results_store import RESULTS_STORE
+
+    for reports in RESULTS_STORE.iter_reports(patient_id, since, until, batch_rows):
+        yield from reports
+
+
+def reprocessed_rows(paths: Iterable[str], registry: LabRegistry) -> Iterator[Dict[str, Any]]:
+    """Runs the pipeline on report files, one at a time."""
+    from pipeline import analyze_upload
+
+    for path in paths:
+        with open(path, "rb") as f:
+            file_bytes = f.read()
+        file_type = "pdf" if path.lower().endswith(".pdf") else "image"
+        parts = analyze_upload(file_bytes, file_type)
+        labs = parts["parsed_labs"]
+        keys, codes = registry.classify(labs)
+        ml = parts["ml_result"]
+        yield {
+            "content_sha": hashlib.sha256(file_bytes).hexdigest(),
+            "source": path,
+            "config_version": registry.version,
+            "risk_label": ml.risk.risk_label,
+            "risk_score": ml.risk.risk_score,
+            "conditions": ml.conditions,
+            "labs": {key: (labs[key], FLAG_NAMES[code]) for key, code in zip(keys, codes.tolist())},
+        }
+
+
+def _write_batches(rows: Iterable[Dict[str, Any]], sink: BinaryIO, fmt: str,
+                   batch_rows: int, registry: Optional[LabRegistry]) -> Iterator[int]:
+    """Writes ``rows`` to ``sink``, yielding the row count after each batch."""
+    import pyarrow as pa
+
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    registry = registry or get_registry()
+    schema = export_schema(registry)
+    out = pa.PythonFile(sink, mode="w")
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        writer = pq.ParquetWriter(out, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(out, schema)
+    count = 0
+    try:
+        for batch in _batched(rows, batch_rows):
+            record_batch = _record_batch(batch, schema, registry)
+            if fmt == "parquet":
+                writer.write_batch(record_batch, row_group_size=batch_rows)
+            else:
+                writer.write_batch(record_batch)
+            count += len(batch)
+            yield count
+    finally:
+        writer.close()
+
+
+def write_export(rows: Iterable[Dict[str, Any]], sink: BinaryIO, fmt: str = "parquet",
+                 batch_rows: int = BATCH_ROWS, registry: Optional[LabRegistry] = None) -> int:
+    """Writes ``rows`` to ``sink`` batch by batch; returns the number of rows."""
+    count = 0
+    for count in _write_batches(rows, sink, fmt, batch_rows, registry):
+        pass
+    return count
+
+
+class ChunkSink:
+    """Write-only file object whose bytes are taken out with drain(), for streaming responses."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._pos = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_export(rows: Iterable[Dict[str, Any]], fmt: str = "parquet",
+                  batch_rows: int = BATCH_ROWS, registry: Optional[LabRegistry] = None) -> Iterator[bytes]:
+    """Like write_export, but yields the encoded bytes after every batch."""
+    sink = ChunkSink()
+    for _ in _write_batches(rows, sink, fmt, batch_rows, registry):
+        chunk = sink.drain()
+        if chunk:
+            yield chunk
+    tail = sink.drain()  # Parquet footer / end-of-stream marker
+    if tail:
+        yield tail
+
+
+def _report_files(inputs: Iterable[str]) -> List[str]:
+    paths = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                paths.update(os.path.join(root, f) for f in files if f.lower().endswith(REPORT_EXTENSIONS))
+        else:
+            paths.add(item)
+    return sorted(paths)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Export parsed results as Parquet or Arrow.")
+    ap.add_argument("--out", required=True, help="output file ('-' for stdout)")
+    ap.add_argument("--format", choices=sorted(FORMATS), help="default: from --out's extension, else parquet")
+    ap.add_argument("--patient-id", help="only this patient's stored reports")
+    ap.add_argument("--since", help="first report date (YYYY-MM-DD), inclusive")
+    ap.add_argument("--until", help="last report date (YYYY-MM-DD), inclusive")
+    ap.add_argument("--reprocess", nargs="+", metavar="PATH",
+                    help="run the pipeline on these files / directories instead of reading the store")
+    ap.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+    args = ap.parse_args()
+
+    fmt = args.format or next(
+        (name for name, (_, ext) in FORMATS.items() if args.out.endswith(ext)), "parquet"
+    )
+    registry = get_registry()
+    if args.reprocess:
+        rows = reprocessed_rows(_report_files(args.reprocess), registry)
+    else:
+        rows = stored_rows(args.patient_id, args.since, args.until, args.batch_rows)
+
+    if args.out == "-":
+        count = write_export(rows, sys.stdout.buffer, fmt, args.batch_rows, registry)
+    else:
+        tmp_path = args.out + ".part"
+        with open(tmp_path, "wb") as f:
+            count = write_export(rows, f, fmt, args.batch_rows, registry)
+        os.replace(tmp_path, args.out)
+    print(f"{count} rows, {len(registry.keys)} labs, config {registry.version}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+# bulk_pdf.py
+"""
+Bulk rendering of interpreted PDFs (month-end regeneration).
+
+Jobs are dicts {"id", "interp", "home_guidance", "patient_name"} read lazily
+from any iterable. They are rendered across a process pool straight to
+<out_dir>/<id>.pdf (see report_filename), with at most a few jobs per worker in flight, so memory
+does not grow with the number of reports. Every finished PDF is appended to a
+JSONL manifest; a rerun with the same manifest skips what is already there.
+Optionally the PDFs are streamed into a ZIP as they finish.
+
+    python bulk_pdf.py interpretations.jsonl --out-dir out/ --zip out/reports.zip
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Optional, Set, Tuple, Union
+
+MANIFEST_NAME = "manifest.jsonl"
+# Jobs queued per worker beyond the one it is rendering.
+JOBS_PER_WORKER = 2
+
+_UNSAFE_CHARS_RE = re.compile(r"[^A-Za-z0-9._-]")
+
+
+def report_filename(job_id: str) -> str:
+    """
+    <id>.pdf for ids that are safe file names. Others get their unsafe
+    characters replaced and a hash of the raw id, so "a/b" and "a_b" do not
+    end up in the same file.
+    """
+    job_id = str(job_id)
+    safe = _UNSAFE_CHARS_RE.sub("_", job_id)
+    if safe != job_id:
+        safe += "-" + hashlib.sha256(job_id.encode("utf-8")).hexdigest()[:10]
+    return safe + ".pdf"
+
+
+def load_manifest(path: str) -> Dict[str, Dict[str, Any]]:
+    """Finished entries by job id; a torn last line from a crash is ignored."""
+    done: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get("status") == "ok":
+                done[entry["id"]] = entry
+    return done
+
+
+def _render_job(job: Dict[str, Any], path: str) -> Tuple[str, int, Optional[str]]:
+    """Runs in a pool worker. Returns (id, bytes written, error)."""
+    from pdf_report import render_report_to_file
+
+    tmp_path = path + ".part"
+    try:
+        render_report_to_file(
+            tmp_path, job["interp"], job.get("home_guidance") or [], job.get("patient_name", "")
+        )
+        os.replace(tmp_path, path)
+        return job["id"], os.path.getsize(path), None
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return job["id"], 0, f"{type(e).__name__}: {e}"
+
+
+def render_reports_bulk(
+    jobs: Iterable[Dict[str, Any]],
+    out_dir: str,
+    workers: Optional[int] = None,
+    zip_target: Union[str, BinaryIO, None] = None,
+    manifest_path: Optional[str] = None,
+    keep_files: bool = True,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    progress_every: int = 100,
+) -> Dict[str, Any]:
+    """
+    Renders every job to <out_dir>/<id>.pdf and returns throughput stats.
+
+    ``zip_target`` (path or writable binary stream) also streams the PDFs into
+    a ZIP as they finish. A resumed run rewrites the ZIP, starting with the
+    PDFs finished earlier, so with ``keep_files=False`` the PDFs are only
+    removed once the whole run succeeded.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = manifest_path or os.path.join(out_dir, MANIFEST_NAME)
+    done = load_manifest(manifest_path)
+    # An entry only counts if its PDF is still there.
+    done = {k: v for k, v in done.items() if os.path.exists(os.path.join(out_dir, v["file"]))}
+    workers = workers or os.cpu_count() or 1
+
+    stats = {"rendered": 0, "skipped": 0, "failed": 0, "bytes": 0, "errors": {}}
+    zf = zipfile.ZipFile(zip_target, "w", zipfile.ZIP_STORED) if zip_target is not None else None
+    zipped: Set[str] = set()
+
+    def add_to_zip(filename: str) -> None:
+        if zf is not None and filename not in zipped:
+            # PDFs are compressed already; ZIP_STORED just copies them.
+            zf.write(os.path.join(out_dir, filename), arcname=filename)
+            zipped.add(filename)
+
+    for entry in done.values():
+        add_to_zip(entry["file"])
+
+    start = time.perf_counter()
+
+    def report() -> None:
+        if progress is not None:
+            elapsed = time.perf_counter() - start
+            progress({**stats, "seconds": elapsed,
+                      "pdfs_per_second": stats["rendered"] / elapsed if elapsed else 0.0})
+
+    with open(manifest_path, "a", encoding="utf-8") as manifest, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+
+        def collect(block: bool) -> None:
+            finished, _ = wait(pending, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+            for future in finished:
+                filename = pending.pop(future)
+                job_id, size, error = future.result()
+                if error is not None:
+                    stats["failed"] += 1
+                    stats["errors"][job_id] = error
+                    continue
+                add_to_zip(filename)
+                manifest.write(json.dumps({"id": job_id, "file": filename, "bytes": size, "status": "ok"}) + "\n")
+                manifest.flush()
+                stats["rendered"] += 1
+                stats["bytes"] += size
+                if stats["rendered"] % progress_every == 0:
+                    report()
+
+        for job in jobs:
+            job_id = str(job["id"])
+            if job_id in done:
+                stats["skipped"] += 1
+                continue
+            filename = report_filename(job_id)
+            future = pool.submit(_render_job, {**job, "id": job_id}, os.path.join(out_dir, filename))
+            pending[future] = filename
+            while len(pending) >= workers * (1 + JOBS_PER_WORKER):
+                collect(block=True)
+        while pending:
+            collect(block=True)
+
+    if zf is not None:
+        zf.close()
+        if not keep_files and not stats["failed"]:
+            for filename in zipped:
+                os.remove(os.path.join(out_dir, filename))
+
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = elapsed
+    stats["pdfs_per_second"] = stats["rendered"] / elapsed if elapsed else 0.0
+    return stats
+
+
+def _read_jobs(path: str) -> Iterable[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Render interpreted PDFs in bulk.")
+    ap.add_argument("jobs", help='JSONL, one {"id", "interp", "home_guidance", "patient_name"} per line')
+    ap.add_argument("--out-dir", required=True)
+    ap.add_argument("--zip", dest="zip_path", help="also write the PDFs into this ZIP ('-' for stdout)")
+    ap.add_argument("--workers", type=int, default=0)
+    ap.add_argument("--manifest", help=f"default: <out-dir>/{MANIFEST_NAME}")
+    ap.add_argument("--no-keep-files", action="store_true", help="delete the PDFs once they are in the ZIP")
+    args = ap.parse_args()
+
+    zip_target = sys.stdout.buffer if args.zip_path == "-" else args.zip_path
+
+    def progress(s):
+        print(f"{s['rendered']} rendered, {s['skipped']} skipped, {s['failed']} failed, "
+              f"{s['pdfs_per_second']:.1f} PDF/s", file=sys.stderr)
+
+    stats = render_reports_bulk(
+        _read_jobs(args.jobs), args.out_dir, workers=args.workers or None, zip_target=zip_target,
+        manifest_path=args.manifest, keep_files=not args.no_keep_files, progress=progress,
+    )
+    progress(stats)
+    for job_id, error in stats["errors"].items():
+        print(f"failed {job_id}: {error}", file=sys.stderr)
+    sys.exit(1 if stats["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# cpu_budget.py
+"""
+Process-wide CPU budget for OCR.
+
+Tesseract starts its own OpenMP threads and OpenCV has its own thread pool.
+When several pages are OCR'd at once, each of them can try to use every core.
+The budget fixes how many threads each OCR worker may use (OMP_THREAD_LIMIT
+for Tesseract, cv2.setNumThreads for OpenCV) and sizes the worker pool so
+that workers x threads stays within the cores available to the process. The
+scheduler asks page_cap() for how many pages of one request may run at once:
+a lone request gets every worker, concurrent requests share them.
+"""
+import math
+import os
+import threading
+
+
+def available_cores() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+class CPUBudget:
+    def __init__(self, total_threads: int, threads_per_worker: int, workers: int = 0):
+        self.total_threads = max(1, total_threads)
+        self.threads_per_worker = max(1, min(threads_per_worker, self.total_threads))
+        self.workers = workers or max(1, self.total_threads // self.threads_per_worker)
+        self._opencv_configured = False
+        self._lock = threading.Lock()
+
+    def apply_process_limits(self) -> None:
+        # Read by every Tesseract subprocess pytesseract starts from now on.
+        os.environ["OMP_THREAD_LIMIT"] = str(self.threads_per_worker)
+
+    def configure_opencv(self) -> None:
+        if self._opencv_configured:
+            return
+        with self._lock:
+            if not self._opencv_configured:
+                import cv2
+
+                cv2.setNumThreads(self.threads_per_worker)
+                self._opencv_configured = True
+
+    def page_cap(self, active_jobs: int) -> int:
+        """Pages of one request allowed on workers while ``active_jobs`` requests share them."""
+        return max(1, math.ceil(self.workers / max(1, active_jobs)))
+
+
+CPU_BUDGET = CPUBudget(
+    total_threads=int(os.getenv("LAB_CPU_BUDGET", str(available_cores()))),
+    threads_per_worker=int(os.getenv("LAB_THREADS_PER_WORKER", "1")),
+    workers=int(os.getenv("LAB_OCR_WORKERS", "0")),
+)
+CPU_BUDGET.apply_process_limits()
@@ -1,22 +1,221 @@
 # frontend.py
+import argparse
+import glob
+import hashlib
+import os
+import random
 import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
 import requests
 import json
+from requests.adapters import HTTPAdapter
 
 
 BACKEND_URL = "http://127.0.0.1:8000/analyze_report"
+RESULTS_URL = "http://127.0.0.1:8000/results"
+
+# What /analyze_report accepts; it answers 400 for anything else.
+UPLOAD_EXTENSIONS = (".pdf", ".png", ".jpg", ".jpeg")
+RETRY_STATUSES = (429, 503)
+
+
+def fetch_cached(file_bytes: bytes, session=requests):
+    """Asks the backend for an earlier result of the same file; None if it has none."""
+    sha = hashlib.sha256(file_bytes).hexdigest()
+    resp = session.get(f"{RESULTS_URL}/{sha}", timeout=30)
+    if resp.status_code == 404:
+        return None
+    resp.raise_for_status()
+    return resp.json()
+
+
+def make_session(pool_size: int) -> requests.Session:
+    """One keep-alive connection pool shared by every batch worker."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def expand_inputs(patterns):
+    """
+    Uploadable files from directories (recursively) and glob patterns, sorted,
+    without duplicates.
+    """
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                paths.update(os.path.join(root, f) for f in files)
+        else:
+            paths.update(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+    return sorted(p for p in paths if p.lower().endswith(UPLOAD_EXTENSIONS))
+
+
+def load_done(out_path: str):
+    """Paths already analyzed successfully in an earlier run's NDJSON output."""
+    done = set()
+    if not os.path.exists(out_path):
+        return done
+    with open(out_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn last line after a crash
+            if record.get("status") == "ok":
+                done.add(record["path"])
+    return done
+
+
+def _retry_delay(resp, attempt: int, backoff: float) -> float:
+    retry_after = resp.headers.get("Retry-After") if resp is not None else None
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return backoff * (2 ** attempt) * (0.5 + random.random())
+
+
+def analyze_one(session, path: str, timeout: float, retries: int, backoff: float):
+    """Analyzes one file; returns its NDJSON record. Failures end up in the record."""
+    start = time.perf_counter()
+    try:
+        with open(path, "rb") as f:
+            file_bytes = f.read()
+    except OSError as e:
+        return {"path": path, "status": "error", "error": str(e), "attempts": 0,
+                "latency_ms": round((time.perf_counter() - start) * 1000.0, 1)}
+    record = {"path": path, "sha256": hashlib.sha256(file_bytes).hexdigest()}
+
+    data = None
+    try:
+        data = fetch_cached(file_bytes, session)
+    except (requests.RequestException, ValueError):
+        pass  # not fatal: analyze it instead
+    record["cached"] = data is not None
+
+    attempt = 0
+    while data is None:
+        resp = None
+        try:
+            files = {"file": (os.path.basename(path), file_bytes, "application/octet-stream")}
+            resp = session.post(BACKEND_URL, files=files, timeout=timeout)
+            if resp.status_code not in RETRY_STATUSES:
+                record["http_status"] = resp.status_code
+                if not resp.ok:
+                    record.update(status="error", error=resp.text[:500])
+                    break
+                data = resp.json()
+                break
+        except (requests.ConnectionError, requests.Timeout) as e:
+            record["error"] = str(e)
+        except (requests.RequestException, ValueError) as e:
+            # Not retried: the request cannot be sent or the body is not JSON.
+            record.update(status="error", error=f"{type(e).__name__}: {e}")
+            break
+        if attempt >= retries:
+            record.update(status="error", http_status=resp.status_code if resp is not None else None)
+            record.setdefault("error", "retries exhausted")
+            break
+        time.sleep(_retry_delay(resp, attempt, backoff))
+        attempt += 1
+
+    record["attempts"] = attempt + 1
+    record["latency_ms"] = round((time.perf_counter() - start) * 1000.0, 1)
+    if data is not None:
+        record.pop("error", None)
+        record["status"] = "ok"
+        record["result"] = data
+    return record
+
+
+def percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(q / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[idx]
+
+
+def run_batch(args) -> int:
+    paths = expand_inputs(args.inputs)
+    done = load_done(args.out)
+    todo = [p for p in paths if p not in done]
+    print(f"{len(paths)} files, {len(paths) - len(todo)} already in {args.out}, {len(todo)} to analyze",
+          file=sys.stderr)
+
+    session = make_session(args.concurrency)
+    latencies, failed, cached = [], 0, 0
+    start = time.perf_counter()
+
+    with open(args.out, "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        pending = {}  # future -> path
+
+        def drain(block: bool):
+            nonlocal failed, cached
+            finished, _ = wait(pending, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+            for future in finished:
+                path = pending.pop(future)
+                try:
+                    record = future.result()
+                except Exception as e:
+                    # One file's failure must not stop the rest of the batch.
+                    record = {"path": path, "status": "error", "error": f"{type(e).__name__}: {e}",
+                              "latency_ms": 0.0}
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                latencies.append(record["latency_ms"])
+                failed += record["status"] != "ok"
+                cached += bool(record.get("cached"))
+
+        for path in todo:
+            pending[pool.submit(analyze_one, session, path, args.timeout, args.retries, args.backoff)] = path
+            if len(pending) >= args.concurrency * 2:
+                drain(block=True)
+        while pending:
+            drain(block=True)
+
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    n = len(latencies)
+    print(
+        f"{n} files in {elapsed:.1f}s ({n / elapsed if elapsed else 0.0:.2f} files/s), "
+        f"{failed} failed, {cached} served from cache\n"
+        f"latency ms  p50 {percentile(latencies, 50):.0f}  p95 {percentile(latencies, 95):.0f}  "
+        f"p99 {percentile(latencies, 99):.0f}  max {latencies[-1] if latencies else 0:.0f}",
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python frontend.py path/to/report.pdf")
-        sys.exit(1)
+    ap = argparse.ArgumentParser(description="Send lab reports to the analysis backend.")
+    ap.add_argument("inputs", nargs="+", help="a report file, or with --out: files, directories or globs")
+    ap.add_argument("--out", help="batch mode: append one NDJSON record per file here (and resume from it)")
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--retries", type=int, default=5, help="retries on 429/503 and connection errors")
+    ap.add_argument("--backoff", type=float, default=0.5, help="base backoff in seconds")
+    ap.add_argument("--timeout", type=float, default=120.0)
+    args = ap.parse_args()
 
-    path = sys.argv[1]
+    if args.out:
+        sys.exit(run_batch(args))
+
+    path = args.inputs[0]
     with open(path, "rb") as f:
-        files = {"file": (path, f, "application/octet-stream")}
-        print(f"Sending {path} to backend at {BACKEND_URL} ...")
-        resp = requests.post(BACKEND_URL, files=files, timeout=120)
+        file_bytes = f.read()
+
+    data = fetch_cached(file_bytes)
+    if data is not None:
+        print(f"Using cached result for {path} from {RESULTS_URL}")
+        print(json.dumps(data, indent=2))
+        return
+
+    files = {"file": (path, file_bytes, "application/octet-stream")}
+    print(f"Sending {path} to backend at {BACKEND_URL} ...")
+    resp = requests.post(BACKEND_URL, files=files, timeout=args.timeout)
 
     if not resp.ok:
         print("Error:", resp.status_code, resp.text)
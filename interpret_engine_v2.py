@@ -1,33 +1,41 @@
 # interpret_engine_v2.py
 import re
-from difflib import get_close_matches
-from typing import Dict, List, Any
-from interpretation_config import TEST_ALIASES, TEST_CONFIG
+from dataclasses import dataclass
+from typing import Dict, List
+from lab_registry import get_registry
 from value_extractor import extract_value_unit
 
 
+@dataclass(slots=True)
+class TestReading:
+    raw_line: str
+    value: float
+    unit: str
+
+
 def fuzzy_match_test(line: str) -> str:
 
-    all_aliases = {alias: key for key, vals in TEST_ALIASES.items() for alias in vals}
+    registry = get_registry()
     words = re.split(r"[^a-zA-Z0-9]+", line.lower())
 
-    candidates = []
     for w in words:
-        m = get_close_matches(w, all_aliases.keys(), n=1, cutoff=0.75)
-        if m:
-            return all_aliases[m[0]]
+        key = registry.fuzzy_lookup(w)
+        if key:
+            return key
     return ""
 
 
-def parse_report_lines(lines: List[str]) -> Dict[str, Any]:
+def parse_report_lines(lines: List[str]) -> Dict[str, TestReading]:
 
-    results = {}
+    registry = get_registry()
+    results: Dict[str, TestReading] = {}
 
     for line in lines:
         line_clean = line.strip()
 
         test_key = fuzzy_match_test(line_clean)
-        if not test_key:
+        # Some aliases (e.g. "rbs") name tests without a reference range.
+        if not test_key or registry.meta(test_key) is None:
             continue
 
         value, unit = extract_value_unit(line_clean)
@@ -35,13 +43,9 @@ def parse_report_lines(lines: List[str]) -> Dict[str, Any]:
             continue
 
         if not unit:
-            unit = TEST_CONFIG[test_key]["unit"]
+            unit = registry.unit(test_key)
 
-        results[test_key] = {
-            "raw_line": line_clean,
-            "value": value,
-            "unit": unit
-        }
+        results[test_key] = TestReading(line_clean, value, unit)
 
     return results
 
@@ -55,16 +59,17 @@ def interpret_results_advanced(page_texts: List[str]):
                 lines.append(row.strip())
 
     parsed = parse_report_lines(lines)
+    registry = get_registry()
 
     interpreted = []
     group_severity = {}
     rank = {"Normal": 0, "Mild": 1, "Moderate": 2, "Severe": 3}
 
-    for test_key, obj in parsed.items():
-        cfg = TEST_CONFIG[test_key]
+    for test_key, reading in parsed.items():
+        cfg = registry.meta(test_key)
 
-        low, high = cfg["normal_range"]
-        v = obj["value"]
+        low, high = cfg["ref_low"], cfg["ref_high"]
+        v = reading.value
 
         if low <= v <= high:
             status = "Normal"
@@ -76,15 +81,15 @@ def interpret_results_advanced(page_texts: List[str]):
 
         interpreted.append({
             "test_key": test_key,
-            "test_name": cfg["label"],
+            "test_name": cfg["name"],
             "group": cfg["group"],
-            "value": obj["value"],
-            "unit": obj["unit"],
-            "normal_range": cfg["normal_range"],
+            "value": reading.value,
+            "unit": reading.unit,
+            "normal_range": (low, high),
             "status": status,
             "severity": sev,
-            "comment": cfg["high_msg"] if status == "High" else cfg["low_msg"],
-            "raw_line": obj["raw_line"]
+            "comment": cfg["high_note"] if status == "High" else cfg["low_note"],
+            "raw_line": reading.raw_line
         })
 
         g = cfg["group"]
@@ -1,56 +0,0 @@
-# backend/lab_config.py
-
-LAB_NAME_ALIASES = {
-    "hemoglobin": ["hemoglobin", "hb", "hgb"],
-    "hematocrit": ["hematocrit", "hct", "pcv"],
-    "rbc": ["rbc", "red blood cell", "red blood cells"],
-    "wbc": ["wbc", "total leucocyte", "total leukocyte", "tlc"],
-    "platelets": ["platelet", "platelets", "plt", "platelet count"],
-    "mcv": ["mcv"],
-    "mch": ["mch"],
-    "mchc": ["mchc"],
-    "rdw": ["rdw"],
-
-    "neutrophils_pct": ["neutrophils", "neutrophil %", "neutrophils %"],
-    "lymphocytes_pct": ["lymphocytes", "lymphocyte %", "lymphocytes %"],
-    "monocytes_pct": ["monocytes"],
-    "eosinophils_pct": ["eosinophils"],
-    "basophils_pct": ["basophils"],
-
-    "fasting_glucose": ["fasting glucose", "fbs", "fasting blood sugar"],
-    "pp_glucose": ["ppbs", "postprandial", "post prandial", "pp glucose"],
-    "hba1c": ["hba1c", "glycated hemoglobin"],
-
-    "total_cholesterol": ["total cholesterol", "cholesterol", "t. cholesterol"],
-    "hdl": ["hdl", "hdl cholesterol"],
-    "ldl": ["ldl", "ldl cholesterol"],
-    "vldl": ["vldl"],
-    "triglycerides": ["triglyceride", "triglycerides", "tg"],
-
-    "urea": ["urea", "blood urea"],
-    "creatinine": ["creatinine", "serum creatinine"],
-    "uric_acid": ["uric acid"],
-
-    "total_bilirubin": ["total bilirubin", "t. bilirubin"],
-    "direct_bilirubin": ["direct bilirubin"],
-    "sgot": ["sgot", "ast"],
-    "sgpt": ["sgpt", "alt"],
-    "alp": ["alkaline phosphatase", "alp"],
-    "gamma_gt": ["ggt", "gamma gt"],
-    "total_protein": ["total protein"],
-    "albumin": ["albumin"],
-
-    "sodium": ["sodium", "na+"],
-    "potassium": ["potassium", "k+"],
-    "chloride": ["chloride", "cl-"],
-
-    "tsh": ["tsh", "thyroid stimulating hormone"],
-    "t3": ["t3", "triiodothyronine"],
-    "t4": ["t4", "thyroxine"],
-
-    "crp": ["crp", "c-reactive protein"],
-    "esr": ["esr", "erythrocyte sedimentation rate"],
-
-    "vitamin_d": ["vitamin d", "25 oh vitamin d", "25-ohd"],
-    "vitamin_b12": ["vitamin b12", "vit b12"],
-}
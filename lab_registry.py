@@ -0,0 +1,469 @@
+# lab_registry.py
+"""
+The lab configuration (lab_config.json), compiled into read-only lookup
+structures shared by every layer.
+
+Each lab key gets an integer id. Per-lab facts are tuples indexed by that id.
+The reference ranges are NumPy arrays (NaN where a lab has none), so
+classifying a report is one vectorised comparison instead of a dict lookup
+per value. The alias matchers are compiled once per configuration version.
+NumPy is imported when the first registry is compiled, not with this module.
+
+Ids follow lab_name_aliases first (the keys the parser produces), then the
+remaining keys. Keys from alias_keys (e.g. "sgpt" for "alt") get their own id
+with the base key's metadata.
+
+The file is watched (LAB_CONFIG_POLL_S). A changed file is validated and
+compiled on the watcher thread, then swapped in with one assignment. A broken
+file is reported by status() and the running version stays active. Requests
+pin the registry with pinned() so that every stage of one request, including
+work on the threadpool and OCR workers, sees the same version.
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections.abc import Mapping as MappingABC
+from contextlib import contextmanager
+from contextvars import ContextVar
+from difflib import get_close_matches
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from metrics_layer import Counter
+
+if TYPE_CHECKING:
+    import numpy as np
+
+CONFIG_PATH = os.getenv(
+    "LAB_CONFIG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "lab_config.json")
+)
+# Seconds between checks of the file; 0 disables watching.
+CONFIG_POLL_S = float(os.getenv("LAB_CONFIG_POLL_S", "2"))
+
+CONFIG_RELOADS = Counter(
+    "lab_config_reloads_total",
+    "Attempts to load a changed lab configuration file.",
+    ("result",),
+)
+
+# classify() codes
+NO_REFERENCE = -2
+LOW = -1
+NORMAL = 0
+HIGH = 1
+FLAG_NAMES = {NO_REFERENCE: "no reference", LOW: "low", NORMAL: "normal", HIGH: "high"}
+
+SECTIONS = ("lab_name_aliases", "test_aliases", "test_config", "alias_keys", "fallback_patterns")
+
+
+def _readonly(arr: "np.ndarray") -> "np.ndarray":
+    arr.setflags(write=False)
+    return arr
+
+
+def validate_config(cfg: Any) -> None:
+    """Raises ValueError describing the first problem in a parsed config file."""
+    if not isinstance(cfg, dict):
+        raise ValueError("top level must be an object")
+    if not isinstance(cfg.get("version"), str) or not cfg["version"]:
+        raise ValueError("'version' must be a non-empty string")
+    for section in SECTIONS:
+        if not isinstance(cfg.get(section), dict):
+            raise ValueError(f"'{section}' must be an object")
+
+    for section in ("lab_name_aliases", "test_aliases"):
+        for key, aliases in cfg[section].items():
+            if not isinstance(aliases, list) or not aliases:
+                raise ValueError(f"{section}.{key}: expected a non-empty list of aliases")
+            for alias in aliases:
+                if not isinstance(alias, str) or not alias.strip() or alias != alias.lower():
+                    raise ValueError(f"{section}.{key}: aliases must be non-empty lower-case strings")
+
+    for key, test in cfg["test_config"].items():
+        if not isinstance(test, dict):
+            raise ValueError(f"test_config.{key}: expected an object")
+        for field in ("label", "group", "unit"):
+            if not isinstance(test.get(field), str):
+                raise ValueError(f"test_config.{key}.{field}: expected a string")
+        rng = test.get("normal_range")
+        if (not isinstance(rng, list) or len(rng) != 2
+                or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in rng)):
+            raise ValueError(f"test_config.{key}.normal_range: expected [low, high]")
+        if rng[0] > rng[1]:
+            raise ValueError(f"test_config.{key}.normal_range: low is above high")
+
+    for new_key, base_key in cfg["alias_keys"].items():
+        if base_key not in cfg["test_config"]:
+            raise ValueError(f"alias_keys.{new_key}: '{base_key}' is not in test_config")
+
+    for key, pattern in cfg["fallback_patterns"].items():
+        try:
+            compiled = re.compile(pattern)
+        except (re.error, TypeError) as e:
+            raise ValueError(f"fallback_patterns.{key}: {e}") from None
+        if compiled.groups != 1:
+            raise ValueError(f"fallback_patterns.{key}: needs exactly one capture group")
+
+
+def _lab_metadata(cfg: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    metadata: Dict[str, Dict[str, Any]] = {}
+    for key, test in cfg["test_config"].items():
+        low, high = test["normal_range"]
+        metadata[key] = {
+            "name": test["label"],
+            "group": test["group"],
+            "unit": test["unit"],
+            "ref_low": low,
+            "ref_high": high,
+            "low_note": test.get("low_msg", ""),
+            "high_note": test.get("high_msg", ""),
+        }
+    for new_key, base_key in cfg["alias_keys"].items():
+        metadata[new_key] = metadata[base_key]
+    return metadata
+
+
+class LabRegistry:
+    __slots__ = (
+        "version", "name_aliases", "keys", "index", "metadata", "units", "ref_low", "ref_high", "has_ref",
+        "alias_re", "alias_keys", "_name_re", "_name_ids",
+        "fuzzy_aliases", "fuzzy_alias_keys", "fallback_patterns",
+    )
+
+    def __init__(self, cfg: Dict[str, Any]):
+        """``cfg`` is a parsed config file that passed validate_config()."""
+        canonical = json.dumps(cfg, sort_keys=True, separators=(",", ":"))
+        digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:8]
+        # The declared version plus a content hash, so an edit that forgets to
+        # bump "version" still gets new cache keys.
+        self.version: str = f"{cfg['version']}-{digest}"
+
+        name_aliases = cfg["lab_name_aliases"]
+        test_aliases = cfg["test_aliases"]
+        fallback_patterns = cfg["fallback_patterns"]
+        lab_metadata = _lab_metadata(cfg)
+        self.name_aliases: Mapping[str, Tuple[str, ...]] = MappingProxyType(
+            {k: tuple(v) for k, v in name_aliases.items()}
+        )
+
+        keys: List[str] = []
+        for group in (name_aliases, lab_metadata, test_aliases, fallback_patterns):
+            keys.extend(k for k in group if k not in keys)
+        self.keys: Tuple[str, ...] = tuple(keys)
+        self.index: Mapping[str, int] = MappingProxyType({k: i for i, k in enumerate(keys)})
+
+        self.metadata: Tuple[Optional[Mapping[str, Any]], ...] = tuple(
+            MappingProxyType(dict(lab_metadata[k])) if k in lab_metadata else None for k in keys
+        )
+        self.units: Tuple[str, ...] = tuple(m.get("unit", "") if m else "" for m in self.metadata)
+        import numpy as np
+
+        self.ref_low = _readonly(np.array(
+            [m["ref_low"] if m and m.get("ref_low") is not None else np.nan for m in self.metadata],
+            dtype=np.float64,
+        ))
+        self.ref_high = _readonly(np.array(
+            [m["ref_high"] if m and m.get("ref_high") is not None else np.nan for m in self.metadata],
+            dtype=np.float64,
+        ))
+        self.has_ref = _readonly(np.array([m is not None for m in self.metadata], dtype=bool))
+
+        # Whole-word matcher for lines: every alias in one alternation, longest
+        # first ("glycated hemoglobin" wins over "hemoglobin"). An alias listed
+        # under several keys belongs to the first of them.
+        self.alias_keys: Mapping[str, str] = MappingProxyType({
+            alias: key for key, aliases in reversed(list(name_aliases.items())) for alias in aliases
+        })
+        self.alias_re = re.compile(
+            r"(?<![a-z0-9])(?:"
+            + "|".join(re.escape(a) for a in sorted(self.alias_keys, key=len, reverse=True))
+            + r")(?![a-z0-9])"
+        )
+
+        # Substring matcher for lookup_name(). The alternatives are in key
+        # order and the lookahead reports the first one matching at each
+        # position, so the lowest id over all positions is the first key
+        # with an alias anywhere in the name.
+        name_ids: Dict[str, int] = {}
+        for key, aliases in name_aliases.items():
+            for alias in aliases:
+                name_ids.setdefault(alias, self.index[key])
+        self._name_ids = MappingProxyType(name_ids)
+        self._name_re = re.compile("(?=(" + "|".join(re.escape(a) for a in name_ids) + "))")
+
+        self.fuzzy_alias_keys: Mapping[str, str] = MappingProxyType(
+            {alias: key for key, aliases in test_aliases.items() for alias in aliases}
+        )
+        self.fuzzy_aliases: Tuple[str, ...] = tuple(self.fuzzy_alias_keys)
+        self.fallback_patterns: Tuple[Tuple[str, "re.Pattern[str]"], ...] = tuple(
+            (key, re.compile(pattern, re.IGNORECASE)) for key, pattern in fallback_patterns.items()
+        )
+
+    def meta(self, key: str) -> Optional[Mapping[str, Any]]:
+        """Name, group, unit, reference range and notes of a lab; None if it has none."""
+        idx = self.index.get(key)
+        return None if idx is None else self.metadata[idx]
+
+    def unit(self, key: str) -> str:
+        idx = self.index.get(key)
+        return "" if idx is None else self.units[idx]
+
+    def ref_range(self, key: str) -> Tuple[Optional[float], Optional[float]]:
+        meta = self.meta(key)
+        return (meta.get("ref_low"), meta.get("ref_high")) if meta else (None, None)
+
+    def lookup_name(self, raw_name: str) -> Optional[str]:
+        """First lab (in lab_name_aliases order) with an alias contained in ``raw_name``."""
+        best = None
+        for m in self._name_re.finditer(raw_name.lower().strip()):
+            idx = self._name_ids[m.group(1)]
+            if best is None or idx < best:
+                best = idx
+                if idx == 0:
+                    break
+        return None if best is None else self.keys[best]
+
+    def fuzzy_lookup(self, word: str, cutoff: float = 0.75) -> Optional[str]:
+        """Lab whose test_aliases alias is closest to ``word``, if close enough."""
+        m = get_close_matches(word, self.fuzzy_aliases, n=1, cutoff=cutoff)
+        return self.fuzzy_alias_keys[m[0]] if m else None
+
+    def classify(self, labs: Mapping[str, float]) -> Tuple[List[str], "np.ndarray"]:
+        """
+        (keys, codes) for a {lab: value} dict: one of LOW / NORMAL / HIGH per
+        value, or NO_REFERENCE for labs without a reference range.
+        """
+        import numpy as np
+
+        if isinstance(labs, LabPanel) and labs.registry is self:
+            # Already indexed by id; only keys unknown to this config need a lookup.
+            ids, values = labs.lab_arrays()
+            keys = [self.keys[i] for i in labs.order]
+            if labs.extra:
+                keys.extend(labs.extra)
+                ids = np.concatenate((ids, np.full(len(labs.extra), -1, dtype=np.intp)))
+                values = np.concatenate((values, np.fromiter(labs.extra.values(), dtype=np.float64)))
+        else:
+            keys = list(labs)
+            n = len(keys)
+            ids = np.fromiter((self.index.get(k, -1) for k in keys), dtype=np.intp, count=n)
+            values = np.fromiter(labs.values(), dtype=np.float64, count=n)
+        known = ids >= 0
+        ids = np.where(known, ids, 0)
+        codes = np.where(values < self.ref_low[ids], LOW,
+                         np.where(values > self.ref_high[ids], HIGH, NORMAL))
+        codes = np.where(known & self.has_ref[ids], codes, NO_REFERENCE)
+        return keys, codes.astype(np.int8)
+
+    def flags(self, labs: Mapping[str, float]) -> Dict[str, str]:
+        keys, codes = self.classify(labs)
+        return {k: FLAG_NAMES[c] for k, c in zip(keys, codes.tolist())}
+
+
+class LabPanel(MappingABC):
+    """
+    The lab values of one report, indexed by lab id: a float64 array over all
+    registry keys (NaN where the report has no value) plus the ids in the
+    order they were found. Reads like a {lab_key: value} dict; to_dict()
+    gives the JSON form. Keys the registry does not know (a result from
+    another config version) are kept in ``extra``.
+    """
+    __slots__ = ("registry", "values", "order", "extra")
+
+    def __init__(self, registry: Optional[LabRegistry] = None):
+        import numpy as np
+
+        self.registry = registry or get_registry()
+        self.values = np.full(len(self.registry.keys), np.nan)
+        self.order: List[int] = []
+        self.extra: Optional[Dict[str, float]] = None
+
+    @classmethod
+    def from_mapping(cls, labs: Mapping[str, float], registry: Optional[LabRegistry] = None) -> "LabPanel":
+        panel = cls(registry)
+        for key, value in labs.items():
+            panel.set(key, value)
+        return panel
+
+    def set(self, key: str, value: float) -> None:
+        idx = self.registry.index.get(key)
+        if idx is None:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = float(value)
+            return
+        if math.isnan(self.values[idx]):
+            self.order.append(idx)
+        self.values[idx] = value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        idx = self.registry.index.get(key)
+        if idx is None:
+            return self.extra.get(key, default) if self.extra else default
+        value = float(self.values[idx])
+        return default if math.isnan(value) else value
+
+    def __getitem__(self, key: str) -> float:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return self.get(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        keys = self.registry.keys
+        for idx in self.order:
+            yield keys[idx]
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return len(self.order) + (len(self.extra) if self.extra else 0)
+
+    def __repr__(self) -> str:
+        return f"LabPanel({self.to_dict()!r})"
+
+    def __reduce__(self):
+        # The registry holds compiled patterns; rebuild against the receiver's.
+        return LabPanel.from_mapping, (self.to_dict(),)
+
+    def lab_arrays(self) -> Tuple["np.ndarray", "np.ndarray"]:
+        """(ids, values) of the registry-known labs, in the order they were found."""
+        import numpy as np
+
+        ids = np.array(self.order, dtype=np.intp)
+        return ids, self.values[ids]
+
+    def to_dict(self) -> Dict[str, float]:
+        keys = self.registry.keys
+        out = dict(zip([keys[i] for i in self.order], self.values[self.order].tolist()))
+        if self.extra:
+            out.update(self.extra)
+        return out
+
+
+_registry: Optional[LabRegistry] = None
+_pinned: ContextVar[Optional[LabRegistry]] = ContextVar("lab_registry", default=None)
+_lock = threading.Lock()
+_file_state: Optional[Tuple[int, int]] = None
+_loaded_at: Optional[float] = None
+_last_error: Optional[str] = None
+_watcher: Optional[threading.Thread] = None
+
+
+def _file_signature(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def load_registry(path: str = CONFIG_PATH) -> LabRegistry:
+    """Reads, validates and compiles a config file. Raises ValueError or OSError."""
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            cfg = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"{path}: invalid JSON: {e}") from None
+    try:
+        validate_config(cfg)
+    except ValueError as e:
+        raise ValueError(f"{path}: {e}") from None
+    return LabRegistry(cfg)
+
+
+def reload(force: bool = False) -> bool:
+    """
+    Loads the config file if it changed since the last load (or always with
+    ``force``) and swaps it in. Returns True if a new version became active.
+    A file that fails to load leaves the active version in place.
+    """
+    global _registry, _file_state, _loaded_at, _last_error
+    with _lock:
+        try:
+            signature = _file_signature(CONFIG_PATH)
+        except OSError as e:
+            if _registry is None:
+                raise
+            _last_error = f"{type(e).__name__}: {e}"
+            return False
+        if not force and _registry is not None and signature == _file_state:
+            return False
+        try:
+            registry = load_registry(CONFIG_PATH)
+        except Exception as e:
+            if _registry is None:
+                raise
+            _file_state = signature  # don't retry the same broken file every poll
+            _last_error = f"{type(e).__name__}: {e}"
+            CONFIG_RELOADS.inc(1, "error")
+            return False
+        changed = _registry is None or registry.version != _registry.version
+        _registry = registry
+        _file_state = signature
+        _loaded_at = time.time()
+        _last_error = None
+        CONFIG_RELOADS.inc(1, "ok")
+        return changed
+
+
+def get_registry() -> LabRegistry:
+    """The registry pinned for the current request, else the active one (loaded on first use)."""
+    registry = _pinned.get()
+    if registry is not None:
+        return registry
+    if _registry is None:
+        reload()
+    return _registry
+
+
+@contextmanager
+def pinned() -> Iterator[LabRegistry]:
+    """Keeps get_registry() on the active version for the rest of this context."""
+    token = _pinned.set(get_registry())
+    try:
+        yield _pinned.get()
+    finally:
+        _pinned.reset(token)
+
+
+def _watch() -> None:
+    global _last_error
+    while True:
+        try:
+            reload()
+        except Exception as e:
+            # Nothing loaded yet; get_registry() raises the same error to callers.
+            _last_error = f"{type(e).__name__}: {e}"
+        if CONFIG_POLL_S <= 0:
+            return
+        time.sleep(CONFIG_POLL_S)
+
+
+def start_watcher() -> None:
+    """
+    Starts polling the config file in a daemon thread (once per process;
+    LAB_CONFIG_POLL_S <= 0 loads it once). The thread also compiles the first
+    version, so startup does not wait for it or for NumPy. A request that
+    comes first compiles it itself.
+    """
+    global _watcher
+    with _lock:
+        if _watcher is not None:
+            return
+        _watcher = threading.Thread(target=_watch, name="lab-config-watcher", daemon=True)
+        _watcher.start()
+
+
+def status() -> Dict[str, Any]:
+    registry = get_registry()
+    return {
+        "version": registry.version,
+        "path": CONFIG_PATH,
+        "loaded_at": _loaded_at,
+        "last_error": _last_error,
+    }
@@ -1,16 +1,14 @@
 # backend/llm_layer.py
-from typing import Dict, Any, List
+from typing import List, Mapping
 
-from interpretation_config import LAB_METADATA
+from lab_registry import HIGH, LOW, get_registry
+from ml_layer import MLAnalysis
 
 
-def _format_overall_section(ml_outputs: Dict[str, Any]) -> List[str]:
-    risk = ml_outputs.get("risk", {})
-    anomaly = ml_outputs.get("anomaly", {})
-
-    risk_label = risk.get("risk_label", "Unknown")
-    risk_score = risk.get("risk_score", 0.0)
-    anomaly_flag = anomaly.get("is_anomalous", False)
+def _format_overall_section(ml_outputs: MLAnalysis) -> List[str]:
+    risk_label = ml_outputs.risk.risk_label
+    risk_score = ml_outputs.risk.risk_score
+    anomaly_flag = ml_outputs.anomaly.is_anomalous
 
     lines: List[str] = []
 
@@ -49,7 +47,7 @@ def _format_overall_section(ml_outputs: Dict[str, Any]) -> List[str]:
     return lines
 
 
-def _format_per_test_section(parsed_labs: Dict[str, float]) -> List[str]:
+def _format_per_test_section(parsed_labs: Mapping[str, float]) -> List[str]:
     lines: List[str] = []
     lines.append("## 🔍 Test-by-Test Explanation\n")
 
@@ -60,8 +58,10 @@ def _format_per_test_section(parsed_labs: Dict[str, float]) -> List[str]:
         )
         return lines
 
-    for key, value in parsed_labs.items():
-        meta = LAB_METADATA.get(key)
+    registry = get_registry()
+    for key, code in zip(*registry.classify(parsed_labs)):
+        value = parsed_labs[key]
+        meta = registry.meta(key)
         if not meta:
             lines.append(f"### **{key}: {value}**\n")
             lines.append(
@@ -78,10 +78,10 @@ def _format_per_test_section(parsed_labs: Dict[str, float]) -> List[str]:
 
         status = "within commonly used reference range"
         explanation = ""
-        if ref_low is not None and value < ref_low:
+        if code == LOW:
             status = "below commonly used reference range"
             explanation = low_note
-        elif ref_high is not None and value > ref_high:
+        elif code == HIGH:
             status = "above commonly used reference range"
             explanation = high_note
 
@@ -103,11 +103,12 @@ def _format_per_test_section(parsed_labs: Dict[str, float]) -> List[str]:
     return lines
 
 
-def _list_present_tests(parsed_labs: Dict[str, float], keys: List[str]) -> str:
+def _list_present_tests(parsed_labs: Mapping[str, float], keys: List[str]) -> str:
+    registry = get_registry()
     present = []
     for k in keys:
         if k in parsed_labs:
-            meta = LAB_METADATA.get(k, {})
+            meta = registry.meta(k) or {}
             present.append(meta.get("name", k))
     if not present:
         return ""
@@ -118,7 +119,7 @@ def _list_present_tests(parsed_labs: Dict[str, float], keys: List[str]) -> str:
     return ", ".join(present[:-1]) + f" and {present[-1]}"
 
 
-def _home_care_guidance(parsed_labs: Dict[str, float],
+def _home_care_guidance(parsed_labs: Mapping[str, float],
                         conditions: List[str]) -> List[str]:
 
     lines: List[str] = []
@@ -272,8 +273,8 @@ def _when_to_seek_help_section() -> List[str]:
     return lines
 
 
-def generate_interpretation_full(parsed_labs: Dict[str, float],
-                                ml_outputs: Dict[str, Any]) -> str:
+def generate_interpretation_full(parsed_labs: Mapping[str, float],
+                                ml_outputs: MLAnalysis) -> str:
 
     lines: List[str] = []
 
@@ -287,7 +288,7 @@ def generate_interpretation_full(parsed_labs: Dict[str, float],
 
     lines.extend(_format_per_test_section(parsed_labs))
 
-    conditions: List[str] = ml_outputs.get("conditions", []) or []
+    conditions: List[str] = ml_outputs.conditions
     lines.extend(_home_care_guidance(parsed_labs, conditions))
 
     lines.extend(_when_to_seek_help_section())
@@ -1,20 +1,96 @@
 # backend/main.py
 
+import asyncio
+import contextvars
+import datetime
+import hmac
+import importlib.util
 import os
-from typing import Dict
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, FrozenSet, List, Optional
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
+import orjson
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
+
+import bulk_export
+import lab_registry
+import ocr_layer
+import profiling_layer
+from parsing_layer import pages_from_hocr
+from pipeline import (
+    analyze_pages,
+    analyze_upload,
+    ensure_summary,
+    simple_fallback_parser,
+    deadline_from_budget,
+)
+from models_schema import (
+    OCRResult,
+    MLResult,
+    InterpretationResult,
+    InterpretationBatch,
+    TextReport,
+    TextReportBatch,
+)
+from metrics_layer import (
+    stage,
+    collect_timings,
+    server_timing_header,
+    render_prometheus,
+    BYTES_PROCESSED,
+    REQUEST_SECONDS,
+    REQUESTS_IN_FLIGHT,
+    CACHE_REQUESTS,
+)
+from result_cache import RESULT_CACHE, content_hash, make_etag, etag_matches
+from results_store import PATIENT_ID_RE, RESULTS_STORE
+from singleflight import SINGLE_FLIGHT
 
-from ocr_layer import ocr_image_bytes
-from parsing_layer import extract_labs_from_text
-from ml_layer import full_ml_analysis
-from llm_layer import generate_interpretation_full
-from models_schema import OCRResult, MLResult, InterpretationResult
-from fastapi import HTTPException, UploadFile, File
 
+# Default time budget per /analyze_report request; X-Request-Budget-Ms overrides it.
+REQUEST_BUDGET_S = float(os.getenv("LAB_REQUEST_BUDGET_S", "0"))
 
-app = FastAPI(title="Lab Report Interpreter API")
+# Readiness: set once warm-up has loaded the OCR stack and exercised the parsers.
+WARMUP_ENABLED = os.getenv("LAB_WARMUP", "1") != "0"
+_ready = threading.Event()
+_warmup_error: Optional[str] = None
+
+
+def _warmup() -> None:
+    global _warmup_error
+    try:
+        ocr_layer.warmup()
+        sample = "Hemoglobin : 13.5 g/dL\nSerum Creatinine : 1.1 mg/dL\nTSH : 2.1"
+        ensure_summary(analyze_pages([{"page_number": 1, "text": sample}]))
+        simple_fallback_parser(sample)
+        RESULT_CACHE.get("warmup")
+    except Exception as e:  # keep the process up; /ready reports the failure
+        _warmup_error = f"{type(e).__name__}: {e}"
+    else:
+        _ready.set()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    lab_registry.start_watcher()
+    if WARMUP_ENABLED:
+        threading.Thread(target=_warmup, name="warmup", daemon=True).start()
+    else:
+        _ready.set()
+    yield
+
+
+app = FastAPI(
+    title="Lab Report Interpreter API",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
 
 # CORS for web frontend
 app.add_middleware(
@@ -23,63 +99,182 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing", "X-Lab-Config-Version", "X-Profile-Id", "X-Profile-Status", "X-Report-Id"],
 )
 
-import re
+# Full responses carry the OCR text twice plus the narrative; compress anything
+# bigger than a lean response.
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 
-def simple_fallback_parser(text: str) -> Dict[str, float]:
+@app.middleware("http")
+async def pin_lab_config(request, call_next):
+    # A reload swaps the registry while requests run; each request keeps the
+    # version it started with, on every thread it uses.
+    with lab_registry.pinned() as registry:
+        response = await call_next(request)
+    response.headers["X-Lab-Config-Version"] = registry.version
+    return response
+
+# Result cache variant of images uploaded with ?normalized=true.
+NORMALIZED_VARIANT = "normalized"
+
+# Response parts a client can ask for with ?include=...
+RESPONSE_FIELDS = ("pages", "full_text", "parsed_labs", "ml_result", "llm_summary")
+FIELD_GROUPS = {
+    "all": RESPONSE_FIELDS,
+    "ocr": ("pages", "full_text"),
+    "lean": ("parsed_labs", "ml_result"),
+}
+
+
+def require_admin(x_admin_token: Optional[str]) -> None:
+    """Guards admin and patient-history endpoints; they are off without LAB_ADMIN_TOKEN."""
+    if not profiling_layer.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled (set LAB_ADMIN_TOKEN).")
+    if not x_admin_token:
+        raise HTTPException(
+            status_code=401, detail="Missing X-Admin-Token header.",
+            headers={"WWW-Authenticate": 'Token header="X-Admin-Token"'},
+        )
+    if not hmac.compare_digest(x_admin_token, profiling_layer.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+
+def check_patient_id(patient_id: str) -> str:
+    if not PATIENT_ID_RE.match(patient_id):
+        raise HTTPException(
+            status_code=400,
+            detail="patient_id must be 1-64 letters, digits, '.', '_' or '-'.",
+        )
+    return patient_id
+
+
+def parse_report_date(value: Optional[str], name: str = "report_date") -> Optional[str]:
+    """Validates a YYYY-MM-DD date and returns it in that form."""
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be a date as YYYY-MM-DD.")
+
+
+def parse_include(include: Optional[str]) -> FrozenSet[str]:
     """
+    Turns an ``include`` query value such as "parsed_labs,ml_result" or "lean"
+    into the set of response fields to build. No value means everything.
+    """
+    if not include:
+        return frozenset(RESPONSE_FIELDS)
+
+    fields = set()
+    for token in include.split(","):
+        token = token.strip().lower()
+        if not token:
+            continue
+        if token in FIELD_GROUPS:
+            fields.update(FIELD_GROUPS[token])
+        elif token in RESPONSE_FIELDS:
+            fields.add(token)
+        else:
+            allowed = ", ".join(RESPONSE_FIELDS + tuple(FIELD_GROUPS))
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown include field '{token}'. Allowed: {allowed}.",
+            )
+    return frozenset(fields)
+
 
+def not_modified(etag: str) -> Response:
+    # Same Vary as the 200 it stands for; GZipMiddleware only adds it to bodies.
+    return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept-Encoding"})
 
-    It looks for lines like:
-        Hemoglobin 13.5 g/dL
-        WBC 7800 /uL
-        Creatinine 1.2 mg/dL
-    and maps them to canonical keys that exist in LAB_METADATA.
+
+def render_result(result: InterpretationResult, etag: Optional[str] = None) -> ORJSONResponse:
+    # Dump once and hand the dict straight to orjson; FastAPI would otherwise
+    # re-validate the model and walk it again with jsonable_encoder.
+    headers = {"ETag": etag} if etag else None
+    return ORJSONResponse(result.model_dump(exclude_none=True), headers=headers)
+
+
+def _build_result(parts: Dict[str, Any], fields: FrozenSet[str],
+                  deadline: Optional[float] = None) -> InterpretationResult:
     """
-    patterns = {
-        # canonical_key: regex pattern to capture numeric value
-        "hemoglobin": r"hemoglobin[^0-9]*([\d.]+)",
-        "wbc": r"(?:wbc count|total leucocyte count|wbc)[^0-9]*([\d.]+)",
-        "platelets": r"(?:platelet count|platelets)[^0-9]*([\d.]+)",
-        "fasting_glucose": r"(?:fasting glucose|fasting blood sugar|fbs)[^0-9]*([\d.]+)",
-        "pp_glucose": r"(?:post[- ]prandial glucose|pp glucose)[^0-9]*([\d.]+)",
-        "hba1c": r"(?:hba1c)[^0-9]*([\d.]+)",
-        "creatinine": r"(?:serum creatinine|creatinine)[^0-9]*([\d.]+)",
-        "urea": r"(?:blood urea|urea)[^0-9]*([\d.]+)",
-        "total_cholesterol": r"(?:total cholesterol)[^0-9]*([\d.]+)",
-        "triglycerides": r"(?:triglycerides)[^0-9]*([\d.]+)",
-        "hdl": r"\bhdl\b[^0-9]*([\d.]+)",
-        "ldl": r"\bldl\b[^0-9]*([\d.]+)",
-        "total_bilirubin": r"(?:total bilirubin)[^0-9]*([\d.]+)",
-        "direct_bilirubin": r"(?:direct bilirubin)[^0-9]*([\d.]+)",
-        "sgpt": r"(?:alt\s*\(sgpt\)|sgpt|alt)[^0-9]*([\d.]+)",
-        "sgot": r"(?:ast\s*\(sgot\)|sgot|ast)[^0-9]*([\d.]+)",
-        "alp": r"(?:alkaline phosphatase|alp)[^0-9]*([\d.]+)",
-        "tsh": r"\btsh\b[^0-9]*([\d.]+)",
-        "vitamin_d": r"(?:vitamin\s*d)[^0-9]*([\d.]+)",
-        "vitamin_b12": r"(?:vitamin\s*b12)[^0-9]*([\d.]+)",
-        "crp": r"\bcrp\b[^0-9]*([\d.]+)",
-        "esr": r"\besr\b[^0-9]*([\d.]+)",
-    }
-
-    text_low = text.lower()
-    labs: Dict[str, float] = {}
-
-    for key, pat in patterns.items():
-        m = re.search(pat, text_low, re.IGNORECASE)
-        if m:
-            try:
-                labs[key] = float(m.group(1))
-            except ValueError:
-                pass
-
-    return labs
-
-
-@app.post("/analyze_report", response_model=InterpretationResult)
-async def analyze_report(file: UploadFile = File(...)):
+    Builds the response model from pipeline parts, keeping only ``fields``.
+    The narrative is generated on first request and kept in ``parts``.
+    The pipeline's LabPanel and MLAnalysis become dicts only here.
+    """
+    result = InterpretationResult(config_version=lab_registry.get_registry().version)
+    reasons = []
+    if parts.get("truncated"):
+        result.truncated = True
+        reasons.append(parts["truncation_reason"])
+    if "pages" in fields or "full_text" in fields:
+        result.ocr = OCRResult(
+            pages=parts["pages"] if "pages" in fields else None,
+            full_text=parts["full_text"] if "full_text" in fields else None,
+            truncated=parts.get("truncated"),
+            pages_total=parts.get("pages_total"),
+        )
+    if "parsed_labs" in fields:
+        result.parsed_labs = parts["parsed_labs"].to_dict()
+    if "ml_result" in fields:
+        result.ml_result = MLResult(**parts["ml_result"].to_dict())
+    if "llm_summary" in fields:
+        result.llm_summary = ensure_summary(parts, deadline)
+        if result.llm_summary is None:
+            result.truncated = True
+            reasons.append("Time budget exhausted before the narrative summary was generated.")
+    if reasons:
+        result.truncation_reason = " ".join(reasons)
+    return result
+
+
+@app.post(
+    "/analyze_report",
+    response_model=InterpretationResult,
+    response_model_exclude_none=True,
+)
+async def analyze_report(
+    file: UploadFile = File(...),
+    include: Optional[str] = Query(
+        None,
+        description="Comma-separated response parts: pages, full_text, parsed_labs, "
+                    "ml_result, llm_summary, or the groups ocr / lean / all.",
+    ),
+    normalized: bool = Query(
+        False,
+        description="The image is already grayscale and downscaled (e.g. by the web "
+                    "frontend); skips colour conversion and denoising. Ignored for PDFs.",
+    ),
+    if_none_match: Optional[str] = Header(None),
+    x_request_budget_ms: Optional[float] = Header(
+        None, description="Time budget for this request; pages not OCR'd in time are skipped."
+    ),
+    patient_id: Optional[str] = Query(
+        None,
+        description="Record the extracted values in this patient's history (see /patients). Requires X-Admin-Token.",
+    ),
+    report_date: Optional[str] = Query(
+        None, description="Date of the report (YYYY-MM-DD) for the patient's history; defaults to today."
+    ),
+    profile: bool = Query(False, description="Admin only: profile this request (see /admin/profiles)."),
+    x_profile: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None),
+):
+    want_profile = profile or (x_profile or "").lower() in ("1", "true", "yes")
+    if want_profile:
+        require_admin(x_admin_token)
+    budget_s = x_request_budget_ms / 1000.0 if x_request_budget_ms else REQUEST_BUDGET_S
+    deadline = deadline_from_budget(budget_s)
+    fields = parse_include(include)
+    if patient_id is not None:
+        # Recording into a patient's history is as sensitive as reading it.
+        require_admin(x_admin_token)
+        check_patient_id(patient_id)
+        report_date = parse_report_date(report_date) or datetime.date.today().isoformat()
+
     # 1) Validate file type
     fname = (file.filename or "").lower()
     if fname.endswith(".pdf"):
@@ -96,23 +291,372 @@ async def analyze_report(file: UploadFile = File(...)):
     if not file_bytes:
         raise HTTPException(status_code=400, detail="Empty file.")
 
-    ocr_raw = ocr_image_bytes(file_bytes, file_type=file_type)
-    ocr_result = OCRResult(**ocr_raw)  # pages + full_text
+    content_sha = content_hash(file_bytes)
+    # The hint changes the OCR input, so it gets its own cache entries.
+    variant = NORMALIZED_VARIANT if normalized and file_type == "image" else ""
+    etag = make_etag(content_sha, fields, variant)
+    # A request that records into a patient's history needs the parts.
+    if not want_profile and patient_id is None and etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    BYTES_PROCESSED.inc(len(file_bytes), file_type)
+    REQUESTS_IN_FLIGHT.inc(1, "analyze_report")
+    started = time.perf_counter()
+    session = None
+    report_id = None
+    try:
+        with collect_timings() as timings:
+            if want_profile:
+                session = profiling_layer.start("analyze_report")
+            if session is not None:
+                # Profiled requests skip the cache and coalescing so that
+                # every stage runs and shows up in the profile.
+                def run_profiled():
+                    computed = analyze_upload(file_bytes, file_type, deadline, normalized)
+                    return computed, _build_result(computed, fields, deadline)
+
+                ctx = contextvars.copy_context()
+                parts, result = await run_in_threadpool(ctx.run, profiling_layer.call, run_profiled)
+                if not parts.get("truncated"):
+                    await run_in_threadpool(RESULT_CACHE.put, content_sha, parts, variant)
+            else:
+                parts, result = await _cached_or_computed_result(
+                    file_bytes, file_type, content_sha, variant, fields, deadline, normalized
+                )
+
+            if patient_id is not None and not parts.get("truncated"):
+                with stage("store"):
+                    report_id = await run_in_threadpool(
+                        RESULTS_STORE.record, patient_id, report_date, content_sha, parts
+                    )
+
+            with stage("serialize"):
+                # A partial response is not the representation the ETag names.
+                response = render_result(result, None if result.truncated else etag)
+    finally:
+        REQUESTS_IN_FLIGHT.dec(1, "analyze_report")
+        if session is not None:
+            summary = profiling_layer.finish(session, {
+                "content_sha": content_sha,
+                "file_type": file_type,
+                "bytes": len(file_bytes),
+                "stages_s": dict(timings),
+            })
+
+    elapsed = time.perf_counter() - started
+    REQUEST_SECONDS.observe(elapsed, "analyze_report")
+    timings["total"] = elapsed
+    response.headers["Server-Timing"] = server_timing_header(timings)
+    if report_id is not None:
+        response.headers["X-Report-Id"] = str(report_id)
+    if want_profile:
+        if session is not None:
+            response.headers["X-Profile-Id"] = summary["id"]
+        else:
+            response.headers["X-Profile-Status"] = "busy"
+    return response
+
+
+async def _cached_or_computed_result(file_bytes: bytes, file_type: str, content_sha: str,
+                                     variant: str, fields: FrozenSet[str],
+                                     deadline: Optional[float], normalized: bool):
+    """(parts, response model) for an upload, from the result cache when possible."""
+    # The cache is SQLite (a hit updates its LRU stamp) and the narrative may
+    # call out to the LLM, so every step runs in the threadpool. Each hop
+    # carries the timing context along.
+    def cached() -> Optional[Dict[str, Any]]:
+        with stage("cache"):
+            return RESULT_CACHE.get(content_sha, variant)
+
+    parts = await run_in_threadpool(contextvars.copy_context().run, cached)
+    CACHE_REQUESTS.inc(1, "result", "miss" if parts is None else "hit")
+
+    if parts is None:
+        def analyze() -> Dict[str, Any]:
+            computed = analyze_upload(file_bytes, file_type, deadline, normalized)
+            # Partial results are returned but never cached.
+            if not computed.get("truncated"):
+                RESULT_CACHE.put(content_sha, computed, variant)
+            return computed
+
+        async def compute() -> Dict[str, Any]:
+            return await run_in_threadpool(contextvars.copy_context().run, analyze)
+
+        # Double-clicks and retries of the same upload share one run. A
+        # partial result is only shared with requests whose budget is no
+        # larger than the one it was cut short by.
+        try:
+            parts = await SINGLE_FLIGHT.do(
+                f"{content_sha}:{lab_registry.get_registry().version}:{variant}", compute,
+                lambda: RESULT_CACHE.get(content_sha, variant),
+                deadline=deadline,
+                shareable=lambda computed: not computed.get("truncated"),
+            )
+        except asyncio.TimeoutError:
+            parts = analyze_pages([])
+            parts.update(
+                truncated=True,
+                truncation_reason="Time budget exhausted while waiting for the same upload "
+                                  "to be analyzed by another request.",
+            )
+
+    def build() -> InterpretationResult:
+        had_summary = "llm_summary" in parts
+        result = _build_result(parts, fields, deadline)
+        if ("llm_summary" in parts) != had_summary and not parts.get("truncated"):
+            with stage("cache"):
+                RESULT_CACHE.put(content_sha, parts, variant)
+        return result
+
+    return parts, await run_in_threadpool(contextvars.copy_context().run, build)
+
+
+@app.get(
+    "/results/{content_sha}",
+    response_model=InterpretationResult,
+    response_model_exclude_none=True,
+)
+def get_cached_result(
+    content_sha: str,
+    include: Optional[str] = Query(None),
+    normalized: bool = Query(False, description="Look up the result of a normalized image upload."),
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Re-fetches a finished analysis by the SHA-256 of the uploaded file, so
+    clients that already uploaded a report do not have to send it again.
+    """
+    fields = parse_include(include)
+    content_sha = content_sha.lower()
+    variant = NORMALIZED_VARIANT if normalized else ""
+    etag = make_etag(content_sha, fields, variant)
+
+    parts = RESULT_CACHE.get(content_sha, variant)
+    CACHE_REQUESTS.inc(1, "result", "miss" if parts is None else "hit")
+    if parts is None:
+        raise HTTPException(status_code=404, detail="No cached result for this file.")
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    had_summary = "llm_summary" in parts
+    result = _build_result(parts, fields)
+    if ("llm_summary" in parts) != had_summary:
+        RESULT_CACHE.put(content_sha, parts, variant)
+    return render_result(result, etag)
+
+
+def _pages_from_text_report(report: TextReport) -> List[Dict[str, Any]]:
+    given = [name for name in ("text", "pages", "hocr") if getattr(report, name) is not None]
+    if len(given) != 1:
+        raise HTTPException(
+            status_code=400,
+            detail="Provide exactly one of 'text', 'pages' or 'hocr'.",
+        )
+    if report.hocr is not None:
+        return pages_from_hocr(report.hocr)
+    texts = report.pages if report.pages is not None else report.text.split("\f")
+    return [{"page_number": idx, "text": t} for idx, t in enumerate(texts, start=1)]
+
+
+def _analyze_text_report(report: TextReport, fields: FrozenSet[str]) -> InterpretationResult:
+    return _build_result(analyze_pages(_pages_from_text_report(report)), fields)
+
+
+@app.post(
+    "/analyze_text",
+    response_model=InterpretationResult,
+    response_model_exclude_none=True,
+)
+async def analyze_text(report: TextReport, include: Optional[str] = Query(None)):
+    """
+    Analyzes text that was already recognised elsewhere (plain text, per-page
+    text or hOCR) without running server-side OCR. Parsing a report takes well
+    under a millisecond, so this runs on the event loop instead of paying for
+    a threadpool hop; batches do run in the threadpool.
+    """
+    fields = parse_include(include)
+    started = time.perf_counter()
+    response = render_result(_analyze_text_report(report, fields))
+    REQUEST_SECONDS.observe(time.perf_counter() - started, "analyze_text")
+    return response
+
+
+@app.post(
+    "/analyze_text/batch",
+    response_model=InterpretationBatch,
+    response_model_exclude_none=True,
+)
+def analyze_text_batch(batch: TextReportBatch, include: Optional[str] = Query(None)):
+    fields = parse_include(include)
+    started = time.perf_counter()
+    results = [
+        _analyze_text_report(report, fields).model_dump(exclude_none=True)
+        for report in batch.reports
+    ]
+    REQUEST_SECONDS.observe(time.perf_counter() - started, "analyze_text_batch")
+    return ORJSONResponse({"results": results})
+
+
+@app.post(
+    "/analyze_hocr",
+    response_model=InterpretationResult,
+    response_model_exclude_none=True,
+)
+async def analyze_hocr(file: UploadFile = File(...), include: Optional[str] = Query(None)):
+    fields = parse_include(include)
+    raw = await file.read()
+    if not raw:
+        raise HTTPException(status_code=400, detail="Empty file.")
+    try:
+        hocr = raw.decode("utf-8")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="hOCR must be UTF-8 encoded.")
+
+    started = time.perf_counter()
+    response = render_result(_analyze_text_report(TextReport(hocr=hocr), fields))
+    REQUEST_SECONDS.observe(time.perf_counter() - started, "analyze_hocr")
+    return response
+
+
+@app.get("/health", include_in_schema=False)
+def health():
+    return {"status": "ok"}
+
+
+@app.get("/ready", include_in_schema=False)
+def ready():
+    if _ready.is_set():
+        return {"status": "ready"}
+    if _warmup_error:
+        return ORJSONResponse({"status": "failed", "error": _warmup_error}, status_code=503)
+    return ORJSONResponse({"status": "warming_up"}, status_code=503)
+
+
+@app.get("/patients/{patient_id}/reports")
+def patient_reports(
+    patient_id: str,
+    limit: Optional[int] = Query(None, ge=1, description="Newest N only."),
+    x_admin_token: Optional[str] = Header(None),
+):
+    require_admin(x_admin_token)
+    check_patient_id(patient_id)
+    return {"patient_id": patient_id, "reports": RESULTS_STORE.reports(patient_id, limit)}
+
+
+@app.get("/patients/{patient_id}/labs/{lab_key}")
+def patient_lab_series(
+    patient_id: str,
+    lab_key: str,
+    since: Optional[str] = Query(None, description="First report date (YYYY-MM-DD), inclusive."),
+    until: Optional[str] = Query(None, description="Last report date (YYYY-MM-DD), inclusive."),
+    x_admin_token: Optional[str] = Header(None),
+):
+    require_admin(x_admin_token)
+    check_patient_id(patient_id)
+    points = RESULTS_STORE.series(
+        patient_id, lab_key, parse_report_date(since, "since"), parse_report_date(until, "until")
+    )
+    return {"patient_id": patient_id, "lab_key": lab_key, "points": points}
+
+
+@app.get("/patients/{patient_id}/changes")
+def patient_changes(
+    patient_id: str,
+    report_id: Optional[int] = Query(None, description="Report to compare; defaults to the latest."),
+    x_admin_token: Optional[str] = Header(None),
+):
+    require_admin(x_admin_token)
+    check_patient_id(patient_id)
+    changes = RESULTS_STORE.changes(patient_id, report_id)
+    if changes is None:
+        raise HTTPException(status_code=404, detail="No such report for this patient.")
+    return {"patient_id": patient_id, **changes}
+
+
+@app.get("/admin/export", include_in_schema=False)
+def export_results(
+    format: str = Query("parquet", description="parquet or arrow (IPC stream)."),
+    patient_id: Optional[str] = Query(None),
+    since: Optional[str] = Query(None, description="First report date (YYYY-MM-DD), inclusive."),
+    until: Optional[str] = Query(None, description="Last report date (YYYY-MM-DD), inclusive."),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """Streams the patient results store as Parquet or Arrow, one record batch at a time."""
+    require_admin(x_admin_token)
+    if format not in bulk_export.FORMATS:
+        raise HTTPException(status_code=400, detail="format must be parquet or arrow.")
+    if importlib.util.find_spec("pyarrow") is None:
+        raise HTTPException(status_code=501, detail="Export needs pyarrow, which is not installed.")
+    if patient_id is not None:
+        check_patient_id(patient_id)
+    rows = bulk_export.stored_rows(
+        patient_id, parse_report_date(since, "since"), parse_report_date(until, "until")
+    )
+    # The body is produced after this handler returns; fix the schema's
+    # config version now.
+    chunks = bulk_export.stream_export(rows, format, registry=lab_registry.get_registry())
+    media_type, ext = bulk_export.FORMATS[format]
+    return StreamingResponse(
+        chunks, media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="lab_results{ext}"',
+            # Parquet is zstd-compressed already; an explicit encoding makes
+            # GZipMiddleware pass the chunks straight through.
+            "Content-Encoding": "identity",
+        },
+    )
+
+
+@app.get("/config", include_in_schema=False)
+def config_status():
+    return lab_registry.status()
+
+
+@app.post("/admin/config/reload", include_in_schema=False)
+def reload_config(x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    changed = lab_registry.reload(force=True)
+    return {"reloaded": changed, **lab_registry.status()}
+
 
-    parsed_labs = extract_labs_from_text(ocr_result.pages)
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
 
-    if not parsed_labs or len(parsed_labs) == 0:
-        fallback = simple_fallback_parser(ocr_result.full_text)
-        parsed_labs = {**fallback, **parsed_labs}
 
-    ml_raw = full_ml_analysis(parsed_labs)
-    ml_result = MLResult(**ml_raw)
+@app.get("/admin/profiles", include_in_schema=False)
+def list_profiles(x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    out = []
+    for profile_id in profiling_layer.list_profiles():
+        path = profiling_layer.profile_path(profile_id, ".json")
+        if path:
+            with open(path, "r", encoding="utf-8") as f:
+                summary = orjson.loads(f.read())
+            summary.pop("top_cumulative", None)
+            out.append(summary)
+    return ORJSONResponse({"profiles": out})
 
-    interpretation_text = generate_interpretation_full(parsed_labs, ml_raw)
 
-    return InterpretationResult(
-        ocr=ocr_result,
-        parsed_labs=parsed_labs,
-        ml_result=ml_result,
-        llm_summary=interpretation_text,
-    )
\ No newline at end of file
+@app.get("/admin/profiles/{profile_id}", include_in_schema=False)
+def get_profile(
+    profile_id: str,
+    format: str = Query("prof", description="prof (pstats file), json (summary) or text (top functions)."),
+    x_admin_token: Optional[str] = Header(None),
+):
+    require_admin(x_admin_token)
+    if format == "prof":
+        path = profiling_layer.profile_path(profile_id, ".prof")
+        if not path:
+            raise HTTPException(status_code=404, detail="No such profile.")
+        return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
+    if format not in ("json", "text"):
+        raise HTTPException(status_code=400, detail="format must be prof, json or text.")
+    path = profiling_layer.profile_path(profile_id, ".json")
+    if not path:
+        raise HTTPException(status_code=404, detail="No such profile.")
+    with open(path, "r", encoding="utf-8") as f:
+        summary = orjson.loads(f.read())
+    if format == "text":
+        return PlainTextResponse(summary.get("top_cumulative", ""))
+    return ORJSONResponse(summary)
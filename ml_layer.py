@@ -1,31 +1,59 @@
 # ml_layer.py
-from typing import Dict, Any, List
+from dataclasses import dataclass
+from typing import Dict, Any, List, Mapping, Optional, Tuple
 
-from interpretation_config import LAB_METADATA
+from lab_registry import HIGH, LOW, NO_REFERENCE, LabPanel, LabRegistry, get_registry
 
 
-def _compute_risk(parsed_labs: Dict[str, float]) -> Dict[str, Any]:
+@dataclass(slots=True)
+class AnomalyScore:
+    is_anomalous: bool
+    score: float
 
-    if not parsed_labs:
+
+@dataclass(slots=True)
+class RiskScore:
+    risk_label: str
+    risk_score: float
+
+
+@dataclass(slots=True)
+class MLAnalysis:
+    """
+    Result of full_ml_analysis. Stays an object inside the process; to_dict()
+    is the JSON form (result cache, Streamlit cache) and from_dict() reads it back.
+    """
+    anomaly: AnomalyScore
+    risk: RiskScore
+    raw_features: LabPanel
+    conditions: List[str]
+
+    def to_dict(self) -> Dict[str, Any]:
         return {
-            "anomaly": {"is_anomalous": False, "score": 0.0},
-            "risk": {"risk_label": "Unknown", "risk_score": 0.0},
+            "anomaly": {"is_anomalous": self.anomaly.is_anomalous, "score": self.anomaly.score},
+            "risk": {"risk_label": self.risk.risk_label, "risk_score": self.risk.risk_score},
+            "raw_features": self.raw_features.to_dict(),
+            "conditions": list(self.conditions),
         }
 
-    abnormal = 0
-    total = 0
-
-    for key, value in parsed_labs.items():
-        meta = LAB_METADATA.get(key)
-        if not meta:
-            continue
-        total += 1
-        low = meta.get("ref_low")
-        high = meta.get("ref_high")
-        if low is not None and value < low:
-            abnormal += 1
-        elif high is not None and value > high:
-            abnormal += 1
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "MLAnalysis":
+        return cls(
+            anomaly=AnomalyScore(**data["anomaly"]),
+            risk=RiskScore(**data["risk"]),
+            raw_features=LabPanel.from_mapping(data.get("raw_features", {})),
+            conditions=list(data.get("conditions", [])),
+        )
+
+
+def _compute_risk(parsed_labs: Mapping[str, float]) -> Tuple[AnomalyScore, RiskScore]:
+
+    if not parsed_labs:
+        return AnomalyScore(False, 0.0), RiskScore("Unknown", 0.0)
+
+    _, codes = get_registry().classify(parsed_labs)
+    total = int((codes != NO_REFERENCE).sum())
+    abnormal = int(((codes == LOW) | (codes == HIGH)).sum())
 
     if total == 0:
         risk_score = 0.0
@@ -42,22 +70,25 @@ def _compute_risk(parsed_labs: Dict[str, float]) -> Dict[str, Any]:
     anomaly_score = risk_score
     is_anomalous = abnormal > 0
 
-    return {
-        "anomaly": {
-            "is_anomalous": is_anomalous,
-            "score": float(round(anomaly_score, 3)),
-        },
-        "risk": {
-            "risk_label": risk_label,
-            "risk_score": float(round(risk_score, 3)),
-        },
-    }
+    return (
+        AnomalyScore(is_anomalous, float(round(anomaly_score, 3))),
+        RiskScore(risk_label, float(round(risk_score, 3))),
+    )
+
 
+def _ref_high(registry: LabRegistry, key: str) -> Optional[float]:
+    """Upper reference limit of ``key``, or None if the loaded config has no range for it."""
+    idx = registry.index.get(key)
+    if idx is None or not registry.has_ref[idx]:
+        return None
+    return float(registry.ref_high[idx])
 
-def detect_conditions(parsed_labs: Dict[str, float]) -> List[str]:
+
+def detect_conditions(parsed_labs: Mapping[str, float]) -> List[str]:
 
     conditions: List[str] = []
 
+    registry = get_registry()
     get = parsed_labs.get
 
     hb = get("hemoglobin")
@@ -83,12 +114,16 @@ def detect_conditions(parsed_labs: Dict[str, float]) -> List[str]:
     alt = get("sgpt") or get("sgpt")  # alias
     ast = get("sgot")
     alp = get("alp")
+    # Enzyme rules are skipped when the config has no range for the enzyme.
+    alt_high = _ref_high(registry, "sgpt")
+    ast_high = _ref_high(registry, "sgot")
+    alp_high = _ref_high(registry, "alp")
     if (
         (tb is not None and tb > 1.2)
         or (db is not None and db > 0.3)
-        or (alt is not None and alt > 2 * LAB_METADATA["sgpt"]["ref_high"])
-        or (ast is not None and ast > 2 * LAB_METADATA["sgot"]["ref_high"])
-        or (alp is not None and alp > 1.5 * LAB_METADATA["alp"]["ref_high"])
+        or (alt is not None and alt_high is not None and alt > 2 * alt_high)
+        or (ast is not None and ast_high is not None and ast > 2 * ast_high)
+        or (alp is not None and alp_high is not None and alp > 1.5 * alp_high)
     ):
         conditions.append("liver_issue")
 
@@ -134,14 +169,17 @@ def detect_conditions(parsed_labs: Dict[str, float]) -> List[str]:
     return unique_conditions
 
 
-def full_ml_analysis(parsed_labs: Dict[str, float]) -> Dict[str, Any]:
+def lab_flags(parsed_labs: Mapping[str, float]) -> Dict[str, str]:
+    """low / normal / high per lab against its reference range; "no reference" if it has none."""
+    return get_registry().flags(parsed_labs)
+
+
+def full_ml_analysis(parsed_labs: Mapping[str, float]) -> MLAnalysis:
 
-    risk_parts = _compute_risk(parsed_labs)
+    if not isinstance(parsed_labs, LabPanel):
+        parsed_labs = LabPanel.from_mapping(parsed_labs)
+    anomaly, risk = _compute_risk(parsed_labs)
     conditions = detect_conditions(parsed_labs)
 
-    return {
-        "anomaly": risk_parts["anomaly"],
-        "risk": risk_parts["risk"],
-        "raw_features": {k: float(v) for k, v in parsed_labs.items()},
-        "conditions": conditions,
-    }
+    # The panel is not modified after parsing, so it is shared, not copied.
+    return MLAnalysis(anomaly, risk, parsed_labs, conditions)
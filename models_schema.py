@@ -1,5 +1,5 @@
 # backend/models_schema.py
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 from pydantic import BaseModel
 
@@ -10,8 +10,11 @@ class OCRPage(BaseModel):
 
 
 class OCRResult(BaseModel):
-    pages: List[OCRPage]
-    full_text: str
+    pages: Optional[List[OCRPage]] = None
+    full_text: Optional[str] = None
+    # Set when the request's time budget ran out before every page was OCR'd.
+    truncated: Optional[bool] = None
+    pages_total: Optional[int] = None
 
 
 class MLAnomalyResult(BaseModel):
@@ -32,7 +35,29 @@ class MLResult(BaseModel):
 
 
 class InterpretationResult(BaseModel):
-    ocr: OCRResult
-    parsed_labs: Dict[str, float]
-    ml_result: MLResult
-    llm_summary: str
+    # Every part is optional so lean responses (?include=...) can leave out
+    # the heavy OCR text and narrative instead of sending empty placeholders.
+    ocr: Optional[OCRResult] = None
+    parsed_labs: Optional[Dict[str, float]] = None
+    ml_result: Optional[MLResult] = None
+    llm_summary: Optional[str] = None
+    truncated: Optional[bool] = None
+    truncation_reason: Optional[str] = None
+    # Version of lab_config.json the values were interpreted with.
+    config_version: Optional[str] = None
+
+
+class TextReport(BaseModel):
+    # Exactly one of these: plain text (form feeds split pages), per-page
+    # text, or an hOCR document.
+    text: Optional[str] = None
+    pages: Optional[List[str]] = None
+    hocr: Optional[str] = None
+
+
+class TextReportBatch(BaseModel):
+    reports: List[TextReport]
+
+
+class InterpretationBatch(BaseModel):
+    results: List[InterpretationResult]
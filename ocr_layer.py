@@ -1,15 +1,33 @@
 # ocr_layer.py
-from typing import Dict, List
+import os
+import tempfile
+import time
+from concurrent.futures import CancelledError, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Union
 
-import cv2
-import numpy as np
-from pdf2image import convert_from_bytes
-import pytesseract
+from cpu_budget import CPU_BUDGET
+from metrics_layer import stage, PAGES_PROCESSED
+from scheduler_layer import OCR_SCHEDULER, estimate_cost
 
+# cv2, numpy, pdf2image and pytesseract are imported on first use so that
+# importing the API does not pay for them; warmup() loads them ahead of traffic.
+if TYPE_CHECKING:
+    import numpy as np
 
-def _preprocess_image(img: np.ndarray) -> np.ndarray:
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    blur = cv2.medianBlur(gray, 3)
+
+def _preprocess_image(img: "np.ndarray", normalized: bool = False) -> "np.ndarray":
+    """
+    Binarizes a page for Tesseract. ``normalized`` images (already grayscale
+    and downscaled by the client) skip the colour conversion and denoising.
+    """
+    import cv2
+
+    if normalized:
+        blur = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    else:
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        blur = cv2.medianBlur(gray, 3)
     th = cv2.adaptiveThreshold(
         blur, 255,
         cv2.ADAPTIVE_THRESH_MEAN_C,
@@ -20,34 +38,181 @@ def _preprocess_image(img: np.ndarray) -> np.ndarray:
     return th
 
 
-def _images_from_bytes(file_bytes: bytes, file_type: str) -> List[np.ndarray]:
+def pdf_page_count(file_bytes: bytes) -> int:
+    from pdf2image import pdfinfo_from_bytes
+
+    return int(pdfinfo_from_bytes(file_bytes)["Pages"])
+
+
+@contextmanager
+def _page_source(file_bytes: bytes, file_type: str) -> Iterator[Union[bytes, str]]:
+    """
+    What the page workers read: the bytes of an image, or for a PDF the path
+    of a temporary copy written once per job. pdf2image's convert_from_bytes
+    would write and parse the whole file again for every page.
+    """
+    if file_type != "pdf":
+        yield file_bytes
+        return
+    fd, path = tempfile.mkstemp(suffix=".pdf", prefix="lab-ocr-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(file_bytes)
+        yield path
+    finally:
+        os.remove(path)
+
+
+def _load_page(source: Union[bytes, str], file_type: str, page_number: int,
+               normalized: bool = False) -> "np.ndarray":
+    import cv2
+    import numpy as np
+
     if file_type == "image":
-        arr = np.frombuffer(file_bytes, np.uint8)
-        img = cv2.imdecode(arr, cv2.IMREAD_COLOR)
+        arr = np.frombuffer(source, np.uint8)
+        img = cv2.imdecode(arr, cv2.IMREAD_GRAYSCALE if normalized else cv2.IMREAD_COLOR)
         if img is None:
             raise ValueError("Could not decode image bytes.")
-        return [img]
+        return img
 
     if file_type == "pdf":
-        pil_pages = convert_from_bytes(file_bytes)
-        images = [cv2.cvtColor(np.array(p), cv2.COLOR_RGB2BGR) for p in pil_pages]
-        if not images:
-            raise ValueError("No pages extracted from PDF.")
-        return images
+        from pdf2image import convert_from_path
+
+        pil_pages = convert_from_path(source, first_page=page_number, last_page=page_number)
+        if not pil_pages:
+            raise ValueError(f"Could not rasterize PDF page {page_number}.")
+        return cv2.cvtColor(np.array(pil_pages[0]), cv2.COLOR_RGB2BGR)
 
     raise ValueError(f"Unsupported file_type: {file_type}")
 
 
-def ocr_image_bytes(file_bytes: bytes, file_type: str = "pdf") -> Dict:
+def _ocr_page(source: Union[bytes, str], file_type: str, page_number: int,
+              deadline: Optional[float] = None, normalized: bool = False) -> Optional[str]:
+    """
+    OCR text of one page, or None if the deadline passed before it finished.
+    ``source`` comes from _page_source.
+    """
+    import pytesseract
+
+    if deadline is not None and time.monotonic() >= deadline:
+        return None
+
+    CPU_BUDGET.configure_opencv()
+    # Each page is rasterized on the worker that OCRs it, so a request only
+    # holds the bitmaps of the pages it currently has in flight.
+    with stage("rasterize"):
+        img = _load_page(source, file_type, page_number, normalized)
+    with stage("preprocess"):
+        processed = _preprocess_image(img, normalized)
+    with stage("tesseract"):
+        if deadline is None:
+            return pytesseract.image_to_string(processed)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        try:
+            # pytesseract kills the Tesseract process once the timeout passes.
+            return pytesseract.image_to_string(processed, timeout=remaining)
+        except RuntimeError:
+            if time.monotonic() >= deadline:
+                return None
+            raise
+
+
+def ocr_image_bytes(file_bytes: bytes, file_type: str = "pdf",
+                    deadline: Optional[float] = None, normalized: bool = False) -> Dict:
+    """
+    OCRs every page of an upload. With a ``deadline`` (time.monotonic()
+    timestamp) pages that cannot finish in time are skipped and the result is
+    marked ``truncated`` with the reason, instead of running past it.
+    ``normalized`` marks an image the client already converted to grayscale
+    and downscaled; it is ignored for PDFs.
+    """
+    if file_type not in ("pdf", "image"):
+        raise ValueError(f"Unsupported file_type: {file_type}")
+
+    cost = estimate_cost(file_bytes, file_type)
+    if file_type == "pdf":
+        with stage("rasterize"):
+            n_pages = pdf_page_count(file_bytes)
+        if n_pages < 1:
+            raise ValueError("No pages extracted from PDF.")
+    else:
+        n_pages = 1
+
+    with _page_source(file_bytes, file_type) as source:
+        job = OCR_SCHEDULER.open_job(cost)
+        try:
+            futures = [
+                OCR_SCHEDULER.submit(job, _ocr_page, source, file_type, idx, deadline,
+                                     normalized and file_type == "image")
+                for idx in range(1, n_pages + 1)
+            ]
+            for f in futures:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    f.result(timeout=remaining)
+                except (FutureTimeout, CancelledError):
+                    break
+        finally:
+            # Pages still queued are dropped; running ones stop at the deadline.
+            OCR_SCHEDULER.close_job(job)
 
-    images = _images_from_bytes(file_bytes, file_type)
     pages = []
-    full_text_parts = []
+    for idx, f in enumerate(futures, start=1):
+        if f.done() and not f.cancelled() and f.exception() is None and f.result() is not None:
+            pages.append({"page_number": idx, "text": f.result()})
+    PAGES_PROCESSED.inc(len(pages), file_type)
+
+    result = {"pages": pages, "full_text": "\n".join(p["text"] for p in pages)}
+    if len(pages) < n_pages:
+        result["truncated"] = True
+        result["pages_total"] = n_pages
+        result["truncation_reason"] = (
+            f"Time budget exhausted: OCR finished {len(pages)} of {n_pages} pages."
+        )
+    return result
+
+
+def iter_ocr_pages(file_bytes: bytes, file_type: str = "pdf",
+                   first_page: int = 1) -> Iterator[Dict]:
+    """
+    Yields OCR pages ({"page_number", "text"}) in order as the scheduler
+    finishes them, starting at ``first_page``. Closing the generator early
+    drops the pages that have not started yet.
+    """
+    if file_type not in ("pdf", "image"):
+        raise ValueError(f"Unsupported file_type: {file_type}")
+
+    n_pages = pdf_page_count(file_bytes) if file_type == "pdf" else 1
+    if first_page > n_pages:
+        return
+    cost = estimate_cost(file_bytes, file_type) * (n_pages - first_page + 1) / n_pages
+
+    with _page_source(file_bytes, file_type) as source:
+        job = OCR_SCHEDULER.open_job(cost)
+        try:
+            futures = [
+                (idx, OCR_SCHEDULER.submit(job, _ocr_page, source, file_type, idx))
+                for idx in range(first_page, n_pages + 1)
+            ]
+            for idx, f in futures:
+                text = f.result()
+                PAGES_PROCESSED.inc(1, file_type)
+                yield {"page_number": idx, "text": text}
+        finally:
+            OCR_SCHEDULER.close_job(job)
+
 
-    for idx, img in enumerate(images, start=1):
-        processed = _preprocess_image(img)
-        text = pytesseract.image_to_string(processed)
-        pages.append({"page_number": idx, "text": text})
-        full_text_parts.append(text)
+def warmup() -> None:
+    """
+    Imports the OCR stack and runs one tiny page through preprocessing and
+    Tesseract, so its binary and language data are loaded before traffic.
+    """
+    import numpy as np
+    import pdf2image  # noqa: F401
+    import pytesseract
 
-    return {"pages": pages, "full_text": "\n".join(full_text_parts)}
+    CPU_BUDGET.configure_opencv()
+    blank = np.full((64, 256, 3), 255, dtype=np.uint8)
+    pytesseract.image_to_string(_preprocess_image(blank))
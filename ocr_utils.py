@@ -1,12 +1,14 @@
 # ocr_utils.py
-from pdf2image import convert_from_bytes
-import pytesseract
-from PIL import Image
+
 
 def pdf_to_images(pdf_bytes: bytes, dpi: int = 300):
+    from pdf2image import convert_from_bytes
+
     return convert_from_bytes(pdf_bytes, dpi=dpi)
 
-def ocr_image(img: Image.Image) -> str:
+def ocr_image(img) -> str:
+    import pytesseract
+
     return pytesseract.image_to_string(img)
 
 def ocr_pdf(pdf_bytes: bytes):
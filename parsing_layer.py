@@ -1,8 +1,32 @@
 # parsing_layer.py
-from typing import Dict, Iterable, Any
+from typing import Dict, Iterable, Any, List, Optional, Tuple
+import html
 import re
 
-from lab_config import LAB_NAME_ALIASES
+from lab_registry import LabPanel, get_registry
+
+# Patterns like:
+#   Hemoglobin 13.2 g/dL
+#   WBC - 7800 /µL
+#   Creatinine: 1.4 mg/dL
+NUMBER_PATTERNS = [
+    re.compile(r"([a-zA-Z \-/\(\)%\.]+)\s*[:=\-]\s*([0-9]+\.[0-9]+)"),
+    re.compile(r"([a-zA-Z \-/\(\)%\.]+)\s*[:=\-]\s*([0-9]+)"),
+]
+
+# hOCR (Tesseract and most OCR engines): ocr_page divs contain line spans,
+# which contain ocrx_word spans with the recognised words.
+_HOCR_PAGE_RE = re.compile(r"""<div[^>]*\bclass=["']ocr_page["']""", re.IGNORECASE)
+_HOCR_LINE_RE = re.compile(
+    r"""<span[^>]*\bclass=["'](?:ocr_line|ocrx_line|ocr_header|ocr_caption|ocr_textfloat)["']""",
+    re.IGNORECASE,
+)
+_HOCR_WORD_RE = re.compile(
+    r"""<span[^>]*\bclass=["']ocrx_word["'][^>]*>(.*?)</span>""", re.IGNORECASE | re.DOTALL
+)
+_TAG_RE = re.compile(r"<[^>]+>")
+
+_LINE_NUMBER_RE = re.compile(r"(?<![\w.])-?(?:\d{1,3}(?:,\d{2,3})+|\d+)(?:\.\d+)?")
 
 
 def _get_page_text(page: Any) -> str:
@@ -13,40 +37,27 @@ def _get_page_text(page: Any) -> str:
 
 
 def normalize_test_name(raw_name: str) -> str | None:
-    raw = raw_name.lower().strip()
-    for key, aliases in LAB_NAME_ALIASES.items():
-        for alias in aliases:
-            if alias in raw:
-                return key
-    return None
+    return get_registry().lookup_name(raw_name)
 
 
-def extract_labs_from_text(ocr_pages: Iterable[Any]) -> Dict[str, float]:
+def extract_labs_from_text(ocr_pages: Iterable[Any]) -> LabPanel:
     """
     Takes OCR output pages and extracts many blood test values.
 
-    Returns:
+    Returns a LabPanel, read like
         parsed_labs = {'hemoglobin': 12.5, 'wbc': 7800, 'creatinine': 1.4, ...}
     """
     text_full = "\n".join(_get_page_text(p) for p in ocr_pages).lower()
+    registry = get_registry()
 
-    parsed_labs: Dict[str, float] = {}
+    parsed_labs = LabPanel(registry)
 
-    # Patterns like:
-    #   Hemoglobin 13.2 g/dL
-    #   WBC - 7800 /µL
-    #   Creatinine: 1.4 mg/dL
-    number_patterns = [
-        r"([a-zA-Z \-/\(\)%\.]+)\s*[:=\-]\s*([0-9]+\.[0-9]+)",
-        r"([a-zA-Z \-/\(\)%\.]+)\s*[:=\-]\s*([0-9]+)",
-    ]
-
-    for pattern in number_patterns:
-        for match in re.finditer(pattern, text_full):
+    for pattern in NUMBER_PATTERNS:
+        for match in pattern.finditer(text_full):
             raw_name = match.group(1).strip()
             raw_value = match.group(2)
 
-            key = normalize_test_name(raw_name)
+            key = registry.lookup_name(raw_name)
             if not key:
                 continue
 
@@ -55,6 +66,49 @@ def extract_labs_from_text(ocr_pages: Iterable[Any]) -> Dict[str, float]:
             except ValueError:
                 continue
 
-            parsed_labs[key] = value
+            parsed_labs.set(key, value)
 
     return parsed_labs
+
+
+def pages_from_hocr(hocr: str) -> List[Dict[str, Any]]:
+    """
+    Turns an hOCR document into OCR pages ({"page_number", "text"}), one text
+    line per hOCR line, so it can go straight into extract_labs_from_text.
+    """
+    page_chunks = _HOCR_PAGE_RE.split(hocr)[1:] or [hocr]
+
+    pages = []
+    for idx, chunk in enumerate(page_chunks, start=1):
+        lines = []
+        for line_chunk in _HOCR_LINE_RE.split(chunk)[1:]:
+            words = [
+                html.unescape(_TAG_RE.sub("", w)).strip()
+                for w in _HOCR_WORD_RE.findall(line_chunk)
+            ]
+            words = [w for w in words if w]
+            if words:
+                lines.append(" ".join(words))
+        pages.append({"page_number": idx, "text": "\n".join(lines)})
+    return pages
+
+
+def match_lab_lines(lines: List[str]) -> Dict[str, List[Tuple[int, str, Optional[float]]]]:
+    """
+    Finds the lines that mention a lab, for highlighting:
+        {"hemoglobin": [(line_index, line, first_number_after_the_name), ...]}
+    """
+    registry = get_registry()
+    matches: Dict[str, List[Tuple[int, str, Optional[float]]]] = {}
+    for idx, line in enumerate(lines):
+        low = line.lower()
+        seen = set()
+        for m in registry.alias_re.finditer(low):
+            key = registry.alias_keys[m.group(0)]
+            if key in seen:
+                continue
+            seen.add(key)
+            num = _LINE_NUMBER_RE.search(low, m.end())
+            value = float(num.group(0).replace(",", "")) if num else None
+            matches.setdefault(key, []).append((idx, line, value))
+    return matches
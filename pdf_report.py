@@ -1,20 +1,99 @@
 # pdf_report.py
+"""
+PDF exports of an interpretation.
+
+Style sheets and table styles are built once at import. Rendered bytes are
+kept in a small LRU keyed by a hash of everything that goes into the PDF, so
+repeated downloads of the same interpretation do not render it again.
+"""
+import hashlib
 import io
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List
+
+import orjson
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer,
+    SimpleDocTemplate, Paragraph, Spacer, Preformatted,
     Table, TableStyle, ListFlowable, ListItem
 )
-from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+PDF_CACHE_ENTRIES = int(os.getenv("LAB_PDF_CACHE_ENTRIES", "32"))
+
+STYLES = getSampleStyleSheet()
+CONDITION_STYLE = ParagraphStyle("condition", parent=STYLES["Normal"], spaceAfter=6)
+MATCHED_LINES_STYLE = ParagraphStyle("mono", parent=STYLES["Code"], fontName="Courier", fontSize=9, leading=13)
+RAW_TEXT_STYLE = ParagraphStyle("mono2", parent=STYLES["Code"], fontName="Courier", fontSize=8, leading=10)
+# Courier characters that fit between the 36pt margins of A4 at 9pt / 8pt.
+MATCHED_LINE_CHARS = 96
+RAW_TEXT_CHARS = 108
+
+PANEL_TABLE_STYLE = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+])
+TEST_TABLE_STYLE = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+    ("GRID", (0, 0), (-1, -1), 0.25, colors.black),
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+])
+VALUES_TABLE_STYLE = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#f2f6ff")),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.HexColor("#0f172a")),
+    ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("GRID", (0, 0), (-1, -1), 0.3, colors.HexColor("#e6edf7")),
+    ("BOTTOMPADDING", (0, 0), (-1, 0), 8)
+])
+
+_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def interpretation_hash(*parts: Any) -> str:
+    payload = orjson.dumps(parts, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str)
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _cached(key: str, render: Callable[[], bytes]) -> bytes:
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    pdf_bytes = render()
+    with _cache_lock:
+        _cache[key] = pdf_bytes
+        while len(_cache) > PDF_CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return pdf_bytes
 
 
 def generate_pdf_report(interp, home_guidance, patient_name=""):
+    key = interpretation_hash("report", interp, home_guidance, patient_name)
+    return _cached(key, lambda: _render_report(interp, home_guidance, patient_name))
+
+
+def render_report_to_file(path: str, interp, home_guidance, patient_name="") -> None:
+    """Renders generate_pdf_report's PDF straight to ``path`` without keeping the bytes."""
+    _build_report(path, interp, home_guidance, patient_name)
 
 
+def _render_report(interp, home_guidance, patient_name):
     buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
-    styles = getSampleStyleSheet()
+    _build_report(buffer, interp, home_guidance, patient_name)
+    pdf_bytes = buffer.getvalue()
+    buffer.close()
+    return pdf_bytes
+
+
+def _build_report(target, interp, home_guidance, patient_name):
+    doc = SimpleDocTemplate(target, pagesize=A4)
+    styles = STYLES
     story = []
 
     story.append(Paragraph("Lab Report – AI Interpretation", styles["Title"]))
@@ -36,15 +115,7 @@ def generate_pdf_report(interp, home_guidance, patient_name=""):
             table_data.append([panel, sev])
 
         tbl = Table(table_data)
-        tbl.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-                    ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ]
-            )
-        )
+        tbl.setStyle(PANEL_TABLE_STYLE)
 
         story.append(Paragraph("Panel Severity Overview", styles["Heading2"]))
         story.append(tbl)
@@ -66,15 +137,7 @@ def generate_pdf_report(interp, home_guidance, patient_name=""):
         ])
 
     t2 = Table(test_data, colWidths=[85, 55, 60, 85, 60, 60, 140])
-    t2.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-                ("GRID", (0, 0), (-1, -1), 0.25, colors.black),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-            ]
-        )
-    )
+    t2.setStyle(TEST_TABLE_STYLE)
 
     story.append(t2)
     story.append(Spacer(1, 14))
@@ -96,6 +159,59 @@ def generate_pdf_report(interp, home_guidance, patient_name=""):
     )
 
     doc.build(story)
-    pdf_bytes = buffer.getvalue()
-    buffer.close()
-    return pdf_bytes
+
+
+def build_interpreted_pdf_bytes(rows: List[List[str]], conditions: Dict[str, str],
+                                matches, lines: List[str]) -> bytes:
+    """
+    The Streamlit app's export: extracted values (``rows`` of test, value,
+    status), hints, matched OCR lines and the start of the raw text.
+    """
+    key = interpretation_hash("interpreted", rows, conditions, matches, lines[:50])
+    return _cached(key, lambda: _render_interpreted(rows, conditions, matches, lines))
+
+
+def _render_interpreted(rows, conditions, matches, lines):
+    buf = io.BytesIO()
+    doc = SimpleDocTemplate(buf, pagesize=A4, rightMargin=36, leftMargin=36, topMargin=36, bottomMargin=36)
+    styles = STYLES
+    story = []
+
+    story.append(Paragraph("ABC Diagnostic Laboratory — Interpreted Report", styles["Title"]))
+    story.append(Spacer(1, 6))
+    story.append(Paragraph("Auto-generated interpretation (simple rules). For clinical decisions, consult a clinician.", styles["Normal"]))
+    story.append(Spacer(1, 12))
+
+    story.append(Paragraph("Extracted Values", styles["Heading2"]))
+    t = Table([["Test", "Value", "Status"]] + rows, colWidths=[200, 120, 120])
+    t.setStyle(VALUES_TABLE_STYLE)
+    story.append(t)
+    story.append(Spacer(1, 14))
+
+    story.append(Paragraph("Plain-language summary & suggested next steps", styles["Heading2"]))
+    for k, v in conditions.items():
+        story.append(Paragraph(f"<b>{k.replace('_',' ').title()}:</b> {v}", CONDITION_STYLE))
+    story.append(Spacer(1, 12))
+
+    story.append(Paragraph("Matched OCR lines (where values were found)", styles["Heading2"]))
+    matched_items = []
+    for lab, occ in matches.items():
+        for idx, line, val in occ:
+            matched_items.append((lab, idx, line.strip()))
+    matched_items.sort(key=lambda x: x[1])
+    if not matched_items:
+        story.append(Paragraph("(No matched lines detected in OCR output.)", styles["Normal"]))
+    else:
+        # One flowable for all lines; Preformatted takes plain text, so there
+        # is no markup to parse or escape.
+        text = "\n".join(f"{lab.upper()} (line {idx+1}): {line}" for lab, idx, line in matched_items[:200])
+        story.append(Preformatted(text, MATCHED_LINES_STYLE, maxLineLength=MATCHED_LINE_CHARS, newLineChars="  "))
+
+    story.append(Spacer(1, 12))
+    story.append(Paragraph("Raw OCR text (truncated)", styles["Heading2"]))
+    raw_preview = "\n".join(lines[:50])  # first 50 lines
+    story.append(Preformatted(raw_preview, RAW_TEXT_STYLE, maxLineLength=RAW_TEXT_CHARS, newLineChars="  "))
+
+    doc.build(story)
+    buf.seek(0)
+    return buf.read()
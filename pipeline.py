@@ -0,0 +1,106 @@
+# pipeline.py
+"""
+In-process analysis pipeline shared by the API endpoints:
+OCR -> lab parsing -> ML, with the narrative generated only when asked for.
+
+The intermediate "parts" dict (pages, full_text, parsed_labs, ml_result and
+optionally llm_summary) is what the result cache stores. parsed_labs is a
+LabPanel and ml_result an MLAnalysis; they become pydantic models only when a
+response is built (main._build_result).
+"""
+import time
+from typing import Any, Dict, List, Optional
+
+from lab_registry import LabPanel, get_registry
+from ocr_layer import ocr_image_bytes
+from parsing_layer import extract_labs_from_text
+from ml_layer import full_ml_analysis
+from llm_layer import generate_interpretation_full
+from metrics_layer import stage
+
+
+def simple_fallback_parser(text: str) -> Dict[str, float]:
+    """
+
+
+    It looks for lines like:
+        Hemoglobin 13.5 g/dL
+        WBC 7800 /uL
+        Creatinine 1.2 mg/dL
+    and maps them to canonical lab keys.
+    """
+    text_low = text.lower()
+    labs: Dict[str, float] = {}
+
+    for key, pattern in get_registry().fallback_patterns:
+        m = pattern.search(text_low)
+        if m:
+            try:
+                labs[key] = float(m.group(1))
+            except ValueError:
+                pass
+
+    return labs
+
+
+def analyze_pages(pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Parsing and ML for already-recognised pages ({"page_number", "text"} dicts)."""
+    full_text = "\n".join(p["text"] for p in pages)
+
+    with stage("parse"):
+        parsed_labs = extract_labs_from_text(pages)
+
+        if not parsed_labs:
+            parsed_labs = LabPanel.from_mapping(simple_fallback_parser(full_text))
+
+    with stage("ml"):
+        ml_raw = full_ml_analysis(parsed_labs)
+
+    return {
+        "pages": pages,
+        "full_text": full_text,
+        "parsed_labs": parsed_labs,
+        "ml_result": ml_raw,
+    }
+
+
+def deadline_from_budget(budget_s: Optional[float]) -> Optional[float]:
+    """time.monotonic() deadline for a budget in seconds; None or <= 0 means no deadline."""
+    if not budget_s or budget_s <= 0:
+        return None
+    return time.monotonic() + budget_s
+
+
+def deadline_passed(deadline: Optional[float]) -> bool:
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def analyze_upload(file_bytes: bytes, file_type: str,
+                   deadline: Optional[float] = None, normalized: bool = False) -> Dict[str, Any]:
+    """
+    OCR, parsing and ML for one uploaded PDF or image. If the deadline cuts
+    OCR short, the labs found on the finished pages are still parsed and the
+    parts carry "truncated", "pages_total" and "truncation_reason".
+    """
+    ocr_raw = ocr_image_bytes(file_bytes, file_type=file_type, deadline=deadline,
+                              normalized=normalized)
+    parts = analyze_pages(ocr_raw["pages"])
+    for key in ("truncated", "pages_total", "truncation_reason"):
+        if key in ocr_raw:
+            parts[key] = ocr_raw[key]
+    return parts
+
+
+def ensure_summary(parts: Dict[str, Any], deadline: Optional[float] = None) -> Optional[str]:
+    """
+    Returns the narrative for ``parts``, generating and keeping it on first
+    use. Returns None when it is not generated yet and the deadline has passed.
+    """
+    if "llm_summary" not in parts:
+        if deadline_passed(deadline):
+            return None
+        with stage("narrative"):
+            parts["llm_summary"] = generate_interpretation_full(
+                parts["parsed_labs"], parts["ml_result"]
+            )
+    return parts["llm_summary"]
@@ -0,0 +1,183 @@
+# profiling_layer.py
+"""
+Opt-in profiling of single requests.
+
+An admin asks for it per request (see main.analyze_report). The handler then
+opens a RequestProfile and makes it current through a ContextVar, which the
+threadpool and the OCR scheduler copy into their workers. Up to Python 3.11
+cProfile only sees the thread that enabled it, so each unit of work that goes
+through call() gets its own cProfile.Profile. From 3.12 cProfile runs on the
+process-wide sys.monitoring: one enabled profiler sees every thread and a
+second enable() raises, so the request shares one profiler that stays enabled
+while any of its units run. That profile also picks up whatever other requests
+execute meanwhile. The profiles are merged at the end.
+
+tracemalloc records the peak traced memory during the request. It traces every
+allocation in the process, so concurrent unprofiled requests pay for it too;
+start() admits one profiled request at a time to bound that.
+
+Profiles land in LAB_PROFILE_DIR as <id>.prof (pstats) plus <id>.json
+(summary). Only the newest LAB_PROFILE_MAX ones are kept. Without a profile in
+the context, call() costs one ContextVar lookup.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+PROFILE_DIR = os.getenv("LAB_PROFILE_DIR", os.path.join(".cache", "profiles"))
+PROFILE_MAX = int(os.getenv("LAB_PROFILE_MAX", "50"))
+# Profiling and the admin endpoints are disabled unless a token is set.
+ADMIN_TOKEN = os.getenv("LAB_ADMIN_TOKEN", "")
+
+PROFILE_ID_RE = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$")
+
+_active: ContextVar[Optional["RequestProfile"]] = ContextVar("lab_request_profile", default=None)
+_local = threading.local()
+SHARED_PROFILER = sys.version_info >= (3, 12)
+# tracemalloc is process-wide; one profiled request at a time keeps the peak
+# meaningful.
+_slot = threading.Lock()
+
+
+class RequestProfile:
+    def __init__(self, label: str):
+        self.id = time.strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:8]
+        self.label = label
+        self.started = time.perf_counter()
+        self._profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self._started_tracemalloc = False
+        self._shared_users = 0
+        self._profiler_busy = False
+        self._token = None
+
+    def add(self, profiler: cProfile.Profile) -> None:
+        with self._lock:
+            self._profiles.append(profiler)
+
+
+def start(label: str) -> Optional[RequestProfile]:
+    """Makes a new profile current, or returns None if another request is being profiled."""
+    if not _slot.acquire(blocking=False):
+        return None
+    profile = RequestProfile(label)
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+        profile._started_tracemalloc = True
+    tracemalloc.reset_peak()
+    profile._token = _active.set(profile)
+    return profile
+
+
+def call(fn: Callable, *args) -> Any:
+    """Runs ``fn`` under cProfile when a profile is current; otherwise just runs it."""
+    profile = _active.get()
+    if profile is None or getattr(_local, "profiling", False):
+        return fn(*args)
+    _local.profiling = True
+    try:
+        if SHARED_PROFILER:
+            return _call_shared(profile, fn, args)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return fn(*args)
+        finally:
+            profiler.disable()
+            profile.add(profiler)
+    finally:
+        _local.profiling = False
+
+
+def _call_shared(profile: RequestProfile, fn: Callable, args: tuple) -> Any:
+    with profile._lock:
+        if profile._shared_users == 0 and not profile._profiler_busy:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Something else (e.g. a profiler around the whole server)
+                # holds sys.monitoring; run the request unprofiled.
+                profile._profiler_busy = True
+            else:
+                profile._profiles.append(profiler)
+        profile._shared_users += 1
+    try:
+        return fn(*args)
+    finally:
+        with profile._lock:
+            profile._shared_users -= 1
+            if profile._shared_users == 0 and not profile._profiler_busy:
+                profile._profiles[-1].disable()
+
+
+def finish(profile: RequestProfile, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Stops profiling, writes <id>.prof and <id>.json and returns the summary."""
+    try:
+        _active.reset(profile._token)
+        wall = time.perf_counter() - profile.started
+        _, peak = tracemalloc.get_traced_memory()
+        if profile._started_tracemalloc:
+            tracemalloc.stop()
+    finally:
+        _slot.release()
+
+    summary: Dict[str, Any] = {
+        "id": profile.id,
+        "label": profile.label,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "wall_s": wall,
+        "tracemalloc_peak_bytes": peak,
+        "threads_profiled": len(profile._profiles),
+        "profiler_busy": profile._profiler_busy,
+        **(extra or {}),
+    }
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    if profile._profiles:
+        stats = pstats.Stats(profile._profiles[0])
+        for p in profile._profiles[1:]:
+            stats.add(p)
+        stats.dump_stats(os.path.join(PROFILE_DIR, f"{profile.id}.prof"))
+        out = io.StringIO()
+        stats.stream = out
+        stats.sort_stats("cumulative").print_stats(30)
+        summary["top_cumulative"] = out.getvalue()
+    with open(os.path.join(PROFILE_DIR, f"{profile.id}.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    _prune()
+    return summary
+
+
+def _prune() -> None:
+    ids = list_profiles()
+    for old in ids[PROFILE_MAX:]:
+        for ext in (".prof", ".json"):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, old + ext))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles() -> List[str]:
+    """Stored profile ids, newest first."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    ids = {name[:-5] for name in os.listdir(PROFILE_DIR) if name.endswith(".json")}
+    return sorted((i for i in ids if PROFILE_ID_RE.match(i)), reverse=True)
+
+
+def profile_path(profile_id: str, ext: str) -> Optional[str]:
+    if not PROFILE_ID_RE.match(profile_id):
+        return None
+    path = os.path.join(PROFILE_DIR, profile_id + ext)
+    return path if os.path.exists(path) else None
@@ -0,0 +1,142 @@
+# result_cache.py
+"""
+Bounded SQLite store of finished analyses, keyed by the SHA-256 of the upload
+and the version of the lab configuration the request runs under.
+
+A reloaded configuration changes every key. Rows written under other versions
+are dropped when the cache is opened and otherwise age out of the LRU bound.
+
+Bodies are JSON; get() turns parsed_labs and ml_result back into a LabPanel
+and an MLAnalysis, so callers see the same parts the pipeline returns.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+import orjson
+
+from lab_registry import LabPanel, get_registry
+from ml_layer import MLAnalysis
+
+
+CACHE_PATH = os.getenv("LAB_RESULT_CACHE_PATH", os.path.join(".cache", "results.sqlite3"))
+CACHE_MAX_ENTRIES = int(os.getenv("LAB_RESULT_CACHE_MAX_ENTRIES", "2000"))
+
+
+def content_hash(file_bytes: bytes) -> str:
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def make_etag(content_sha: str, fields: Iterable[str], variant: str = "") -> str:
+    """
+    ETag for one representation: upload, config version and field set. It is
+    weak because GZipMiddleware may send the same representation as different
+    bytes, which a strong validator must not cover.
+    """
+    config_version = get_registry().version
+    fields_tag = hashlib.sha1(",".join(sorted(fields)).encode("utf-8")).hexdigest()[:8]
+    variant_tag = f"-{variant}" if variant else ""
+    return f'W/"{content_sha[:32]}-{config_version}-{fields_tag}{variant_tag}"'
+
+
+def _to_json(obj: Any) -> Any:
+    if isinstance(obj, (LabPanel, MLAnalysis)):
+        return obj.to_dict()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match.
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    candidates = (c.strip() for c in if_none_match.split(","))
+    return opaque in (c[2:] if c.startswith("W/") else c for c in candidates)
+
+
+class ResultCache:
+    def __init__(self, path: str = CACHE_PATH, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS results (
+                    content_sha    TEXT NOT NULL,
+                    config_version TEXT NOT NULL,
+                    variant        TEXT NOT NULL DEFAULT '',
+                    body           BLOB NOT NULL,
+                    created_at     REAL NOT NULL,
+                    accessed_at    REAL NOT NULL,
+                    PRIMARY KEY (content_sha, config_version, variant)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_results_accessed ON results (accessed_at)"
+            )
+            conn.execute("DELETE FROM results WHERE config_version != ?", (get_registry().version,))
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, content_sha: str, variant: str = "") -> Optional[Dict[str, Any]]:
+        config_version = get_registry().version
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT body FROM results WHERE content_sha = ? AND config_version = ? AND variant = ?",
+                (content_sha, config_version, variant),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE results SET accessed_at = ? WHERE content_sha = ? AND config_version = ? AND variant = ?",
+                (time.time(), content_sha, config_version, variant),
+            )
+            conn.commit()
+        parts = orjson.loads(row[0])
+        if "parsed_labs" in parts:
+            parts["parsed_labs"] = LabPanel.from_mapping(parts["parsed_labs"])
+        if "ml_result" in parts:
+            parts["ml_result"] = MLAnalysis.from_dict(parts["ml_result"])
+        return parts
+
+    def put(self, content_sha: str, parts: Dict[str, Any], variant: str = "") -> None:
+        config_version = get_registry().version
+        now = time.time()
+        body = orjson.dumps(parts, default=_to_json)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO results "
+                "(content_sha, config_version, variant, body, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (content_sha, config_version, variant, body, now, now),
+            )
+            (count,) = conn.execute("SELECT COUNT(*) FROM results").fetchone()
+            if count > self.max_entries:
+                conn.execute(
+                    "DELETE FROM results WHERE rowid IN "
+                    "(SELECT rowid FROM results ORDER BY accessed_at ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            conn.commit()
+
+
+RESULT_CACHE = ResultCache()
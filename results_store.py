@@ -0,0 +1,243 @@
+# results_store.py
+"""
+Append-only SQLite store of lab values per patient, for trends across reports.
+
+/analyze_report records a report when the upload names a patient. Each report
+is one row in ``reports`` (date, risk, conditions, config version) and one row
+per lab in ``lab_values``. lab_values is a WITHOUT ROWID table clustered on
+(patient_id, lab_key, report_date, report_id). A lab's time series is then
+one contiguous range of the primary key, and "the previous value of this
+lab" is one index seek, however many reports a patient has.
+
+The same upload is recorded once per patient; later uploads of the same bytes
+for that patient are ignored. Nothing is updated or deleted.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+import orjson
+
+from lab_registry import FLAG_NAMES, get_registry
+
+STORE_PATH = os.getenv("LAB_RESULTS_STORE_PATH", os.path.join(".cache", "patient_results.sqlite3"))
+
+PATIENT_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+# Below SQLite's default limit on bound parameters.
+_MAX_SQL_PARAMS = 900
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS reports (
+        id             INTEGER PRIMARY KEY,
+        patient_id     TEXT NOT NULL,
+        report_date    TEXT NOT NULL,
+        content_sha    TEXT NOT NULL,
+        config_version TEXT NOT NULL,
+        risk_label     TEXT,
+        risk_score     REAL,
+        conditions     TEXT NOT NULL,
+        created_at     REAL NOT NULL,
+        UNIQUE (patient_id, content_sha)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_reports_patient_date ON reports (patient_id, report_date, id)",
+    """
+    CREATE TABLE IF NOT EXISTS lab_values (
+        patient_id  TEXT NOT NULL,
+        lab_key     TEXT NOT NULL,
+        report_date TEXT NOT NULL,
+        report_id   INTEGER NOT NULL REFERENCES reports (id),
+        value       REAL NOT NULL,
+        unit        TEXT NOT NULL,
+        flag        TEXT NOT NULL,
+        PRIMARY KEY (patient_id, lab_key, report_date, report_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_lab_values_report ON lab_values (report_id)",
+)
+
+
+class ResultsStore:
+    def __init__(self, path: str = STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in SCHEMA:
+                conn.execute(statement)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def record(self, patient_id: str, report_date: str, content_sha: str,
+               parts: Mapping[str, Any]) -> Optional[int]:
+        """
+        Stores the labs of one analysed report. Returns the new report id, or
+        None if this patient already has a report with these bytes.
+        """
+        registry = get_registry()
+        labs = parts["parsed_labs"]
+        keys, codes = registry.classify(labs)
+        ml = parts["ml_result"]
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO reports (patient_id, report_date, content_sha, config_version, "
+                    "risk_label, risk_score, conditions, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        patient_id, report_date, content_sha, registry.version,
+                        ml.risk.risk_label, ml.risk.risk_score,
+                        orjson.dumps(ml.conditions).decode("utf-8"), time.time(),
+                    ),
+                )
+                if cur.rowcount == 0:
+                    return None
+                report_id = cur.lastrowid
+                conn.executemany(
+                    "INSERT INTO lab_values (patient_id, lab_key, report_date, report_id, value, unit, flag) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (patient_id, key, report_date, report_id, labs[key], registry.unit(key), FLAG_NAMES[code])
+                        for key, code in zip(keys, codes.tolist())
+                    ],
+                )
+        return report_id
+
+    def reports(self, patient_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """The patient's reports, oldest first (the newest ``limit`` if given)."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT id, report_date, content_sha, config_version, risk_label, risk_score, conditions "
+                "FROM reports WHERE patient_id = ? ORDER BY report_date DESC, id DESC LIMIT ?",
+                (patient_id, -1 if limit is None else limit),
+            ).fetchall()
+        out = []
+        for row in reversed(rows):
+            report = dict(row)
+            report["conditions"] = orjson.loads(report["conditions"])
+            out.append(report)
+        return out
+
+    def iter_reports(self, patient_id: Optional[str] = None, since: Optional[str] = None,
+                     until: Optional[str] = None, batch_size: int = 10000) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Every stored report with its labs ({lab_key: (value, flag)}), in id
+        order, ``batch_size`` reports at a time. The lock is only held while
+        a batch is read.
+        """
+        sql = ("SELECT id AS report_id, patient_id, report_date, content_sha, config_version, "
+               "risk_label, risk_score, conditions FROM reports WHERE id > ?")
+        filters: List[Any] = []
+        if patient_id:
+            sql += " AND patient_id = ?"
+            filters.append(patient_id)
+        if since:
+            sql += " AND report_date >= ?"
+            filters.append(since)
+        if until:
+            sql += " AND report_date <= ?"
+            filters.append(until)
+        sql += " ORDER BY id LIMIT ?"
+
+        last_id = 0
+        while True:
+            with self._lock:
+                conn = self._connect()
+                rows = conn.execute(sql, [last_id, *filters, batch_size]).fetchall()
+                if not rows:
+                    return
+                reports = {}
+                for row in rows:
+                    report = dict(row)
+                    report["conditions"] = orjson.loads(report["conditions"])
+                    report["labs"] = {}
+                    reports[report["report_id"]] = report
+                ids = list(reports)
+                for i in range(0, len(ids), _MAX_SQL_PARAMS):
+                    chunk = ids[i:i + _MAX_SQL_PARAMS]
+                    for report_id, lab_key, value, flag in conn.execute(
+                        "SELECT report_id, lab_key, value, flag FROM lab_values WHERE report_id IN ("
+                        + ",".join("?" * len(chunk)) + ")",
+                        chunk,
+                    ):
+                        reports[report_id]["labs"][lab_key] = (value, flag)
+            last_id = ids[-1]
+            yield list(reports.values())
+
+    def series(self, patient_id: str, lab_key: str, since: Optional[str] = None,
+               until: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Values of one lab, oldest first, optionally between two report dates (inclusive)."""
+        sql = "SELECT report_date, report_id, value, unit, flag FROM lab_values WHERE patient_id = ? AND lab_key = ?"
+        params: List[Any] = [patient_id, lab_key]
+        if since:
+            sql += " AND report_date >= ?"
+            params.append(since)
+        if until:
+            sql += " AND report_date <= ?"
+            params.append(until)
+        with self._lock:
+            rows = self._connect().execute(sql + " ORDER BY report_date, report_id", params).fetchall()
+        return [dict(row) for row in rows]
+
+    def changes(self, patient_id: str, report_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Every lab of a report (the latest by default) next to the same lab's
+        previous value for the patient, which may come from any earlier report.
+        None if there is no such report.
+        """
+        with self._lock:
+            conn = self._connect()
+            if report_id is None:
+                report = conn.execute(
+                    "SELECT id, report_date FROM reports WHERE patient_id = ? "
+                    "ORDER BY report_date DESC, id DESC LIMIT 1",
+                    (patient_id,),
+                ).fetchone()
+            else:
+                report = conn.execute(
+                    "SELECT id, report_date FROM reports WHERE patient_id = ? AND id = ?",
+                    (patient_id, report_id),
+                ).fetchone()
+            if report is None:
+                return None
+            current = conn.execute(
+                "SELECT lab_key, value, unit, flag FROM lab_values WHERE report_id = ? ORDER BY lab_key",
+                (report["id"],),
+            ).fetchall()
+            labs = {}
+            for row in current:
+                prev = conn.execute(
+                    "SELECT report_date, report_id, value FROM lab_values "
+                    "WHERE patient_id = ? AND lab_key = ? AND (report_date, report_id) < (?, ?) "
+                    "ORDER BY report_date DESC, report_id DESC LIMIT 1",
+                    (patient_id, row["lab_key"], report["report_date"], report["id"]),
+                ).fetchone()
+                entry = {"value": row["value"], "unit": row["unit"], "flag": row["flag"]}
+                if prev is not None:
+                    delta = row["value"] - prev["value"]
+                    entry.update(
+                        previous_value=prev["value"],
+                        previous_date=prev["report_date"],
+                        previous_report_id=prev["report_id"],
+                        delta=delta,
+                        pct_change=delta / prev["value"] * 100.0 if prev["value"] else None,
+                    )
+                labs[row["lab_key"]] = entry
+        return {"report_id": report["id"], "report_date": report["report_date"], "labs": labs}
+
+
+RESULTS_STORE = ResultsStore()
@@ -0,0 +1,195 @@
+# scheduler_layer.py
+"""
+Size-aware scheduler in front of the OCR stage.
+
+Each request opens a job with an estimated cost (PDF page count read from the
+file header, or image pixels expressed in page equivalents) and submits one
+task per page. Idle workers always take a page from the cheapest waiting job.
+A job's cost shrinks the longer it waits (aging), so large documents are not
+starved. Each job may only have a limited number of pages on workers at once,
+so one 50-page PDF cannot occupy the whole pool. The limit comes from the CPU
+budget and shrinks as more requests compete; LAB_MAX_PAGES_IN_FLIGHT caps it.
+"""
+import contextvars
+import io
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, List, Optional, Tuple
+
+import profiling_layer
+from cpu_budget import CPU_BUDGET, CPUBudget
+from metrics_layer import Gauge, Histogram, LATENCY_BUCKETS
+
+# 0 means no fixed cap: the CPU budget decides per request.
+MAX_PAGES_IN_FLIGHT = int(os.getenv("LAB_MAX_PAGES_IN_FLIGHT", "0"))
+# Cost units (pages) a waiting job is discounted per second of waiting.
+AGING_PER_SECOND = float(os.getenv("LAB_SCHED_AGING", "1.0"))
+
+# Roughly one A4 page rasterized at 200 DPI.
+PAGE_PIXELS = 1654 * 2339
+
+SIZE_CLASSES = (("small", 1.5), ("medium", 10.0), ("large", float("inf")))
+
+QUEUE_WAIT_SECONDS = Histogram(
+    "lab_queue_wait_seconds",
+    "Time a page waited for an OCR worker, by job size class.",
+    ("size_class",),
+    buckets=(0.001,) + LATENCY_BUCKETS,
+)
+QUEUE_DEPTH = Gauge("lab_ocr_queue_depth", "Pages waiting for an OCR worker.")
+JOBS_ACTIVE = Gauge("lab_ocr_jobs_active", "OCR jobs with pages queued or running.", ("size_class",))
+
+_PDF_COUNT_RE = re.compile(rb"/Count\s+(\d+)")
+_PDF_PAGE_RE = re.compile(rb"/Type\s*/Page(?!s)")
+
+
+def estimate_pdf_pages(file_bytes: bytes) -> int:
+    """Page count from the PDF page tree, without rasterizing anything."""
+    counts = [int(m.group(1)) for m in _PDF_COUNT_RE.finditer(file_bytes)]
+    if counts:
+        return max(1, max(counts))
+    # Page tree hidden in compressed object streams: count page objects, and
+    # as a last resort assume ~100 KB per scanned page.
+    pages = len(_PDF_PAGE_RE.findall(file_bytes))
+    return max(1, pages or len(file_bytes) // 100_000)
+
+
+def estimate_image_pixels(file_bytes: bytes) -> int:
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(file_bytes)) as img:  # reads the header only
+            width, height = img.size
+    except Exception:
+        return PAGE_PIXELS
+    return width * height
+
+
+def estimate_cost(file_bytes: bytes, file_type: str) -> float:
+    """Cost of an upload in page equivalents."""
+    if file_type == "pdf":
+        return float(estimate_pdf_pages(file_bytes))
+    return max(0.1, estimate_image_pixels(file_bytes) / PAGE_PIXELS)
+
+
+def size_class(cost: float) -> str:
+    for name, limit in SIZE_CLASSES:
+        if cost <= limit:
+            return name
+    return SIZE_CLASSES[-1][0]
+
+
+class OCRJob:
+    def __init__(self, cost: float):
+        self.cost = cost
+        self.size_class = size_class(cost)
+        self.enqueued_at = time.monotonic()
+        self.in_flight = 0
+        self.tasks: Deque[Tuple[Callable, tuple, Future, contextvars.Context, float]] = deque()
+
+
+class OCRScheduler:
+    def __init__(
+        self,
+        budget: CPUBudget = CPU_BUDGET,
+        max_pages_in_flight: int = MAX_PAGES_IN_FLIGHT,
+        aging_per_second: float = AGING_PER_SECOND,
+    ):
+        self.budget = budget
+        self.workers = budget.workers
+        self.max_pages_in_flight = max_pages_in_flight
+        self.aging_per_second = aging_per_second
+        self._cond = threading.Condition()
+        self._jobs: List[OCRJob] = []
+        self._threads: List[threading.Thread] = []
+        self._queued = 0
+
+    def _ensure_started(self) -> None:
+        if self._threads:
+            return
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"ocr-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def open_job(self, cost: float) -> OCRJob:
+        job = OCRJob(cost)
+        with self._cond:
+            self._ensure_started()
+            self._jobs.append(job)
+            JOBS_ACTIVE.inc(1, job.size_class)
+        return job
+
+    def close_job(self, job: OCRJob) -> None:
+        """Drops pages of ``job`` that have not started yet and forgets the job."""
+        with self._cond:
+            for _, _, future, _, _ in job.tasks:
+                future.cancel()
+            self._queued -= len(job.tasks)
+            job.tasks.clear()
+            QUEUE_DEPTH.set(self._queued)
+            if job in self._jobs:
+                self._jobs.remove(job)
+                JOBS_ACTIVE.dec(1, job.size_class)
+
+    def submit(self, job: OCRJob, fn: Callable, *args) -> Future:
+        future: Future = Future()
+        # Run the task in the submitter's context so stage() timings reach
+        # the request that queued the page.
+        ctx = contextvars.copy_context()
+        with self._cond:
+            job.tasks.append((fn, args, future, ctx, time.monotonic()))
+            self._queued += 1
+            QUEUE_DEPTH.set(self._queued)
+            self._cond.notify()
+        return future
+
+    def page_cap(self) -> int:
+        active = sum(1 for job in self._jobs if job.tasks or job.in_flight)
+        cap = self.budget.page_cap(active)
+        if self.max_pages_in_flight:
+            cap = min(cap, self.max_pages_in_flight)
+        return cap
+
+    def _pick(self) -> Optional[OCRJob]:
+        now = time.monotonic()
+        cap = self.page_cap()
+        best, best_score = None, None
+        for job in self._jobs:
+            if not job.tasks or job.in_flight >= cap:
+                continue
+            score = job.cost - self.aging_per_second * (now - job.enqueued_at)
+            if best is None or score < best_score:
+                best, best_score = job, score
+        return best
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                job = self._pick()
+                while job is None:
+                    self._cond.wait()
+                    job = self._pick()
+                fn, args, future, ctx, queued_at = job.tasks.popleft()
+                job.in_flight += 1
+                self._queued -= 1
+                QUEUE_DEPTH.set(self._queued)
+
+            QUEUE_WAIT_SECONDS.observe(time.monotonic() - queued_at, job.size_class)
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(ctx.run(profiling_layer.call, fn, *args))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                with self._cond:
+                    job.in_flight -= 1
+                    self._cond.notify_all()
+
+
+OCR_SCHEDULER = OCRScheduler()
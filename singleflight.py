@@ -0,0 +1,170 @@
+# singleflight.py
+"""
+Single-flight coalescing of identical analyses.
+
+Concurrent requests for the same key share one computation. Inside a uvicorn
+worker, followers await the leader's future. Across workers, the leader holds
+an exclusive flock on a per-key lock file while it computes and stores the
+result. Workers that find the lock taken wait for it, then read the stored
+result through ``lookup`` instead of recomputing.
+
+Callers pass their time.monotonic() deadline. Waiting for another request's
+computation, in this worker or another one, stops at the deadline with
+asyncio.TimeoutError. A result the leader marked as not ``shareable`` (a
+partial one) is only taken by followers whose deadline is no later than the
+leader's; the others compute the key again. If the leader is cancelled (its
+client went away), one of its followers computes the key instead.
+"""
+import asyncio
+import hashlib
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: coalesce within the process only
+    fcntl = None
+
+from metrics_layer import Counter
+
+LOCK_DIR = os.getenv("LAB_SINGLEFLIGHT_LOCK_DIR", os.path.join(".cache", "locks"))
+
+COALESCED_REQUESTS = Counter(
+    "lab_coalesced_requests_total",
+    "Requests served by an identical computation already in flight.",
+    ("scope",),
+)
+
+# How often a worker with a deadline retries a lock held by another worker.
+_LOCK_POLL_S = 0.05
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def _later(deadline: Optional[float], than: Optional[float]) -> bool:
+    """True if ``deadline`` leaves more time than ``than`` (None: no deadline)."""
+    return than is not None and (deadline is None or deadline > than)
+
+
+class SingleFlight:
+    def __init__(self, lock_dir: str = LOCK_DIR):
+        self.lock_dir = lock_dir
+        self._inflight: Dict[str, Tuple[asyncio.Future, Optional[float]]] = {}
+
+    async def do(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        lookup: Callable[[], Optional[Any]],
+        deadline: Optional[float] = None,
+        shareable: Callable[[Any], bool] = lambda result: True,
+    ) -> Any:
+        """
+        Runs ``compute`` once per key at a time. ``compute`` must store its
+        result where ``lookup`` (a blocking call) can find it, and should
+        stop at ``deadline``. Raises asyncio.TimeoutError if the deadline
+        passes while waiting for another request's computation.
+        """
+        while key in self._inflight:
+            pending, leader_deadline = self._inflight[key]
+            try:
+                result = await asyncio.wait_for(asyncio.shield(pending), _remaining(deadline))
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The leader's request went away; this one takes over.
+                continue
+            if shareable(result) or not _later(deadline, leader_deadline):
+                COALESCED_REQUESTS.inc(1, "local")
+                return result
+            # The leader ran out of its (shorter) budget; this caller has more.
+
+        future = asyncio.get_running_loop().create_future()
+        # Nobody may be waiting; don't warn about an unretrieved exception.
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = (future, deadline)
+        try:
+            result = await self._lead(key, compute, lookup, deadline)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+
+    async def _lead(self, key, compute, lookup, deadline) -> Any:
+        if fcntl is None:
+            return await compute()
+
+        fd, found = await asyncio.to_thread(self._acquire, key, lookup, deadline)
+        try:
+            if found is not None:
+                COALESCED_REQUESTS.inc(1, "process")
+                return found
+            return await compute()
+        finally:
+            await asyncio.to_thread(self._release, key, fd)
+
+    def _lock_path(self, key: str) -> str:
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()[:40]
+        return os.path.join(self.lock_dir, f"{name}.lock")
+
+    def _lock(self, fd: int, deadline: Optional[float]) -> None:
+        if deadline is None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            return
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                remaining = _remaining(deadline)
+                if not remaining:
+                    os.close(fd)
+                    raise asyncio.TimeoutError()
+                time.sleep(min(_LOCK_POLL_S, remaining))
+
+    def _acquire(self, key: str, lookup: Callable[[], Optional[Any]],
+                 deadline: Optional[float] = None) -> Tuple[int, Optional[Any]]:
+        os.makedirs(self.lock_dir, exist_ok=True)
+        path = self._lock_path(key)
+        while True:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._lock(fd, deadline)
+
+            # The previous holder unlinks the file on release; if we locked
+            # an unlinked file, start over on the current one.
+            try:
+                same_file = os.fstat(fd).st_ino == os.stat(path).st_ino
+            except FileNotFoundError:
+                same_file = False
+            if not same_file:
+                os.close(fd)
+                continue
+
+            # Another worker may have finished this key while we waited for
+            # the lock, or between the caller's cache check and now.
+            try:
+                return fd, lookup()
+            except BaseException:
+                self._release(key, fd)
+                raise
+
+    def _release(self, key: str, fd: int) -> None:
+        try:
+            os.unlink(self._lock_path(key))
+        except FileNotFoundError:
+            pass
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+SINGLE_FLIGHT = SingleFlight()
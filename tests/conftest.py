@@ -0,0 +1,15 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Caches, stores and locks of the modules under test go to a scratch
+# directory, never to the working tree's .cache.
+_SCRATCH = tempfile.mkdtemp(prefix="lab-tests-")
+os.environ.setdefault("LAB_RESULT_CACHE_PATH", os.path.join(_SCRATCH, "results.sqlite3"))
+os.environ.setdefault("LAB_RESULTS_STORE_PATH", os.path.join(_SCRATCH, "patient_results.sqlite3"))
+os.environ.setdefault("LAB_SINGLEFLIGHT_LOCK_DIR", os.path.join(_SCRATCH, "locks"))
+os.environ.setdefault("LAB_PROFILE_DIR", os.path.join(_SCRATCH, "profiles"))
@@ -0,0 +1,110 @@
+# tests/test_analyze_coalescing.py
+"""/analyze_report coalescing with per-request budgets; OCR is replaced by a fake."""
+import asyncio
+import threading
+import time
+import uuid
+
+import httpx
+
+import main
+from pipeline import analyze_pages
+
+TEXT = "Hemoglobin : 11 g/dL\nTSH : 5"
+
+
+def _fake_analyze_upload(file_bytes, file_type, deadline=None, normalized=False):
+    if deadline is None:
+        time.sleep(0.05)
+        return analyze_pages([{"page_number": 1, "text": TEXT}])
+    time.sleep(max(0.0, deadline - time.monotonic()))
+    parts = analyze_pages([])
+    parts.update(truncated=True, pages_total=1,
+                 truncation_reason="Time budget exhausted: OCR finished 0 of 1 pages.")
+    return parts
+
+
+async def _post(client, data, headers=None):
+    return await client.post(
+        "/analyze_report", params={"include": "lean"}, headers=headers or {},
+        files={"file": ("report.png", data, "image/png")},
+    )
+
+
+def test_unbounded_follower_does_not_get_tight_leaders_partial_result(monkeypatch):
+    bounded = []
+
+    def counting_analyze_upload(file_bytes, file_type, deadline=None, normalized=False):
+        bounded.append(deadline is not None)
+        return _fake_analyze_upload(file_bytes, file_type, deadline, normalized)
+
+    monkeypatch.setattr(main, "analyze_upload", counting_analyze_upload)
+    data = uuid.uuid4().bytes
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            leader = asyncio.create_task(_post(client, data, {"X-Request-Budget-Ms": "100"}))
+            await asyncio.sleep(0.02)
+            follower = asyncio.create_task(_post(client, data))
+            return await leader, await follower
+
+    leader, follower = asyncio.run(run())
+    assert leader.json()["truncated"] is True
+    body = follower.json()
+    assert "truncated" not in body
+    assert body["parsed_labs"]["tsh"] == 5
+    # The follower ran its own analysis rather than sharing the partial one.
+    assert bounded == [True, False]
+
+
+def test_follower_times_out_waiting_for_slow_leader(monkeypatch):
+    def slow_analyze_upload(file_bytes, file_type, deadline=None, normalized=False):
+        time.sleep(0.5)
+        return analyze_pages([{"page_number": 1, "text": TEXT}])
+
+    monkeypatch.setattr(main, "analyze_upload", slow_analyze_upload)
+    data = uuid.uuid4().bytes
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            leader = asyncio.create_task(_post(client, data))
+            await asyncio.sleep(0.02)
+            started = time.monotonic()
+            follower = await _post(client, data, {"X-Request-Budget-Ms": "50"})
+            waited = time.monotonic() - started
+            return await leader, follower, waited
+
+    leader, follower, waited = asyncio.run(run())
+    assert "truncated" not in leader.json()
+    assert follower.json()["truncated"] is True
+    assert "waiting" in follower.json()["truncation_reason"]
+    assert waited < 0.4
+
+
+def test_cache_and_response_building_stay_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr(main, "analyze_upload", _fake_analyze_upload)
+    threads = []
+
+    def recording(name, fn):
+        def wrapper(*args, **kwargs):
+            threads.append((name, threading.current_thread() is threading.main_thread()))
+            return fn(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(main.RESULT_CACHE, "get", recording("get", main.RESULT_CACHE.get))
+    monkeypatch.setattr(main.RESULT_CACHE, "put", recording("put", main.RESULT_CACHE.put))
+    monkeypatch.setattr(main, "_build_result", recording("build", main._build_result))
+    data = uuid.uuid4().bytes
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await _post(client, data), await _post(client, data)
+
+    miss, hit = asyncio.run(run())
+    assert miss.status_code == hit.status_code == 200
+    assert {name for name, _ in threads} == {"get", "put", "build"}
+    # asyncio.run drives the event loop on the main thread.
+    assert not any(on_loop for _, on_loop in threads)
@@ -0,0 +1,12 @@
+# tests/test_bulk_pdf.py
+from bulk_pdf import report_filename
+
+
+def test_safe_ids_keep_their_name():
+    assert report_filename("R-2024.01_7") == "R-2024.01_7.pdf"
+
+
+def test_sanitized_ids_do_not_collide():
+    names = {report_filename(i) for i in ("a/b", "a_b", "a b", "a\\b", "a:b")}
+    assert len(names) == 5
+    assert "a_b.pdf" in names
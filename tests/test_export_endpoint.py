@@ -0,0 +1,25 @@
+# tests/test_export_endpoint.py
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import profiling_layer
+from pipeline import analyze_pages
+from results_store import RESULTS_STORE
+
+pytest.importorskip("pyarrow")
+
+TOKEN = "test-admin-token"
+
+
+def test_export_is_not_gzipped_again(monkeypatch):
+    monkeypatch.setattr(profiling_layer, "ADMIN_TOKEN", TOKEN)
+    parts = analyze_pages([{"page_number": 1, "text": "Hemoglobin : 11 g/dL"}])
+    RESULTS_STORE.record("P-export-1", "2024-03-01", "e" * 64, parts)
+    resp = TestClient(main.app).get(
+        "/admin/export", params={"format": "parquet"},
+        headers={"X-Admin-Token": TOKEN, "Accept-Encoding": "gzip"},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "identity"
+    assert resp.content[:4] == b"PAR1"
@@ -0,0 +1,60 @@
+# tests/test_frontend_batch.py
+import argparse
+import json
+
+import requests
+
+import frontend
+
+
+class _Response:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.text = body
+        self.headers = {}
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class _Session:
+    """No cached results; posts answer by file name."""
+
+    def get(self, url, timeout=None):
+        return _Response(404, "")
+
+    def post(self, url, files=None, timeout=None):
+        name = files["file"][0]
+        if name.startswith("html"):
+            return _Response(200, "<html>proxy error</html>")
+        if name.startswith("broken"):
+            raise requests.exceptions.InvalidURL("bad url")
+        return _Response(200, json.dumps({"parsed_labs": {}}))
+
+
+def test_only_backend_file_types_are_collected(tmp_path):
+    for name in ("a.pdf", "b.PNG", "c.jpeg", "d.tif", "e.webp", "f.bmp"):
+        (tmp_path / name).write_bytes(b"x")
+    found = [p.rsplit("/", 1)[-1] for p in frontend.expand_inputs([str(tmp_path), str(tmp_path / "*")])]
+    assert found == ["a.pdf", "b.PNG", "c.jpeg"]
+
+
+def test_one_bad_file_does_not_stop_the_batch(tmp_path, monkeypatch):
+    for name in ("good1.pdf", "html.pdf", "broken.pdf", "good2.pdf"):
+        (tmp_path / name).write_bytes(name.encode())
+    monkeypatch.setattr(frontend, "make_session", lambda pool_size: _Session())
+    out = tmp_path / "out.ndjson"
+    args = argparse.Namespace(inputs=[str(tmp_path)], out=str(out), concurrency=2,
+                              retries=0, backoff=0.0, timeout=5.0)
+
+    assert frontend.run_batch(args) == 1
+    records = {r["path"].rsplit("/", 1)[-1]: r for r in map(json.loads, out.read_text().splitlines())}
+    assert set(records) == {"good1.pdf", "html.pdf", "broken.pdf", "good2.pdf"}
+    assert records["good1.pdf"]["status"] == records["good2.pdf"]["status"] == "ok"
+    assert records["html.pdf"]["status"] == records["broken.pdf"]["status"] == "error"
+
+
+def test_unreadable_file_becomes_an_error_record(tmp_path):
+    record = frontend.analyze_one(_Session(), str(tmp_path / "missing.pdf"), 5.0, 0, 0.0)
+    assert record["status"] == "error"
@@ -0,0 +1,57 @@
+# tests/test_lab_config_reload.py
+import json
+
+import lab_registry
+from ml_layer import detect_conditions, full_ml_analysis
+
+LIVER_PANEL = {"sgpt": 500.0, "sgot": 30.0, "alp": 90.0, "hemoglobin": 14.0}
+
+
+def _shipped_config():
+    with open(lab_registry.CONFIG_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_config(path, cfg):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cfg, f)
+
+
+def test_reloaded_config_without_enzyme_keys_keeps_analysis_working(tmp_path, monkeypatch):
+    cfg = _shipped_config()
+    config_path = str(tmp_path / "lab_config.json")
+    _write_config(config_path, cfg)
+    monkeypatch.setattr(lab_registry, "CONFIG_PATH", config_path)
+    monkeypatch.setattr(lab_registry, "_registry", None)
+    lab_registry.reload(force=True)
+    assert "liver_issue" in detect_conditions(LIVER_PANEL)
+
+    # A new version that drops every key the liver rules read.
+    cfg["version"] = "2"
+    for section in lab_registry.SECTIONS:
+        for key in ("sgpt", "sgot", "alp", "alt", "ast"):
+            cfg[section].pop(key, None)
+    _write_config(config_path, cfg)
+    assert lab_registry.reload(force=True) is True
+    registry = lab_registry.get_registry()
+    assert registry.version.startswith("2-")
+    assert "sgpt" not in registry.index
+
+    result = full_ml_analysis(LIVER_PANEL)
+    assert "liver_issue" not in result.conditions
+    assert result.risk.risk_label != "Unknown"
+
+
+def test_broken_reload_keeps_the_active_version(tmp_path, monkeypatch):
+    config_path = str(tmp_path / "lab_config.json")
+    _write_config(config_path, _shipped_config())
+    monkeypatch.setattr(lab_registry, "CONFIG_PATH", config_path)
+    monkeypatch.setattr(lab_registry, "_registry", None)
+    lab_registry.reload(force=True)
+    version = lab_registry.get_registry().version
+
+    with open(config_path, "w", encoding="utf-8") as f:
+        f.write("{not json")
+    assert lab_registry.reload(force=True) is False
+    assert lab_registry.get_registry().version == version
+    assert "invalid JSON" in lab_registry.status()["last_error"]
@@ -0,0 +1,46 @@
+# tests/test_ocr_pages.py
+"""PDF pages are OCR'd from one temporary copy per job; Tesseract is replaced by a fake."""
+import os
+
+import ocr_layer
+
+PDF = b"%PDF-1.4 fake body"
+
+
+def _fake_ocr(seen):
+    def fake_ocr_page(source, file_type, page_number, deadline=None, normalized=False):
+        with open(source, "rb") as f:
+            assert f.read() == PDF
+        seen.append((source, page_number))
+        return f"page {page_number}"
+    return fake_ocr_page
+
+
+def test_pdf_pages_share_one_temp_file(monkeypatch):
+    seen = []
+    monkeypatch.setattr(ocr_layer, "pdf_page_count", lambda file_bytes: 3)
+    monkeypatch.setattr(ocr_layer, "_ocr_page", _fake_ocr(seen))
+
+    result = ocr_layer.ocr_image_bytes(PDF, "pdf")
+
+    assert [p["text"] for p in result["pages"]] == ["page 1", "page 2", "page 3"]
+    paths = {path for path, _ in seen}
+    assert len(paths) == 1
+    assert not os.path.exists(paths.pop())
+
+
+def test_iter_ocr_pages_removes_temp_file_when_closed_early(monkeypatch):
+    seen = []
+    monkeypatch.setattr(ocr_layer, "pdf_page_count", lambda file_bytes: 4)
+    monkeypatch.setattr(ocr_layer, "_ocr_page", _fake_ocr(seen))
+
+    pages = ocr_layer.iter_ocr_pages(PDF, "pdf", first_page=2)
+    assert next(pages)["page_number"] == 2
+    pages.close()
+
+    assert seen and not os.path.exists(seen[0][0])
+
+
+def test_images_are_passed_as_bytes():
+    with ocr_layer._page_source(b"\xff\xd8jpeg", "image") as source:
+        assert source == b"\xff\xd8jpeg"
@@ -0,0 +1,79 @@
+# tests/test_patient_endpoints.py
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import profiling_layer
+from pipeline import analyze_pages
+from results_store import RESULTS_STORE
+
+TOKEN = "test-admin-token"
+PATIENT = "P-auth-1"
+ROUTES = (
+    f"/patients/{PATIENT}/reports",
+    f"/patients/{PATIENT}/labs/hemoglobin",
+    f"/patients/{PATIENT}/changes",
+)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(profiling_layer, "ADMIN_TOKEN", TOKEN)
+    parts = analyze_pages([{"page_number": 1, "text": "Hemoglobin : 11.2 g/dL\nTSH : 5.2"}])
+    RESULTS_STORE.record(PATIENT, "2024-03-01", "f" * 64, parts)
+    return TestClient(main.app)
+
+
+@pytest.mark.parametrize("route", ROUTES)
+def test_missing_token_is_401(client, route):
+    resp = client.get(route)
+    assert resp.status_code == 401
+    assert "X-Admin-Token" in resp.headers["WWW-Authenticate"]
+
+
+@pytest.mark.parametrize("route", ROUTES)
+def test_wrong_token_is_403(client, route):
+    assert client.get(route, headers={"X-Admin-Token": "nope"}).status_code == 403
+
+
+@pytest.mark.parametrize("route", ROUTES)
+def test_valid_token_reads_history(client, route):
+    resp = client.get(route, headers={"X-Admin-Token": TOKEN})
+    assert resp.status_code == 200
+    assert resp.json()["patient_id"] == PATIENT
+
+
+@pytest.mark.parametrize("route", ROUTES)
+def test_history_is_off_without_a_configured_token(client, route, monkeypatch):
+    monkeypatch.setattr(profiling_layer, "ADMIN_TOKEN", "")
+    assert client.get(route, headers={"X-Admin-Token": TOKEN}).status_code == 404
+
+
+def _upload(client, patient_id, headers=None):
+    return client.post(
+        "/analyze_report", params={"patient_id": patient_id, "include": "lean"},
+        headers=headers or {}, files={"file": ("report.png", b"png bytes", "image/png")},
+    )
+
+
+def test_upload_into_history_needs_token(client, monkeypatch):
+    def fail_analyze_upload(*args, **kwargs):
+        raise AssertionError("an unauthenticated upload must not be analyzed")
+
+    monkeypatch.setattr(main, "analyze_upload", fail_analyze_upload)
+    resp = _upload(client, "P-auth-2")
+    assert resp.status_code == 401
+    assert "X-Admin-Token" in resp.headers["WWW-Authenticate"]
+    assert _upload(client, "P-auth-2", {"X-Admin-Token": "nope"}).status_code == 403
+    assert RESULTS_STORE.reports("P-auth-2") == []
+
+
+def test_upload_into_history_with_token(client, monkeypatch):
+    def fake_analyze_upload(file_bytes, file_type, deadline=None, normalized=False):
+        return analyze_pages([{"page_number": 1, "text": "Hemoglobin : 11 g/dL"}])
+
+    monkeypatch.setattr(main, "analyze_upload", fake_analyze_upload)
+    resp = _upload(client, "P-auth-3", {"X-Admin-Token": TOKEN})
+    assert resp.status_code == 200
+    history = client.get("/patients/P-auth-3/reports", headers={"X-Admin-Token": TOKEN})
+    assert len(history.json()["reports"]) == 1
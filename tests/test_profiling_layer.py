@@ -0,0 +1,43 @@
+# tests/test_profiling_layer.py
+import contextvars
+import os
+import threading
+
+import profiling_layer
+
+
+def _work(n):
+    return sum(i * i for i in range(n))
+
+
+def test_nested_units_on_other_threads_are_profiled(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling_layer, "PROFILE_DIR", str(tmp_path))
+    session = profiling_layer.start("test")
+    results = []
+
+    def handler():
+        # Mirrors analyze_report: the handler's unit fans OCR pages out to
+        # scheduler workers that run their own call() concurrently.
+        workers = []
+        for n in (1000, 2000):
+            ctx = contextvars.copy_context()
+            worker = threading.Thread(target=lambda n=n, ctx=ctx: results.append(ctx.run(profiling_layer.call, _work, n)))
+            worker.start()
+            workers.append(worker)
+        for worker in workers:
+            worker.join()
+        return _work(10)
+
+    try:
+        assert profiling_layer.call(handler) == _work(10)
+    finally:
+        summary = profiling_layer.finish(session)
+
+    assert sorted(results) == [_work(1000), _work(2000)]
+    assert not summary["profiler_busy"]
+    assert os.path.exists(tmp_path / f"{summary['id']}.prof")
+    assert "_work" in summary["top_cumulative"]
+
+
+def test_call_without_profile_just_runs():
+    assert profiling_layer.call(_work, 10) == _work(10)
@@ -0,0 +1,144 @@
+# tests/test_singleflight.py
+import asyncio
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def _not_truncated(parts):
+    return not parts.get("truncated")
+
+
+def test_unbounded_follower_recomputes_after_truncated_leader(tmp_path):
+    flight = SingleFlight(lock_dir=str(tmp_path))
+    calls = []
+
+    async def leader_compute():
+        calls.append("leader")
+        await asyncio.sleep(0.05)
+        return {"truncated": True}
+
+    async def follower_compute():
+        calls.append("follower")
+        return {"truncated": False}
+
+    async def run():
+        leader = asyncio.create_task(flight.do(
+            "k", leader_compute, lambda: None,
+            deadline=time.monotonic() + 0.05, shareable=_not_truncated,
+        ))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do(
+            "k", follower_compute, lambda: None, shareable=_not_truncated,
+        ))
+        return await leader, await follower
+
+    leader_parts, follower_parts = asyncio.run(run())
+    assert leader_parts == {"truncated": True}
+    assert follower_parts == {"truncated": False}
+    assert calls == ["leader", "follower"]
+
+
+def test_follower_with_shorter_budget_takes_truncated_result(tmp_path):
+    flight = SingleFlight(lock_dir=str(tmp_path))
+
+    async def leader_compute():
+        await asyncio.sleep(0.05)
+        return {"truncated": True}
+
+    async def follower_compute():
+        raise AssertionError("follower must not recompute")
+
+    async def run():
+        leader = asyncio.create_task(flight.do(
+            "k", leader_compute, lambda: None,
+            deadline=time.monotonic() + 5, shareable=_not_truncated,
+        ))
+        await asyncio.sleep(0)
+        follower = await flight.do(
+            "k", follower_compute, lambda: None,
+            deadline=time.monotonic() + 1, shareable=_not_truncated,
+        )
+        await leader
+        return follower
+
+    assert asyncio.run(run()) == {"truncated": True}
+
+
+def test_follower_wait_is_bounded_by_its_deadline(tmp_path):
+    flight = SingleFlight(lock_dir=str(tmp_path))
+
+    async def slow_compute():
+        await asyncio.sleep(1.0)
+        return {}
+
+    async def run():
+        leader = asyncio.create_task(flight.do("k", slow_compute, lambda: None))
+        await asyncio.sleep(0)
+        started = time.monotonic()
+        with pytest.raises(asyncio.TimeoutError):
+            await flight.do("k", slow_compute, lambda: None, deadline=time.monotonic() + 0.05)
+        waited = time.monotonic() - started
+        await leader
+        return waited
+
+    assert asyncio.run(run()) < 0.5
+
+
+def test_lock_wait_across_workers_is_bounded_by_deadline(tmp_path):
+    holder = SingleFlight(lock_dir=str(tmp_path))
+    other = SingleFlight(lock_dir=str(tmp_path))
+    fd, _ = holder._acquire("k", lambda: None)
+    try:
+        started = time.monotonic()
+        with pytest.raises(asyncio.TimeoutError):
+            other._acquire("k", lambda: None, deadline=time.monotonic() + 0.1)
+        assert time.monotonic() - started < 0.5
+    finally:
+        holder._release("k", fd)
+
+
+def test_followers_take_over_when_the_leader_is_cancelled(tmp_path):
+    flight = SingleFlight(lock_dir=str(tmp_path))
+    calls = []
+
+    async def compute():
+        calls.append("compute")
+        await asyncio.sleep(0.05)
+        return {"truncated": False}
+
+    async def run():
+        leader = asyncio.create_task(flight.do("k", compute, lambda: None))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(flight.do("k", compute, lambda: None)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers)
+
+    assert asyncio.run(run()) == [{"truncated": False}] * 2
+    # One follower became the new leader; the other shared its result.
+    assert calls == ["compute", "compute"]
+
+
+def test_cancelled_follower_does_not_cancel_the_leader(tmp_path):
+    flight = SingleFlight(lock_dir=str(tmp_path))
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return {}
+
+    async def run():
+        leader = asyncio.create_task(flight.do("k", compute, lambda: None))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("k", compute, lambda: None))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader
+
+    assert asyncio.run(run()) == {}
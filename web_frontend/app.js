@@ -1,5 +1,12 @@
 // ---------- CONFIG: group & metadata for severity ---------- //
-const BACKEND_URL = "http://127.0.0.1:8000/analyze_report";
+const API_BASE = "http://127.0.0.1:8000";
+const BACKEND_URL = `${API_BASE}/analyze_report`;
+const RESULTS_URL = `${API_BASE}/results`;
+
+// Photos are downscaled so their longer edge is at most this many pixels and
+// re-encoded as grayscale JPEG before upload (PDFs are sent as they are).
+const UPLOAD_MAX_EDGE_PX = 2000;
+const UPLOAD_JPEG_QUALITY = 0.85;
 
 // Lab groups by key
 const LAB_GROUPS = {
@@ -22,8 +29,7 @@ const LAB_GROUPS = {
     ],
 };
 
-// Basic ranges (mirrors backend interpretation_config.py for main tests)
-// Basic ranges for frontend severity & chart (mirror of backend for main tests)
+// Basic ranges (mirror of the backend lab_config.json, for main tests)
 const LAB_METADATA_FRONT = {
     // CBC
     hemoglobin:   { name: "Hemoglobin", unit: "g/dL",      low: 12.0, high: 17.0 },
@@ -110,6 +116,9 @@ let labsChart = null;
 
 let selectedFile = null;
 
+// Results already received in this tab, keyed by file SHA-256: { etag, data }
+const resultCache = new Map();
+
 // ---------- FILE HANDLING ----------
 dropzone.addEventListener("click", () => fileInput.click());
 
@@ -143,8 +152,11 @@ function updateFileInfo() {
         fileInfo.textContent = "";
         return;
     }
-    const sizeMB = (selectedFile.size / (1024 * 1024)).toFixed(2);
-    fileInfo.textContent = `📄 Selected: ${selectedFile.name} (${sizeMB} MB)`;
+    fileInfo.textContent = `📄 Selected: ${selectedFile.name} (${formatMB(selectedFile.size)} MB)`;
+}
+
+function formatMB(bytes) {
+    return (bytes / (1024 * 1024)).toFixed(2);
 }
 
 // ---------- STATUS / LOADING ----------
@@ -182,21 +194,15 @@ uploadForm.addEventListener("submit", async (e) => {
     setLoading(true);
     setStatus("Uploading & analyzing report...", "info");
 
-    const formData = new FormData();
-    formData.append("file", selectedFile);
-
     try {
-        const resp = await fetch(BACKEND_URL, {
-            method: "POST",
-            body: formData,
-        });
-
-        if (!resp.ok) {
-            const text = await resp.text();
-            throw new Error(`Backend error ${resp.status}: ${text}`);
+        const upload = await prepareUpload(selectedFile);
+        if (upload.normalized) {
+            const before = formatMB(selectedFile.size);
+            const after = formatMB(upload.blob.size);
+            const saved = Math.round(100 * (1 - upload.blob.size / selectedFile.size));
+            fileInfo.textContent = `📄 ${selectedFile.name}: ${before} → ${after} MB uploaded (${saved}% smaller)`;
         }
-
-        const data = await resp.json();
+        const data = await analyzeFile(upload);
         setStatus("Analysis complete.", "success");
         renderResults(data);
     } catch (err) {
@@ -207,6 +213,93 @@ uploadForm.addEventListener("submit", async (e) => {
     }
 });
 
+// ---------- UPLOAD PREPARATION ----------
+// Downscales and grayscales photos in the browser. Returns { blob, name,
+// normalized }; normalized uploads tell the backend to skip the colour
+// conversion and denoising it would otherwise do.
+async function prepareUpload(file) {
+    const original = { blob: file, name: file.name, normalized: false };
+    if (!file.type.startsWith("image/") || !window.createImageBitmap) return original;
+
+    let bitmap;
+    try {
+        bitmap = await createImageBitmap(file);
+    } catch (err) {
+        return original; // let the backend decode what the browser cannot
+    }
+    const scale = Math.min(1, UPLOAD_MAX_EDGE_PX / Math.max(bitmap.width, bitmap.height));
+    const canvas = document.createElement("canvas");
+    canvas.width = Math.round(bitmap.width * scale);
+    canvas.height = Math.round(bitmap.height * scale);
+    const ctx = canvas.getContext("2d");
+    ctx.drawImage(bitmap, 0, 0, canvas.width, canvas.height);
+    bitmap.close();
+
+    const image = ctx.getImageData(0, 0, canvas.width, canvas.height);
+    const px = image.data;
+    for (let i = 0; i < px.length; i += 4) {
+        // Rec. 601 luma, the same weights OpenCV uses for BGR2GRAY.
+        const y = 0.299 * px[i] + 0.587 * px[i + 1] + 0.114 * px[i + 2];
+        px[i] = px[i + 1] = px[i + 2] = y;
+    }
+    ctx.putImageData(image, 0, 0);
+
+    const blob = await new Promise(resolve => canvas.toBlob(resolve, "image/jpeg", UPLOAD_JPEG_QUALITY));
+    if (!blob || blob.size >= file.size) return original;
+    const name = file.name.replace(/\.[^.]+$/, "") + ".jpg";
+    return { blob, name, normalized: true };
+}
+
+// ---------- BACKEND CALLS ----------
+async function sha256Hex(file) {
+    if (!window.crypto || !window.crypto.subtle) return null;
+    const digest = await window.crypto.subtle.digest("SHA-256", await file.arrayBuffer());
+    return Array.from(new Uint8Array(digest))
+        .map(b => b.toString(16).padStart(2, "0"))
+        .join("");
+}
+
+// Re-uses an earlier result of the same upload when the backend still has it
+// (GET /results/<sha>, 304 if unchanged) and only uploads when it does not.
+async function analyzeFile(upload) {
+    const sha = await sha256Hex(upload.blob);
+    const query = upload.normalized ? "?normalized=true" : "";
+
+    if (sha) {
+        const known = resultCache.get(sha);
+        const headers = known ? { "If-None-Match": known.etag } : {};
+        const cachedResp = await fetch(`${RESULTS_URL}/${sha}${query}`, { headers });
+        if (cachedResp.status === 304 && known) return known.data;
+        if (cachedResp.ok) {
+            const data = await cachedResp.json();
+            rememberResult(sha, cachedResp, data);
+            return data;
+        }
+    }
+
+    const formData = new FormData();
+    formData.append("file", upload.blob, upload.name);
+
+    const resp = await fetch(`${BACKEND_URL}${query}`, {
+        method: "POST",
+        body: formData,
+    });
+
+    if (!resp.ok) {
+        const text = await resp.text();
+        throw new Error(`Backend error ${resp.status}: ${text}`);
+    }
+
+    const data = await resp.json();
+    if (sha) rememberResult(sha, resp, data);
+    return data;
+}
+
+function rememberResult(sha, resp, data) {
+    const etag = resp.headers.get("ETag");
+    if (etag) resultCache.set(sha, { etag, data });
+}
+
 // ---------- SEVERITY / GROUPING HELPERS ----------
 function classifyLab(key, value) {
     const meta = LAB_METADATA_FRONT[key];